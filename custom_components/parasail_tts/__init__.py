@@ -2,16 +2,251 @@
 from __future__ import annotations
 
 import logging
+from pathlib import Path
+from typing import TYPE_CHECKING
 
-from homeassistant.config_entries import ConfigEntry
+import voluptuous as vol
+
+from homeassistant.components.tts import (
+    ATTR_LANGUAGE,
+    ATTR_VOICE,
+    DOMAIN as TTS_DOMAIN,
+)
+from homeassistant.config_entries import ConfigEntry, ConfigEntryState
 from homeassistant.const import Platform
-from homeassistant.core import HomeAssistant
+from homeassistant.core import (
+    HomeAssistant,
+    ServiceCall,
+    ServiceResponse,
+    SupportsResponse,
+)
+from homeassistant.exceptions import HomeAssistantError
+from homeassistant.helpers import config_validation as cv, entity_registry as er
+from homeassistant.helpers.start import async_at_started
+from homeassistant.helpers.typing import ConfigType
+
+from .catalog import async_get_catalog
+from .const import (
+    ATTR_BLOCK_THRESHOLD_MS,
+    ATTR_CONFIG_ENTRY_ID,
+    ATTR_MAX_CONCURRENCY,
+    ATTR_MESSAGE,
+    ATTR_MESSAGES,
+    ATTR_OUTPUT_DIR,
+    ATTR_REDACT_TEXT,
+    ATTR_REQUESTS,
+    ATTR_VOICES,
+    CONF_DISK_CACHE,
+    CONF_EXAGGERATION,
+    CONF_TEMPERATURE,
+    CONF_VOICE,
+    DATA_CAPTURE,
+    DATA_JITTER,
+    DATA_PROFILER,
+    DATA_USAGE,
+    DEFAULT_BATCH_CONCURRENCY,
+    DEFAULT_BLOCK_THRESHOLD_MS,
+    DEFAULT_CAPTURE_REQUESTS,
+    DEFAULT_DISK_CACHE,
+    DEFAULT_PREVIEW_CONCURRENCY,
+    DEFAULT_PREVIEW_MESSAGE,
+    DEFAULT_PROFILE_REQUESTS,
+    DOMAIN,
+    MAX_BATCH_CONCURRENCY,
+    SERVICE_CAPTURE,
+    SERVICE_PREVIEW_VOICES,
+    SERVICE_PROFILE,
+    SERVICE_SYNTHESIZE_BATCH,
+)
+from .postprocess import import_processing
+from .timeouts import async_get_throughput
+from .usage import async_get_usage
 
-from .const import DOMAIN
+if TYPE_CHECKING:
+    from .tts import ParasailTTSEntity
 
 _LOGGER = logging.getLogger(__name__)
 
-PLATFORMS: list[Platform] = [Platform.TTS]
+PLATFORMS: list[Platform] = [Platform.SENSOR, Platform.TTS]
+
+CONFIG_SCHEMA = cv.config_entry_only_config_schema(DOMAIN)
+
+SYNTHESIZE_BATCH_SCHEMA = vol.Schema(
+    {
+        vol.Required(ATTR_MESSAGES): vol.All(cv.ensure_list, [cv.string], vol.Length(min=1)),
+        vol.Optional(ATTR_CONFIG_ENTRY_ID): cv.string,
+        vol.Optional(ATTR_LANGUAGE): cv.string,
+        vol.Optional(CONF_VOICE): cv.string,
+        vol.Optional(CONF_TEMPERATURE): vol.All(
+            vol.Coerce(float), vol.Range(min=0.0, max=1.0)
+        ),
+        vol.Optional(CONF_EXAGGERATION): vol.All(
+            vol.Coerce(float), vol.Range(min=0.0, max=1.0)
+        ),
+        vol.Optional(ATTR_MAX_CONCURRENCY, default=DEFAULT_BATCH_CONCURRENCY): vol.All(
+            vol.Coerce(int), vol.Range(min=1, max=MAX_BATCH_CONCURRENCY)
+        ),
+        vol.Optional(ATTR_OUTPUT_DIR): cv.string,
+    }
+)
+
+PROFILE_SCHEMA = vol.Schema(
+    {
+        vol.Optional(ATTR_REQUESTS, default=DEFAULT_PROFILE_REQUESTS): vol.All(
+            vol.Coerce(int), vol.Range(min=1, max=100)
+        ),
+        vol.Optional(ATTR_BLOCK_THRESHOLD_MS, default=DEFAULT_BLOCK_THRESHOLD_MS): vol.All(
+            vol.Coerce(float), vol.Range(min=5, max=10000)
+        ),
+    }
+)
+
+CAPTURE_SCHEMA = vol.Schema(
+    {
+        vol.Optional(ATTR_REQUESTS, default=DEFAULT_CAPTURE_REQUESTS): vol.All(
+            vol.Coerce(int), vol.Range(min=1, max=1000)
+        ),
+        vol.Optional(ATTR_REDACT_TEXT, default=False): cv.boolean,
+    }
+)
+
+PREVIEW_VOICES_SCHEMA = vol.Schema(
+    {
+        vol.Optional(ATTR_MESSAGE, default=DEFAULT_PREVIEW_MESSAGE): cv.string,
+        vol.Optional(ATTR_VOICES): vol.All(cv.ensure_list, [cv.string], vol.Length(min=1)),
+        vol.Optional(ATTR_CONFIG_ENTRY_ID): cv.string,
+        vol.Optional(ATTR_MAX_CONCURRENCY, default=DEFAULT_PREVIEW_CONCURRENCY): vol.All(
+            vol.Coerce(int), vol.Range(min=1, max=MAX_BATCH_CONCURRENCY)
+        ),
+    }
+)
+
+
+async def async_setup(hass: HomeAssistant, config: ConfigType) -> bool:
+    """Set up the Parasail TTS services.
+
+    The modules behind the services are imported when a service is first
+    called, so setting up the integration does not load them.
+    """
+    # pylint: disable=import-outside-toplevel
+    from .media import ParasailMediaView
+
+    async def async_handle_synthesize_batch(call: ServiceCall) -> ServiceResponse:
+        """Synthesize a batch of messages into the cache or a directory."""
+        from .batch import async_synthesize_batch
+
+        entry = _async_get_entry(hass, call.data.get(ATTR_CONFIG_ENTRY_ID))
+        entity = _async_get_tts_entity(hass, entry)
+
+        config = dict(entry.options or entry.data)
+        for option in (CONF_TEMPERATURE, CONF_EXAGGERATION):
+            if option in call.data:
+                config[option] = call.data[option]
+        options = {ATTR_VOICE: call.data[CONF_VOICE]} if CONF_VOICE in call.data else {}
+
+        output_dir = None
+        if ATTR_OUTPUT_DIR in call.data:
+            output_dir = Path(hass.config.path(call.data[ATTR_OUTPUT_DIR]))
+            if not hass.config.is_allowed_path(str(output_dir)):
+                raise HomeAssistantError(
+                    f"Output directory {output_dir} is not in allowlist_external_dirs"
+                )
+
+        return await async_synthesize_batch(
+            hass,
+            entity,
+            call.data[ATTR_MESSAGES],
+            call.data.get(ATTR_LANGUAGE, entity.default_language),
+            options,
+            config,
+            call.context,
+            call.data[ATTR_MAX_CONCURRENCY],
+            output_dir,
+        )
+
+    async def async_handle_profile(call: ServiceCall) -> None:
+        """Profile the next requests of all Parasail TTS entities."""
+        from .profiling import ProfileSession
+
+        if (session := hass.data.get(DATA_PROFILER)) is not None:
+            await session.async_stop()
+        ProfileSession(
+            hass, call.data[ATTR_REQUESTS], call.data[ATTR_BLOCK_THRESHOLD_MS]
+        ).async_start()
+
+    async def async_handle_capture(call: ServiceCall) -> None:
+        """Capture the raw streams of the next requests."""
+        from .capture import CaptureSession
+
+        if (session := hass.data.get(DATA_CAPTURE)) is not None:
+            session.async_stop()
+        CaptureSession(
+            hass, call.data[ATTR_REQUESTS], call.data[ATTR_REDACT_TEXT]
+        ).async_start()
+
+    async def async_handle_preview_voices(call: ServiceCall) -> ServiceResponse:
+        """Render a sample message in several voices at once."""
+        from .preview import async_render_previews
+
+        entry = _async_get_entry(hass, call.data.get(ATTR_CONFIG_ENTRY_ID))
+        voices = call.data.get(ATTR_VOICES) or list(async_get_catalog(hass).voices)
+        return await async_render_previews(
+            hass,
+            _async_get_tts_entity(hass, entry),
+            call.data[ATTR_MESSAGE],
+            voices,
+            call.data[ATTR_MAX_CONCURRENCY],
+            entry.options or entry.data,
+            call.context,
+        )
+
+    hass.services.async_register(
+        DOMAIN,
+        SERVICE_SYNTHESIZE_BATCH,
+        async_handle_synthesize_batch,
+        schema=SYNTHESIZE_BATCH_SCHEMA,
+        supports_response=SupportsResponse.OPTIONAL,
+    )
+    hass.services.async_register(
+        DOMAIN, SERVICE_PROFILE, async_handle_profile, schema=PROFILE_SCHEMA
+    )
+    hass.services.async_register(
+        DOMAIN, SERVICE_CAPTURE, async_handle_capture, schema=CAPTURE_SCHEMA
+    )
+    hass.services.async_register(
+        DOMAIN,
+        SERVICE_PREVIEW_VOICES,
+        async_handle_preview_voices,
+        schema=PREVIEW_VOICES_SCHEMA,
+        supports_response=SupportsResponse.ONLY,
+    )
+    hass.http.register_view(ParasailMediaView(hass))
+
+    return True
+
+
+def _async_get_entry(hass: HomeAssistant, entry_id: str | None) -> ConfigEntry:
+    """Return the requested loaded config entry, or the first loaded one."""
+    entries = [
+        entry
+        for entry in hass.config_entries.async_entries(DOMAIN)
+        if entry.state is ConfigEntryState.LOADED
+    ]
+    for entry in entries:
+        if entry_id is None or entry.entry_id == entry_id:
+            return entry
+    raise HomeAssistantError(f"No loaded Parasail TTS config entry {entry_id or ''}".strip())
+
+
+def _async_get_tts_entity(hass: HomeAssistant, entry: ConfigEntry) -> ParasailTTSEntity:
+    """Return the TTS entity of a loaded config entry."""
+    component = hass.data.get(TTS_DOMAIN)
+    for registry_entry in er.async_entries_for_config_entry(er.async_get(hass), entry.entry_id):
+        if registry_entry.domain != TTS_DOMAIN or component is None:
+            continue
+        if (entity := component.get_entity(registry_entry.entity_id)) is not None:
+            return entity
+    raise HomeAssistantError(f"Parasail TTS config entry {entry.title} has no TTS entity")
 
 
 async def async_setup_entry(hass: HomeAssistant, entry: ConfigEntry) -> bool:
@@ -19,20 +254,61 @@ async def async_setup_entry(hass: HomeAssistant, entry: ConfigEntry) -> bool:
     hass.data.setdefault(DOMAIN, {})
     hass.data[DOMAIN][entry.entry_id] = entry.data
 
+    # The quota has to count from the first request, so this cannot wait
+    await async_get_usage(hass, entry).async_load()
+
+    config = entry.options or entry.data
+    if config.get(CONF_DISK_CACHE, DEFAULT_DISK_CACHE):
+        # pylint: disable-next=import-outside-toplevel
+        from .storage import async_attach_disk_store
+
+        entry.async_on_unload(async_attach_disk_store(hass))
+
     await hass.config_entries.async_forward_entry_setups(entry, PLATFORMS)
     entry.async_on_unload(entry.add_update_listener(update_listener))
 
+    # Everything that is not needed to add the entity waits until Home
+    # Assistant has started, so it does not delay the startup of others
+    async def async_start_warm_up(hass: HomeAssistant) -> None:
+        """Start warming up in the background."""
+        entry.async_create_background_task(
+            hass, _async_warm_up(hass), "parasail_tts warm-up"
+        )
+
+    entry.async_on_unload(async_at_started(hass, async_start_warm_up))
+
     return True
 
 
+async def _async_warm_up(hass: HomeAssistant) -> None:
+    """Load the shared state and code that the first request would wait for.
+
+    Each step runs once however many config entries call this, and the
+    catalog is only revalidated against the API when it is stale.
+    """
+    await async_get_throughput(hass).async_load()
+    await hass.async_add_executor_job(import_processing)
+    await async_get_catalog(hass).async_refresh()
+
+
 async def async_unload_entry(hass: HomeAssistant, entry: ConfigEntry) -> bool:
     """Unload a config entry."""
     if unload_ok := await hass.config_entries.async_unload_platforms(entry, PLATFORMS):
         hass.data[DOMAIN].pop(entry.entry_id)
+        # The session profiles requests of the entities that were just removed
+        if (session := hass.data.get(DATA_PROFILER)) is not None:
+            await session.async_stop()
 
     return unload_ok
 
 
+async def async_remove_entry(hass: HomeAssistant, entry: ConfigEntry) -> None:
+    """Remove the usage counters and jitter statistics of a deleted config entry."""
+    await async_get_usage(hass, entry).async_remove()
+    hass.data[DATA_USAGE].pop(entry.entry_id)
+    hass.data.get(DATA_JITTER, {}).pop(entry.entry_id, None)
+
+
 async def update_listener(hass: HomeAssistant, entry: ConfigEntry) -> None:
     """Handle options update."""
     await hass.config_entries.async_reload(entry.entry_id)
@@ -0,0 +1,92 @@
+"""Frequency-based admission of clips to the cold tier of the audio cache."""
+from __future__ import annotations
+
+import re
+
+from .const import (
+    SKETCH_DEPTH,
+    SKETCH_MAX_COUNT,
+    SKETCH_MIN_ENTRIES,
+    SKETCH_SAMPLE_FACTOR,
+    SKETCH_WIDTH,
+)
+
+# Numbers, times and dates: parts of a message that rarely repeat
+VOLATILE_SPAN = re.compile(r"\d+(?:[:.,/-]\d+)*")
+
+# Halves both 4-bit counters of a byte, dropping the bit the high one
+# would shift into the low one
+_HALVE = bytes((byte >> 1) & 0x77 for byte in range(256))
+
+
+def volatile_spans(text: str) -> int:
+    """Return how many numbers, times and dates a message contains."""
+    return len(VOLATILE_SPAN.findall(text))
+
+
+class FrequencySketch:
+    """Count-min sketch of how often keys were requested recently.
+
+    Each key increments one 4-bit counter in each of ``SKETCH_DEPTH`` rows,
+    two counters to a byte, the one at an even index in the low half, and
+    its estimate is the lowest of them, so collisions can only make a
+    key look more popular, never less. After ``SKETCH_SAMPLE_FACTOR`` times
+    as many increments as the cache holds clips, every counter is halved,
+    so that phrases that were popular last month do not outrank the ones
+    used today. This is the TinyLFU sketch; a few kilobytes track any
+    number of keys.
+    """
+
+    __slots__ = ("_rows", "_mask", "_sample_size", "additions")
+
+    def __init__(self, width: int = SKETCH_WIDTH, depth: int = SKETCH_DEPTH) -> None:
+        """Initialize the sketch; the width is rounded up to a power of two."""
+        width = 1 << max(width - 1, 1).bit_length()
+        self._rows = [bytearray(width // 2) for _ in range(depth)]
+        self._mask = width - 1
+        self._sample_size = SKETCH_SAMPLE_FACTOR * width
+        self.additions = 0
+
+    def ensure_capacity(self, entries: int) -> None:
+        """Age the counters at the pace of a cache holding this many clips.
+
+        The sketch is widened, and starts over, if it is narrower than that.
+        """
+        self._sample_size = SKETCH_SAMPLE_FACTOR * max(entries, SKETCH_MIN_ENTRIES)
+        if entries > self._mask + 1:
+            width = 1 << (entries - 1).bit_length()
+            self._rows = [bytearray(width // 2) for _ in self._rows]
+            self._mask = width - 1
+            self.additions = 0
+
+    @property
+    def nbytes(self) -> int:
+        """Return the size of the counters."""
+        return sum(len(row) for row in self._rows)
+
+    def increment(self, key: str) -> None:
+        """Count a request for a key, ageing the counters when it is time."""
+        for row, index in zip(self._rows, self._indexes(key)):
+            shift = (index & 1) << 2
+            if (row[index >> 1] >> shift) & 0xF < SKETCH_MAX_COUNT:
+                row[index >> 1] += 1 << shift
+        self.additions += 1
+        if self.additions >= self._sample_size:
+            self._rows = [row.translate(_HALVE) for row in self._rows]
+            self.additions //= 2
+
+    def estimate(self, key: str) -> int:
+        """Return how often a key was requested recently, possibly more."""
+        return min(
+            (row[index >> 1] >> ((index & 1) << 2)) & 0xF
+            for row, index in zip(self._rows, self._indexes(key))
+        )
+
+    def _indexes(self, key: str) -> list[int]:
+        """Return the counter of a key in each row."""
+        value = hash(key) & 0xFFFFFFFFFFFFFFFF
+        # Odd multipliers spread the 64-bit hash differently for every row
+        return [
+            ((value * (2 * row + 1) * 0x9E3779B97F4A7C15) >> 40) & self._mask
+            for row in range(len(self._rows))
+        ]
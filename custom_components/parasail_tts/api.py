@@ -0,0 +1,225 @@
+"""Client for the Parasail TTS streaming API."""
+from __future__ import annotations
+
+import asyncio
+from collections.abc import AsyncIterator, Mapping
+import base64
+from contextlib import aclosing
+import logging
+import time
+from typing import TYPE_CHECKING, Any
+
+from aiohttp import ClientSession, ClientTimeout
+
+from homeassistant.exceptions import HomeAssistantError
+
+from .const import (
+    CONF_EXAGGERATION,
+    CONF_TEMPERATURE,
+    CONF_VOICE,
+    DEFAULT_CFG_WEIGHT,
+    DEFAULT_EXAGGERATION,
+    DEFAULT_TEMPERATURE,
+    DEFAULT_VOICE,
+    PARASAIL_API_URL,
+)
+from .sse import async_iter_events
+from .timeouts import RequestTimeouts
+from .trace import Tracer
+from .wav import join_audio_chunks
+
+if TYPE_CHECKING:
+    from .capture import CaptureSession
+
+_LOGGER = logging.getLogger(__name__)
+
+DEFAULT_TIMEOUT = 30
+DEFAULT_TIMEOUTS = RequestTimeouts(DEFAULT_TIMEOUT)
+
+
+def build_payload(message: str, config: Mapping[str, Any]) -> dict[str, Any]:
+    """Build the request payload for a message from entry options or data."""
+    return {
+        "temperature": config.get(CONF_TEMPERATURE, DEFAULT_TEMPERATURE),
+        "text": message,
+        "voice": config.get(CONF_VOICE, DEFAULT_VOICE),
+        "exaggeration": config.get(CONF_EXAGGERATION, DEFAULT_EXAGGERATION),
+        "cfg_weight": DEFAULT_CFG_WEIGHT,
+    }
+
+
+def detect_audio_format(audio_data: bytes) -> str:
+    """Detect the audio format from magic bytes, defaulting to WAV."""
+    if len(audio_data) < 4:
+        return "wav"
+
+    magic_bytes = audio_data[:4]
+    _LOGGER.debug("Audio magic bytes: %s", magic_bytes.hex())
+
+    # Check for WAV format (RIFF header)
+    if magic_bytes == b'RIFF':
+        return "wav"
+
+    # Check for MP3 format (ID3 tag or MPEG sync)
+    if magic_bytes[:3] == b'ID3' or (magic_bytes[0] == 0xFF and (magic_bytes[1] & 0xE0) == 0xE0):
+        return "mp3"
+
+    # Unknown format, log warning and assume WAV (since API returns WAV)
+    _LOGGER.warning(
+        "Unknown audio format, magic bytes: %s. Assuming WAV.",
+        magic_bytes.hex()
+    )
+    return "wav"
+
+
+class ParasailClient:
+    """Issue requests against the Parasail TTS endpoint.
+
+    The client holds no connection state of its own; connections are pooled
+    by the aiohttp session it is given, so any number of concurrent calls
+    share the same keep-alive connections.
+    """
+
+    def __init__(self, session: ClientSession, url: str = PARASAIL_API_URL) -> None:
+        """Initialize the client."""
+        self._session = session
+        self._url = url
+        # Set while a capture session records the raw streams
+        self.capture: CaptureSession | None = None
+        # Traces the chunks of each request while debug logging is on
+        self.tracer: Tracer | None = None
+
+    async def async_iter_audio(
+        self, payload: dict[str, Any], timeouts: RequestTimeouts = DEFAULT_TIMEOUTS
+    ) -> AsyncIterator[bytes]:
+        """Yield decoded audio chunks as they arrive from the stream.
+
+        Besides the total and connect timeouts, the wait for the first chunk
+        and between chunks is bounded, so a stalled stream fails long before
+        the total deadline.
+
+        If the generator does not run to completion, because the caller was
+        cancelled, stopped iterating or an error occurred, the connection is
+        closed right away instead of draining the rest of the stream, so the
+        server stops sending and nothing is returned to the pool half-read.
+
+        With a tracer, the arrival and decode time of every chunk goes into
+        the trace of the request instead of the log.
+        """
+        chunk_count = 0
+        recorder = None
+        if self.capture is not None:
+            recorder = self.capture.async_record(self._url, payload)
+        trace = self.tracer.async_start(payload) if self.tracer is not None else None
+        error: BaseException | None = None
+        try:
+            async with self._session.post(
+                self._url,
+                json=payload,
+                headers={"Content-Type": "application/json"},
+                timeout=ClientTimeout(total=timeouts.total, sock_connect=timeouts.connect),
+            ) as response:
+                content = response.content
+                if recorder is not None:
+                    recorder.set_status(response.status)
+                    content = recorder.wrap(content)
+                if response.status != 200:
+                    error_text = await response.text()
+                    if recorder is not None:
+                        recorder.feed(error_text.encode())
+                    raise ParasailError(
+                        f"API request failed with status {response.status}: {error_text}"
+                    )
+
+                completed = False
+                try:
+                    async with aclosing(async_iter_events(content)) as events:
+                        while (
+                            event := await _async_next_event(
+                                events, timeouts.idle if chunk_count else timeouts.first_byte
+                            )
+                        ) is not None:
+                            # Process audio chunks
+                            if event.get('type') == 'audio' and 'audio_content' in event:
+                                if trace is not None:
+                                    arrived = time.perf_counter_ns()
+                                # Decode base64 audio content
+                                audio_chunk = base64.b64decode(event['audio_content'])
+                                chunk_count += 1
+                                if trace is not None:
+                                    trace.add(
+                                        chunk_count,
+                                        len(audio_chunk),
+                                        arrived,
+                                        time.perf_counter_ns(),
+                                    )
+                                yield audio_chunk
+
+                            elif event.get('type') == 'error':
+                                raise ParasailError(f"API returned error event: {event}")
+                    completed = True
+                finally:
+                    if not completed:
+                        _LOGGER.debug(
+                            "Aborting stream after %d chunks, closing connection", chunk_count
+                        )
+                        response.close()
+        except asyncio.TimeoutError as err:
+            error = ParasailError(
+                f"Request timed out after {chunk_count} chunks "
+                f"(total {timeouts.total:.0f} s, first chunk {timeouts.first_byte:.0f} s, "
+                f"between chunks {timeouts.idle:.0f} s)"
+            )
+            raise error from err
+        except BaseException as err:
+            error = err
+            raise
+        finally:
+            if recorder is not None:
+                recorder.async_finish()
+            if trace is not None:
+                self.tracer.async_finish(trace, error)
+
+    async def async_synthesize(
+        self,
+        payload: dict[str, Any],
+        timeouts: RequestTimeouts = DEFAULT_TIMEOUTS,
+        audio_chunks: list[bytes] | None = None,
+    ) -> tuple[str, bytes]:
+        """Synthesize the payload and return the audio format and data.
+
+        Chunks are collected into ``audio_chunks`` when given, so the caller
+        still has the partial audio if the request is cancelled.
+        """
+        if audio_chunks is None:
+            audio_chunks = []
+        async with aclosing(self.async_iter_audio(payload, timeouts)) as stream:
+            async for chunk in stream:
+                audio_chunks.append(chunk)
+
+        if not audio_chunks:
+            raise ParasailError("No audio chunks received from API")
+
+        # Merge the per-chunk WAV segments into one file with correct sizes
+        audio_data = join_audio_chunks(audio_chunks)
+        _LOGGER.info(
+            "Generated %d bytes of audio from %d chunks",
+            len(audio_data),
+            len(audio_chunks)
+        )
+        return detect_audio_format(audio_data), audio_data
+
+
+async def _async_next_event(
+    events: AsyncIterator[dict[str, Any]], wait: float
+) -> dict[str, Any] | None:
+    """Return the next event, or None at the end of the stream, within ``wait`` seconds."""
+    try:
+        async with asyncio.timeout(wait):
+            return await anext(events)
+    except StopAsyncIteration:
+        return None
+
+
+class ParasailError(HomeAssistantError):
+    """Error to indicate the Parasail API did not return audio."""
@@ -0,0 +1,179 @@
+"""Audio post-processing for Parasail TTS clips."""
+from __future__ import annotations
+
+import numpy as np
+
+from .const import (
+    MAX_GAIN_DB,
+    NORMALIZE_WINDOW_MS,
+    SILENCE_PADDING_MS,
+    SILENCE_THRESHOLD_DB,
+)
+from .wav import build_wav_header, parse_wav
+
+_INT16_FULL_SCALE = 32767.0
+
+
+def _db_to_amplitude(db: float) -> float:
+    """Convert dBFS to a 16-bit amplitude."""
+    return _INT16_FULL_SCALE * 10 ** (db / 20)
+
+
+def _voiced(frames: np.ndarray, threshold: float) -> np.ndarray:
+    """Return a mask of the frames with a sample above the threshold."""
+    return np.abs(frames.astype(np.int32)).max(axis=1) > threshold
+
+
+def _voiced_bounds(frames: np.ndarray, threshold: float) -> tuple[int, int] | None:
+    """Return the first and last frame index above the threshold."""
+    voiced = np.flatnonzero(_voiced(frames, threshold))
+    if not voiced.size:
+        return None
+    return int(voiced[0]), int(voiced[-1])
+
+
+def _gain_for(frames: np.ndarray, target_db: float) -> float:
+    """Return the gain bringing the RMS to the target without clipping."""
+    samples = frames.astype(np.float32)
+    rms = float(np.sqrt(np.mean(np.square(samples)))) if samples.size else 0.0
+    peak = float(np.abs(samples).max()) if samples.size else 0.0
+    if rms <= 0 or peak <= 0:
+        return 1.0
+    gain = min(_db_to_amplitude(target_db) / rms, 10 ** (MAX_GAIN_DB / 20))
+    return min(gain, _INT16_FULL_SCALE / peak)
+
+
+def _apply_gain(frames: np.ndarray, gain: float) -> np.ndarray:
+    """Apply a gain to int16 frames with saturation."""
+    if gain == 1.0:
+        return frames
+    scaled = frames.astype(np.float32) * gain
+    return np.clip(scaled, -32768, 32767).astype("<i2")
+
+
+def process_wav(
+    data: bytes, trim_silence: bool, normalize: bool, target_db: float
+) -> bytes:
+    """Trim silence and normalize the loudness of a 16-bit PCM WAV clip.
+
+    All work is done on NumPy arrays, so this is meant to run in the
+    executor. Anything that is not 16-bit PCM WAV is returned unchanged.
+    """
+    info = parse_wav(data)
+    if info is None or info.bits_per_sample != 16:
+        return data
+
+    usable = info.data_size - info.data_size % info.frame_size
+    frames = np.frombuffer(
+        data, dtype="<i2", count=usable // 2, offset=info.data_offset
+    ).reshape(-1, info.channels)
+
+    if trim_silence:
+        bounds = _voiced_bounds(frames, _db_to_amplitude(SILENCE_THRESHOLD_DB))
+        if bounds is None:
+            return data
+        padding = info.sample_rate * SILENCE_PADDING_MS // 1000
+        frames = frames[max(bounds[0] - padding, 0):bounds[1] + padding + 1]
+
+    if normalize:
+        frames = _apply_gain(frames, _gain_for(frames, target_db))
+
+    pcm = frames.astype("<i2", copy=False).tobytes()
+    return build_wav_header(info.channels, info.sample_rate, 16, len(pcm)) + pcm
+
+
+class PcmProcessor:
+    """Chunk-wise silence trimming and gain for streamed 16-bit PCM.
+
+    Leading silence is dropped as it arrives, so playback starts with the
+    first voiced frame. Silent runs after that are held back until more
+    voice follows, which lets trailing silence be dropped at the end of the
+    stream.
+
+    With normalization on, audio is held back until ``NORMALIZE_WINDOW_MS``
+    of voice has arrived, and the gain is derived from all of it, so a
+    quiet start does not set the gain for the louder speech after it. The
+    gain then only ever drops, when a later peak would clip, so the level
+    does not pump between chunks.
+    """
+
+    def __init__(
+        self,
+        channels: int,
+        sample_rate: int,
+        trim_silence: bool,
+        normalize: bool,
+        target_db: float,
+    ) -> None:
+        """Initialize the processor."""
+        self._channels = channels
+        self._frame_size = channels * 2
+        self._padding = sample_rate * SILENCE_PADDING_MS // 1000
+        self._threshold = _db_to_amplitude(SILENCE_THRESHOLD_DB)
+        self._trim_silence = trim_silence
+        self._normalize = normalize
+        self._target_db = target_db
+        self._gain: float | None = None
+        self._window = sample_rate * NORMALIZE_WINDOW_MS // 1000
+        self._voiced = 0
+        self._pending = np.empty((0, channels), dtype="<i2")
+        self._remainder = b''
+        self._started = not trim_silence
+        self._held = np.empty((0, channels), dtype="<i2")
+
+    def feed(self, pcm: bytes) -> bytes:
+        """Process a chunk of PCM and return what can be played now."""
+        data = self._remainder + pcm
+        usable = len(data) - len(data) % self._frame_size
+        self._remainder = data[usable:]
+        frames = np.frombuffer(data[:usable], dtype="<i2").reshape(-1, self._channels)
+        if not frames.size:
+            return b''
+
+        if self._trim_silence:
+            bounds = _voiced_bounds(frames, self._threshold)
+            if bounds is None:
+                if self._started:
+                    self._held = np.concatenate((self._held, frames))
+                return b''
+            start = 0 if self._started else max(bounds[0] - self._padding, 0)
+            self._started = True
+            # Release held silence followed by voice, hold the new tail
+            end = bounds[1] + 1
+            output = np.concatenate((self._held, frames[start:end]))
+            self._held = frames[end:]
+        else:
+            output = frames
+
+        return self._finish(output)
+
+    def flush(self) -> bytes:
+        """Return the final audio, dropping trailing silence beyond the padding."""
+        tail = self._held[:self._padding] if self._trim_silence else self._held
+        self._held = self._held[:0]
+        self._remainder = b''
+        return self._finish(tail, final=True)
+
+    def _finish(self, frames: np.ndarray, final: bool = False) -> bytes:
+        """Apply the gain and return the frames as bytes.
+
+        Until the gain is known the frames are held back, and the end of the
+        stream derives it from whatever was held.
+        """
+        if not self._normalize:
+            return frames.astype("<i2", copy=False).tobytes()
+
+        if self._gain is None:
+            self._pending = np.concatenate((self._pending, frames))
+            self._voiced += int(np.count_nonzero(_voiced(frames, self._threshold)))
+            if self._voiced < self._window and not final:
+                return b''
+            frames, self._pending = self._pending, self._pending[:0]
+            self._gain = _gain_for(frames, self._target_db)
+        if not frames.size:
+            return b''
+
+        peak = float(np.abs(frames.astype(np.int32)).max())
+        if peak * self._gain > _INT16_FULL_SCALE:
+            self._gain = _INT16_FULL_SCALE / peak
+        return _apply_gain(frames, self._gain).astype("<i2", copy=False).tobytes()
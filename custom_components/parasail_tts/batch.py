@@ -0,0 +1,127 @@
+"""Batch synthesis of many messages for the Parasail TTS integration."""
+from __future__ import annotations
+
+import asyncio
+from collections.abc import Mapping
+import logging
+from pathlib import Path
+import time
+from typing import TYPE_CHECKING, Any
+
+from homeassistant.core import Context, HomeAssistant
+
+from .const import BATCH_PROGRESS_INTERVAL, EVENT_BATCH_PROGRESS
+
+if TYPE_CHECKING:
+    from .tts import ParasailTTSEntity
+
+_LOGGER = logging.getLogger(__name__)
+
+ERRORS = {"quota": "Daily quota exceeded", "error": "Synthesis failed"}
+
+
+def _write_file(path: Path, audio_data: bytes) -> None:
+    """Write audio to disk, creating the directory if needed."""
+    path.parent.mkdir(parents=True, exist_ok=True)
+    path.write_bytes(audio_data)
+
+
+async def async_synthesize_batch(
+    hass: HomeAssistant,
+    entity: ParasailTTSEntity,
+    messages: list[str],
+    language: str,
+    options: Mapping[str, Any],
+    config: Mapping[str, Any],
+    context: Context | None,
+    max_concurrency: int,
+    output_dir: Path | None = None,
+) -> dict[str, Any]:
+    """Synthesize all messages with bounded concurrency.
+
+    A fixed pool of ``max_concurrency`` workers pulls messages in order, so
+    a batch of hundreds of messages never has more than that many requests
+    or tasks in flight. Every message is rendered by the entity, so it is
+    routed by ``language``, counted against the usage and quota of the
+    entry for the caller's ``context``, and stored in the audio cache and the shared cache under the key
+    a later TTS request looks up. When ``output_dir`` is given the audio is
+    also written there as ``<cache key>.<format>``.
+    """
+    results: list[dict[str, Any]] = [{} for _ in messages]
+    pending = iter(enumerate(messages))
+    completed = 0
+    characters = 0
+    started = time.monotonic()
+
+    def report_progress() -> None:
+        """Log and fire an event with the current progress."""
+        elapsed = time.monotonic() - started
+        progress = {
+            "completed": completed,
+            "total": len(messages),
+            "elapsed_ms": round(elapsed * 1000),
+            "messages_per_second": round(completed / elapsed, 2) if elapsed else 0.0,
+            "characters_per_second": round(characters / elapsed, 1) if elapsed else 0.0,
+        }
+        _LOGGER.info(
+            "Batch synthesis progress: %d/%d messages, %.2f messages/s",
+            completed,
+            len(messages),
+            progress["messages_per_second"],
+        )
+        hass.bus.async_fire(EVENT_BATCH_PROGRESS, progress)
+
+    async def synthesize(message: str) -> dict[str, Any]:
+        """Synthesize one message and return its result record."""
+        item_started = time.monotonic()
+        try:
+            key, outcome, audio = await entity.async_render(
+                message, language, options, config, context
+            )
+        except Exception as err:  # pylint: disable=broad-except
+            _LOGGER.warning("Batch synthesis failed for %r: %s", message, err)
+            key, outcome, audio = None, str(err), None
+        result: dict[str, Any] = {"message": message, "key": key}
+        if audio is None:
+            result["status"] = "error"
+            result["error"] = ERRORS.get(outcome, outcome)
+            result["duration_ms"] = round((time.monotonic() - item_started) * 1000)
+            return result
+
+        audio_format, audio_data = audio
+        result["status"] = outcome
+
+        if output_dir is not None:
+            path = output_dir / f"{key}.{audio_format}"
+            await hass.async_add_executor_job(_write_file, path, audio_data)
+            result["path"] = str(path)
+
+        result["format"] = audio_format
+        result["bytes"] = len(audio_data)
+        result["duration_ms"] = round((time.monotonic() - item_started) * 1000)
+        return result
+
+    async def worker() -> None:
+        """Process messages until none are left."""
+        nonlocal completed, characters
+        for index, message in pending:
+            results[index] = await synthesize(message)
+            completed += 1
+            characters += len(message)
+            if completed % BATCH_PROGRESS_INTERVAL == 0:
+                report_progress()
+
+    await asyncio.gather(
+        *(worker() for _ in range(min(max_concurrency, len(messages))))
+    )
+    report_progress()
+
+    elapsed = time.monotonic() - started
+    return {
+        "items": results,
+        "total": len(messages),
+        "succeeded": sum(1 for item in results if item["status"] != "error"),
+        "failed": sum(1 for item in results if item["status"] == "error"),
+        "elapsed_ms": round(elapsed * 1000),
+        "characters_per_second": round(characters / elapsed, 1) if elapsed else 0.0,
+    }
@@ -0,0 +1,300 @@
+"""In-memory audio cache shared by the Parasail TTS entities and services."""
+from __future__ import annotations
+
+import asyncio
+from collections import OrderedDict
+from dataclasses import dataclass
+from functools import partial
+import hashlib
+import json
+from typing import TYPE_CHECKING, Any
+
+from homeassistant.core import HomeAssistant
+
+from .admission import FrequencySketch, volatile_spans
+from .codec import compress_audio, decompress_audio, is_compressed
+from .const import DATA_CACHE, DEFAULT_CACHE_HOT_BYTES, DEFAULT_CACHE_MAX_BYTES
+
+if TYPE_CHECKING:
+    from .storage import DiskStore
+
+
+def cache_key(payload: dict[str, Any], model: str, variant: str = "") -> str:
+    """Return a stable key for a request payload sent to a model.
+
+    ``variant`` distinguishes processed versions of the same clip.
+    """
+    encoded = json.dumps(
+        {"model": model, "variant": variant, **payload},
+        sort_keys=True,
+        separators=(",", ":"),
+    )
+    return hashlib.sha256(encoded.encode("utf-8")).hexdigest()
+
+
+@dataclass(slots=True)
+class _ColdEntry:
+    """Clip in the cold tier, compressed once the executor got to it."""
+
+    audio_format: str
+    data: bytes
+    raw_size: int
+
+
+class AudioCache:
+    """Least-recently-used cache of synthesized audio in two tiers.
+
+    Recently used clips are kept as they are in the hot tier, bounded by
+    ``hot_max_bytes``. Clips falling out of it move to the cold tier and are
+    compressed losslessly in the executor. A hit in the cold tier is decoded
+    in the executor and promoted back to the hot tier. Both tiers together
+    are bounded by ``max_bytes``, counting the compressed size of cold clips.
+
+    The hot tier admits every clip, but a clip falling out of it only enters
+    the cold tier if it was requested more often than the clips it would
+    evict there, as in W-TinyLFU: the hot tier is the window, the cold tier
+    the main cache. Request counts come from a ``FrequencySketch`` fed by
+    every lookup, hit or miss, and are divided by one plus the numbers,
+    times and dates in the message. A stream of one-off messages such as
+    "Package arrived at 3:42" then passes through the hot tier without
+    pushing recurring phrases out of the cold tier.
+
+    One clip per pin group (for example per language) can be pinned so that
+    it stays warm no matter how many other clips pass through the cache.
+
+    With a disk tier attached, every clip put into the cache is also written
+    to disk, and clips evicted from memory are read back from there.
+    """
+
+    def __init__(
+        self,
+        max_bytes: int = DEFAULT_CACHE_MAX_BYTES,
+        hot_max_bytes: int = DEFAULT_CACHE_HOT_BYTES,
+        admission: bool = True,
+    ) -> None:
+        """Initialize the cache; without admission it is a plain LRU cache."""
+        self._hot: OrderedDict[str, tuple[str, bytes]] = OrderedDict()
+        self._cold: OrderedDict[str, _ColdEntry] = OrderedDict()
+        self._pins: dict[str, str] = {}
+        self._max_bytes = max_bytes
+        self._hot_max_bytes = min(hot_max_bytes, max_bytes)
+        self.hot_size = 0
+        self.cold_size = 0
+        self.rejected = 0
+        self._admission = admission
+        self._sketch = FrequencySketch()
+        # Messages of the cached clips that were put with one
+        self._messages: dict[str, str] = {}
+        self.disk: DiskStore | None = None
+
+    @property
+    def size(self) -> int:
+        """Return the bytes held by both tiers."""
+        return self.hot_size + self.cold_size
+
+    def __contains__(self, key: str) -> bool:
+        """Return True if the key is cached."""
+        return (
+            key in self._hot
+            or key in self._cold
+            or (self.disk is not None and key in self.disk)
+        )
+
+    def __len__(self) -> int:
+        """Return the number of cached clips."""
+        return len(self._hot) + len(self._cold)
+
+    async def async_get(self, key: str) -> tuple[str, bytes] | None:
+        """Return the cached format and audio, marking it recently used."""
+        self._sketch.increment(key)
+        if (entry := self._hot.get(key)) is not None:
+            self._hot.move_to_end(key)
+            return entry
+        if (cold := self._cold.get(key)) is None:
+            return await self._async_get_disk(key)
+
+        data = cold.data
+        if is_compressed(data):
+            data = await asyncio.get_running_loop().run_in_executor(
+                None, decompress_audio, data
+            )
+        # Promote the clip unless it was replaced or evicted while decoding
+        if self._cold.get(key) is cold:
+            self._insert(key, cold.audio_format, data)
+        return cold.audio_format, data
+
+    async def _async_get_disk(self, key: str) -> tuple[str, bytes] | None:
+        """Return a clip from the disk tier, promoting it to the hot tier."""
+        if self.disk is None or (entry := await self.disk.async_get(key)) is None:
+            return None
+        if key not in self._hot and key not in self._cold:
+            self._insert(key, *entry)
+        return entry
+
+    def pin(self, group: str, key: str) -> None:
+        """Pin a clip as the most recent one of a group, unpinning the previous."""
+        if key in self:
+            self._pins[group] = key
+
+    def put(
+        self, key: str, audio_format: str, audio_data: bytes, text: str | None = None
+    ) -> None:
+        """Store audio in the hot tier and on disk, demoting and evicting older clips.
+
+        ``text`` is the message, used to score clips of volatile messages lower
+        and as the title of the clip in the media browser.
+        """
+        if self.disk is not None:
+            self.disk.put(key, audio_format, audio_data)
+        self._insert(key, audio_format, audio_data, text)
+
+    def _insert(
+        self, key: str, audio_format: str, audio_data: bytes, text: str | None = None
+    ) -> None:
+        """Store audio in the hot tier only."""
+        if len(audio_data) > self._max_bytes:
+            return
+
+        if text is None:
+            text = self._messages.get(key)
+        self._discard(key)
+        self._hot[key] = (audio_format, audio_data)
+        self.hot_size += len(audio_data)
+        if text:
+            self._messages[key] = text
+        self._sketch.ensure_capacity(len(self))
+        self._demote()
+        self._evict()
+
+    def messages(self) -> list[tuple[str, str, str]]:
+        """Return the key, format and message of the clips in memory, most recent first."""
+        recent = [(key, entry[0]) for key, entry in reversed(self._hot.items())]
+        recent += [(key, cold.audio_format) for key, cold in reversed(self._cold.items())]
+        return [
+            (key, audio_format, self._messages[key])
+            for key, audio_format in recent
+            if key in self._messages
+        ]
+
+    def footprint(self) -> dict[str, Any]:
+        """Return the entries and bytes held by each tier."""
+        raw = sum(entry.raw_size for entry in self._cold.values())
+        return {
+            "max_bytes": self._max_bytes,
+            "hot": {
+                "entries": len(self._hot),
+                "bytes": self.hot_size,
+                "max_bytes": self._hot_max_bytes,
+            },
+            "cold": {
+                "entries": len(self._cold),
+                "bytes": self.cold_size,
+                "uncompressed_bytes": raw,
+                "compression_ratio": round(self.cold_size / raw, 3) if raw else None,
+            },
+            "disk": self.disk.footprint() if self.disk is not None else None,
+            "admission": {
+                "enabled": self._admission,
+                "rejected": self.rejected,
+                "sketch_bytes": self._sketch.nbytes,
+            },
+        }
+
+    def _discard(self, key: str) -> None:
+        """Remove a key from both tiers."""
+        if (entry := self._hot.pop(key, None)) is not None:
+            self.hot_size -= len(entry[1])
+        if (cold := self._cold.pop(key, None)) is not None:
+            self.cold_size -= len(cold.data)
+        self._messages.pop(key, None)
+
+    def _demote(self) -> None:
+        """Move the oldest hot clips to the cold tier and compress them there."""
+        pinned = set(self._pins.values())
+        skipped = 0
+        while self.hot_size > self._hot_max_bytes and skipped < len(self._hot):
+            key, (audio_format, audio_data) = self._hot.popitem(last=False)
+            if key in pinned:
+                self._hot[key] = (audio_format, audio_data)
+                skipped += 1
+                continue
+            self.hot_size -= len(audio_data)
+            if not self._admit(key, len(audio_data)):
+                self._messages.pop(key, None)
+                self.rejected += 1
+                continue
+            cold = self._cold[key] = _ColdEntry(audio_format, audio_data, len(audio_data))
+            self.cold_size += len(audio_data)
+            if audio_format == "wav":
+                # Only WAV is compressed; anything else would be a wasted executor job
+                self._compress(key, cold)
+
+    def _admit(self, key: str, size: int) -> bool:
+        """Return True if a clip should enter the cold tier.
+
+        A clip that fits is always admitted. Otherwise its score has to beat
+        that of every clip it would evict, oldest first.
+        """
+        if not self._admission or self.size + size <= self._max_bytes:
+            return True
+        score = self._score(key)
+        pinned = set(self._pins.values())
+        needed = self.size + size - self._max_bytes
+        for victim, cold in self._cold.items():
+            if needed <= 0:
+                break
+            if victim in pinned:
+                continue
+            if self._score(victim) >= score:
+                return False
+            needed -= len(cold.data)
+        return True
+
+    def _score(self, key: str) -> float:
+        """Return how often a key was requested, less for volatile messages."""
+        volatile = volatile_spans(self._messages.get(key, ""))
+        return self._sketch.estimate(key) / (1 + volatile)
+
+    def _compress(self, key: str, cold: _ColdEntry) -> None:
+        """Compress a cold clip in the executor, or right away without a loop."""
+        try:
+            loop = asyncio.get_running_loop()
+        except RuntimeError:
+            self._store_compressed(key, cold, compress_audio(cold.data))
+            return
+        future = loop.run_in_executor(None, compress_audio, cold.data)
+        future.add_done_callback(partial(self._compressed, key, cold))
+
+    def _compressed(self, key: str, cold: _ColdEntry, future: asyncio.Future[bytes]) -> None:
+        """Store the result of a compression job."""
+        if future.cancelled() or future.exception() is not None:
+            return
+        self._store_compressed(key, cold, future.result())
+
+    def _store_compressed(self, key: str, cold: _ColdEntry, data: bytes) -> None:
+        """Replace a cold clip with its compressed form if it is still cached."""
+        if self._cold.get(key) is not cold or len(data) >= len(cold.data):
+            return
+        self.cold_size -= len(cold.data) - len(data)
+        cold.data = data
+
+    def _evict(self) -> None:
+        """Evict unpinned clips, coldest and oldest first, until within the size limit."""
+        pinned = set(self._pins.values())
+        for tier in (self._cold, self._hot):
+            skipped = 0
+            while self.size > self._max_bytes and skipped < len(tier):
+                key = next(iter(tier))
+                if key in pinned:
+                    # Keep pinned clips warm by moving them to the recent end
+                    tier.move_to_end(key)
+                    skipped += 1
+                    continue
+                self._discard(key)
+
+
+def async_get_cache(hass: HomeAssistant) -> AudioCache:
+    """Return the audio cache shared by all config entries."""
+    if (cache := hass.data.get(DATA_CACHE)) is None:
+        cache = hass.data[DATA_CACHE] = AudioCache()
+    return cache
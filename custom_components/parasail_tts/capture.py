@@ -0,0 +1,170 @@
+"""Capture of raw Parasail TTS streams for offline replay and load tests."""
+from __future__ import annotations
+
+from datetime import datetime
+import json
+import logging
+from pathlib import Path
+import time
+from typing import Any
+
+from homeassistant.const import EVENT_HOMEASSISTANT_STOP
+from homeassistant.core import Event, HomeAssistant, callback
+
+from .const import CAPTURE_DIRECTORY, DATA_CAPTURE
+
+_LOGGER = logging.getLogger(__name__)
+
+CAPTURE_VERSION = 1
+
+
+class CaptureSession:
+    """Record the raw SSE bytes of the next requests, with their timing.
+
+    While the session is installed in ``hass.data`` the client hands every
+    response it reads to a ``StreamRecorder``. Each capture is written as a
+    ``.sse`` file with the bytes exactly as received and a ``.json`` file
+    with the request and the arrival time and size of every read, which is
+    what ``tools/replay_server.py`` serves back. With ``redact_text`` the
+    message is left out altogether; a hash of it would give away short,
+    guessable messages such as "The alarm is off".
+    """
+
+    def __init__(self, hass: HomeAssistant, requests: int, redact_text: bool) -> None:
+        """Initialize the session."""
+        self._hass = hass
+        self.remaining = requests
+        self._redact_text = redact_text
+        self.directory = Path(hass.config.path(CAPTURE_DIRECTORY))
+        self._started = datetime.now().strftime("%Y%m%d-%H%M%S")
+        self._count = 0
+        self._active = 0
+        self._unsub_stop = None
+
+    @callback
+    def async_start(self) -> None:
+        """Install the session."""
+        self._hass.data[DATA_CAPTURE] = self
+        self._unsub_stop = self._hass.bus.async_listen_once(
+            EVENT_HOMEASSISTANT_STOP, self._async_on_stop
+        )
+        _LOGGER.info(
+            "Capturing the next %d Parasail TTS streams into %s",
+            self.remaining,
+            self.directory,
+        )
+
+    @callback
+    def async_stop(self) -> None:
+        """Uninstall the session; streams being recorded are still written."""
+        if self._hass.data.get(DATA_CAPTURE) is self:
+            del self._hass.data[DATA_CAPTURE]
+        if self._unsub_stop is not None:
+            self._unsub_stop()
+            self._unsub_stop = None
+        _LOGGER.info("Capture finished: %d streams written to %s", self._count, self.directory)
+
+    @callback
+    def async_record(self, url: str, payload: dict[str, Any]) -> StreamRecorder | None:
+        """Return a recorder for a request, or None once enough were captured."""
+        if self.remaining <= 0:
+            return None
+        self.remaining -= 1
+        self._count += 1
+        self._active += 1
+
+        request = dict(payload)
+        if self._redact_text:
+            request["text"] = None
+        name = f"{self._started}_{self._count:03d}"
+        return StreamRecorder(
+            self,
+            name,
+            {
+                "version": CAPTURE_VERSION,
+                "url": url,
+                "request": request,
+            },
+        )
+
+    @callback
+    def async_finished(self, recorder: StreamRecorder) -> None:
+        """Write a finished capture and stop once the last one is done."""
+        self._hass.async_add_executor_job(
+            _write_capture, self.directory, recorder.name, recorder.metadata, bytes(recorder.data)
+        )
+        self._active -= 1
+        if self.remaining <= 0 and not self._active:
+            self.async_stop()
+
+    @callback
+    def _async_on_stop(self, event: Event) -> None:
+        """Stop the session when Home Assistant stops."""
+        self._unsub_stop = None
+        self.async_stop()
+
+
+class StreamRecorder:
+    """Bytes and read timing of one captured response."""
+
+    __slots__ = ("_session", "name", "metadata", "data", "_reads", "_started", "_finished")
+
+    def __init__(self, session: CaptureSession, name: str, metadata: dict[str, Any]) -> None:
+        """Initialize the recorder."""
+        self._session = session
+        self.name = name
+        self.metadata = metadata
+        self.data = bytearray()
+        self._reads: list[tuple[float, int]] = []
+        self._started = time.monotonic()
+        self._finished = False
+
+    def wrap(self, content: Any) -> RecordingContent:
+        """Return a reader of a response that records everything read from it."""
+        return RecordingContent(content, self)
+
+    def set_status(self, status: int) -> None:
+        """Record the HTTP status of the response."""
+        self.metadata["status"] = status
+
+    def feed(self, chunk: bytes) -> None:
+        """Record a read, timed from the start of the request."""
+        if chunk:
+            self._reads.append((round(time.monotonic() - self._started, 4), len(chunk)))
+            self.data += chunk
+
+    @callback
+    def async_finish(self) -> None:
+        """Hand the capture to its session to be written, once."""
+        if self._finished:
+            return
+        self._finished = True
+        self.metadata["reads"] = self._reads
+        self.metadata["duration"] = round(time.monotonic() - self._started, 4)
+        self._session.async_finished(self)
+
+
+class RecordingContent:
+    """Wrap an aiohttp ``StreamReader`` and record everything read from it."""
+
+    __slots__ = ("_content", "_recorder")
+
+    def __init__(self, content: Any, recorder: StreamRecorder) -> None:
+        """Initialize the wrapper."""
+        self._content = content
+        self._recorder = recorder
+
+    async def read(self, n: int = -1) -> bytes:
+        """Read and record up to n bytes."""
+        chunk = await self._content.read(n)
+        self._recorder.feed(chunk)
+        return chunk
+
+
+def _write_capture(
+    directory: Path, name: str, metadata: dict[str, Any], data: bytes
+) -> None:
+    """Write the raw stream and its metadata."""
+    directory.mkdir(parents=True, exist_ok=True)
+    (directory / f"{name}.sse").write_bytes(data)
+    (directory / f"{name}.json").write_text(json.dumps(metadata, indent=2), encoding="utf-8")
@@ -0,0 +1,190 @@
+"""Voice and model catalog for Parasail TTS, fetched from the API and cached."""
+from __future__ import annotations
+
+import asyncio
+import json
+import logging
+from pathlib import Path
+import time
+from typing import Any
+
+from homeassistant.core import HomeAssistant, callback
+from homeassistant.helpers.aiohttp_client import async_get_clientsession
+from homeassistant.helpers.storage import Store
+
+from .const import (
+    CATALOG_FILE,
+    CATALOG_STORAGE_KEY,
+    CATALOG_STORAGE_VERSION,
+    CATALOG_TTL,
+    DATA_CATALOG,
+    PARASAIL_API_URL,
+    PARASAIL_CATALOG_URL,
+    PARASAIL_TTS_MODELS,
+    VOICE_NAMES,
+)
+
+_LOGGER = logging.getLogger(__name__)
+
+
+def parse_catalog(data: Any) -> tuple[dict[str, str], dict[str, dict[str, Any]]]:
+    """Parse a catalog document into voice names and model info.
+
+    Voices may be plain ids or ``{"id": ..., "name": ...}`` objects. Models
+    are ``{"id": ..., "url": ..., "languages": [...]}`` objects.
+    Raises ``ValueError`` if the document contains no voices.
+    """
+    if not isinstance(data, dict):
+        raise ValueError("Catalog must be a JSON object")
+
+    voices: dict[str, str] = {}
+    for voice in data.get("voices", []):
+        if isinstance(voice, str):
+            voices[voice] = VOICE_NAMES.get(voice, voice)
+        elif isinstance(voice, dict) and "id" in voice:
+            voices[voice["id"]] = voice.get("name", voice["id"])
+
+    models: dict[str, dict[str, Any]] = {}
+    for model in data.get("models", []):
+        if isinstance(model, dict) and "id" in model:
+            models[model["id"]] = {
+                "url": model.get("url", PARASAIL_API_URL),
+                "languages": list(model.get("languages", ["en"])),
+            }
+
+    if not voices:
+        raise ValueError("Catalog contains no voices")
+    return voices, models or dict(PARASAIL_TTS_MODELS)
+
+
+class ParasailCatalog:
+    """Voice and model catalog shared by the flows and the entities.
+
+    The catalog starts out with the built-in voices and models, so it can
+    always be used without waiting. ``async_load`` replaces them with the
+    last catalog stored on disk or a local catalog file, and
+    ``async_refresh`` revalidates against the API using the stored ETag
+    once the TTL has expired. When the network is down the stale catalog
+    stays in use. The flows use the catalog at hand and only start a
+    refresh in the background, so a slow API never delays a form.
+    """
+
+    def __init__(self, hass: HomeAssistant) -> None:
+        """Initialize the catalog."""
+        self._hass = hass
+        self._store: Store[dict[str, Any]] = Store(
+            hass, CATALOG_STORAGE_VERSION, CATALOG_STORAGE_KEY
+        )
+        self._load_lock = asyncio.Lock()
+        self._refresh_lock = asyncio.Lock()
+        self._refresh_task: asyncio.Task[None] | None = None
+        self._loaded = False
+        self._local = False
+        self._etag: str | None = None
+        self._fetched_at = 0.0
+        self.voices: dict[str, str] = dict(VOICE_NAMES)
+        self.models: dict[str, dict[str, Any]] = dict(PARASAIL_TTS_MODELS)
+
+    @property
+    def stale(self) -> bool:
+        """Return True if the catalog should be revalidated."""
+        return not self._local and time.time() - self._fetched_at > CATALOG_TTL
+
+    async def async_load(self) -> None:
+        """Load the catalog from a local file or the on-disk cache, once."""
+        async with self._load_lock:
+            if self._loaded:
+                return
+            self._loaded = True
+
+            path = Path(self._hass.config.path(CATALOG_FILE))
+            if local := await self._hass.async_add_executor_job(_read_local, path):
+                try:
+                    self.voices, self.models = parse_catalog(local)
+                except ValueError as err:
+                    _LOGGER.warning("Ignoring invalid catalog file %s: %s", path, err)
+                else:
+                    _LOGGER.debug("Using local catalog file %s", path)
+                    self._local = True
+                    return
+
+            if (stored := await self._store.async_load()) is None:
+                return
+            try:
+                self.voices, self.models = parse_catalog(stored["catalog"])
+            except (KeyError, ValueError) as err:
+                _LOGGER.debug("Ignoring invalid stored catalog: %s", err)
+                return
+            self._etag = stored.get("etag")
+            self._fetched_at = stored.get("fetched_at", 0.0)
+
+    @callback
+    def async_refresh_in_background(self) -> None:
+        """Start revalidating the catalog if it is stale, without waiting for it."""
+        if not self.stale or (self._refresh_task is not None and not self._refresh_task.done()):
+            return
+        self._refresh_task = self._hass.async_create_background_task(
+            self.async_refresh(), "parasail_tts catalog refresh"
+        )
+
+    async def async_refresh(self, force: bool = False) -> None:
+        """Revalidate the catalog against the API if it is stale."""
+        await self.async_load()
+        async with self._refresh_lock:
+            if not force and not self.stale:
+                return
+
+            headers = {"If-None-Match": self._etag} if self._etag else {}
+            session = async_get_clientsession(self._hass)
+            try:
+                async with session.get(
+                    PARASAIL_CATALOG_URL, headers=headers, timeout=10
+                ) as response:
+                    if response.status == 200:
+                        catalog = await response.json(content_type=None)
+                        self.voices, self.models = parse_catalog(catalog)
+                        self._etag = response.headers.get("ETag")
+                    elif response.status != 304:
+                        _LOGGER.debug(
+                            "Catalog request failed with status %d, keeping cached catalog",
+                            response.status,
+                        )
+                        return
+            except Exception as err:  # pylint: disable=broad-except
+                _LOGGER.debug("Failed to refresh catalog, keeping cached catalog: %s", err)
+                return
+
+            self._fetched_at = time.time()
+            self._store.async_delay_save(
+                lambda: {
+                    "etag": self._etag,
+                    "fetched_at": self._fetched_at,
+                    "catalog": self._as_document(),
+                },
+                1,
+            )
+
+    def _as_document(self) -> dict[str, Any]:
+        """Return the current catalog in its document form."""
+        return {
+            "voices": [{"id": voice, "name": name} for voice, name in self.voices.items()],
+            "models": [{"id": model, **info} for model, info in self.models.items()],
+        }
+
+
+def _read_local(path: Path) -> Any:
+    """Read the local catalog file, if it exists."""
+    if not path.is_file():
+        return None
+    try:
+        return json.loads(path.read_text(encoding="utf-8"))
+    except (OSError, ValueError) as err:
+        _LOGGER.warning("Failed to read catalog file %s: %s", path, err)
+        return None
+
+
+def async_get_catalog(hass: HomeAssistant) -> ParasailCatalog:
+    """Return the catalog shared by all flows and config entries."""
+    if (catalog := hass.data.get(DATA_CATALOG)) is None:
+        catalog = hass.data[DATA_CATALOG] = ParasailCatalog(hass)
+    return catalog
@@ -0,0 +1,74 @@
+"""Lossless compression of cached Parasail TTS audio."""
+from __future__ import annotations
+
+import struct
+import zlib
+
+from .wav import parse_wav
+
+MAGIC = b"PTZ1"
+
+# Magic, length of the WAV header, length of the bytes after the PCM data
+_HEADER = struct.Struct("<4sII")
+
+COMPRESSION_LEVEL = 6
+
+
+def compress_audio(data: bytes) -> bytes:
+    """Compress a 16-bit PCM WAV clip losslessly.
+
+    Every channel is replaced by the difference between successive samples,
+    which is small for speech, and the low and high bytes of those
+    differences are stored in two separate planes before zlib compression.
+    This is the fixed-predictor idea behind FLAC, built from NumPy and the
+    standard library only. Anything else, such as MP3, is already
+    compressed and returned unchanged.
+
+    NumPy is imported here rather than with the module, since this only
+    runs in the executor.
+    """
+    import numpy as np  # pylint: disable=import-outside-toplevel
+
+    info = parse_wav(data)
+    if info is None or info.bits_per_sample != 16 or info.data_size % info.frame_size:
+        return data
+
+    end = info.data_offset + info.data_size
+    frames = np.frombuffer(data[info.data_offset:end], dtype="<i2").reshape(-1, info.channels)
+    # Integer differences wrap around, so the cumulative sum restores them exactly
+    deltas = np.diff(frames, axis=0, prepend=np.zeros((1, info.channels), dtype="<i2"))
+    planes = deltas.view(np.uint8).reshape(-1, 2).T.tobytes()
+
+    header = data[:info.data_offset]
+    tail = data[end:]
+    return (
+        _HEADER.pack(MAGIC, len(header), len(tail))
+        + header
+        + tail
+        + zlib.compress(planes, COMPRESSION_LEVEL)
+    )
+
+
+def decompress_audio(data: bytes) -> bytes:
+    """Restore a clip compressed by ``compress_audio``, passing others through."""
+    if not data.startswith(MAGIC):
+        return data
+    import numpy as np  # pylint: disable=import-outside-toplevel
+
+    _, header_size, tail_size = _HEADER.unpack_from(data)
+    offset = _HEADER.size
+    header = data[offset:offset + header_size]
+    offset += header_size
+    tail = data[offset:offset + tail_size]
+    offset += tail_size
+
+    channels = parse_wav(header).channels
+    planes = np.frombuffer(zlib.decompress(data[offset:]), dtype=np.uint8)
+    deltas = np.ascontiguousarray(planes.reshape(2, -1).T).view("<i2").reshape(-1, channels)
+    frames = np.cumsum(deltas, axis=0, dtype="<i2")
+    return header + frames.tobytes() + tail
+
+
+def is_compressed(data: bytes) -> bool:
+    """Return True if the data was compressed by ``compress_audio``."""
+    return data.startswith(MAGIC)
@@ -13,20 +13,42 @@ from homeassistant.core import HomeAssistant
 from homeassistant.exceptions import HomeAssistantError
 from homeassistant.helpers.aiohttp_client import async_get_clientsession
 
+from .catalog import async_get_catalog
 from .const import (
+    CONF_CACHE_PARTIAL,
+    CONF_DAILY_QUOTA,
+    CONF_DISK_CACHE,
     CONF_EXAGGERATION,
+    CONF_JITTER_BUFFER,
+    CONF_LANGUAGE_VOICES,
     CONF_MODEL,
+    CONF_NORMALIZE_LOUDNESS,
+    CONF_QUOTA_MODE,
+    CONF_SHARED_CACHE,
+    CONF_TARGET_LOUDNESS,
     CONF_TEMPERATURE,
+    CONF_TRIM_SILENCE,
     CONF_VOICE,
+    DEFAULT_CACHE_PARTIAL,
     DEFAULT_CFG_WEIGHT,
+    DEFAULT_DAILY_QUOTA,
+    DEFAULT_DISK_CACHE,
     DEFAULT_EXAGGERATION,
+    DEFAULT_JITTER_BUFFER,
     DEFAULT_MODEL,
+    DEFAULT_NORMALIZE_LOUDNESS,
+    DEFAULT_QUOTA_MODE,
+    DEFAULT_SHARED_CACHE,
+    DEFAULT_TARGET_LOUDNESS,
     DEFAULT_TEMPERATURE,
+    DEFAULT_TRIM_SILENCE,
     DEFAULT_VOICE,
     DOMAIN,
+    MAX_JITTER_BUFFER,
     PARASAIL_API_URL,
-    VOICE_NAMES,
+    QUOTA_MODES,
 )
+from .routing import parse_language_voices
 
 _LOGGER = logging.getLogger(__name__)
 
@@ -116,6 +138,11 @@ class ConfigFlow(config_entries.ConfigFlow, domain=DOMAIN):
         """Handle the initial step."""
         errors: dict[str, str] = {}
 
+        catalog = async_get_catalog(self.hass)
+        await catalog.async_load()
+        # A refresh shows up the next time a form is shown
+        catalog.async_refresh_in_background()
+
         if user_input is not None:
             try:
                 info = await validate_input(self.hass, user_input)
@@ -134,7 +161,7 @@ class ConfigFlow(config_entries.ConfigFlow, domain=DOMAIN):
             data_schema=vol.Schema(
                 {
                     vol.Required(CONF_VOICE, default=DEFAULT_VOICE): vol.In(
-                        VOICE_NAMES
+                        catalog.voices
                     ),
                     vol.Optional(CONF_TEMPERATURE, default=DEFAULT_TEMPERATURE): vol.All(
                         vol.Coerce(float), vol.Range(min=0.0, max=1.0)
@@ -166,8 +193,27 @@ class OptionsFlow(config_entries.OptionsFlow):
         self, user_input: dict[str, Any] | None = None
     ):
         """Manage the options."""
+        errors: dict[str, str] = {}
+        catalog = async_get_catalog(self.hass)
+        await catalog.async_load()
+        catalog.async_refresh_in_background()
+
         if user_input is not None:
-            return self.async_create_entry(title="", data=user_input)
+            try:
+                language_voices = parse_language_voices(
+                    user_input.get(CONF_LANGUAGE_VOICES, "")
+                )
+            except ValueError:
+                errors[CONF_LANGUAGE_VOICES] = "invalid_language_voices"
+            else:
+                if any(voice not in catalog.voices for voice in language_voices.values()):
+                    errors[CONF_LANGUAGE_VOICES] = "invalid_language_voices"
+            if not _valid_shared_cache(
+                self.hass, user_input.get(CONF_SHARED_CACHE, DEFAULT_SHARED_CACHE)
+            ):
+                errors[CONF_SHARED_CACHE] = "invalid_shared_cache"
+            if not errors:
+                return self.async_create_entry(title="", data=user_input)
 
         # Get current options, fallback to data if options not set
         config_entry = self.config_entry
@@ -177,7 +223,7 @@ class OptionsFlow(config_entries.OptionsFlow):
             vol.Required(
                 CONF_VOICE,
                 default=options.get(CONF_VOICE, DEFAULT_VOICE),
-            ): vol.In(VOICE_NAMES),
+            ): vol.In(catalog.voices),
             vol.Optional(
                 CONF_TEMPERATURE,
                 default=options.get(CONF_TEMPERATURE, DEFAULT_TEMPERATURE),
@@ -186,13 +232,61 @@ class OptionsFlow(config_entries.OptionsFlow):
                 CONF_EXAGGERATION,
                 default=options.get(CONF_EXAGGERATION, DEFAULT_EXAGGERATION),
             ): vol.All(vol.Coerce(float), vol.Range(min=0.0, max=1.0)),
+            vol.Optional(
+                CONF_LANGUAGE_VOICES,
+                default=options.get(CONF_LANGUAGE_VOICES, ""),
+            ): str,
+            vol.Optional(
+                CONF_CACHE_PARTIAL,
+                default=options.get(CONF_CACHE_PARTIAL, DEFAULT_CACHE_PARTIAL),
+            ): bool,
+            vol.Optional(
+                CONF_TRIM_SILENCE,
+                default=options.get(CONF_TRIM_SILENCE, DEFAULT_TRIM_SILENCE),
+            ): bool,
+            vol.Optional(
+                CONF_NORMALIZE_LOUDNESS,
+                default=options.get(CONF_NORMALIZE_LOUDNESS, DEFAULT_NORMALIZE_LOUDNESS),
+            ): bool,
+            vol.Optional(
+                CONF_TARGET_LOUDNESS,
+                default=options.get(CONF_TARGET_LOUDNESS, DEFAULT_TARGET_LOUDNESS),
+            ): vol.All(vol.Coerce(float), vol.Range(min=-40.0, max=-6.0)),
+            vol.Optional(
+                CONF_SHARED_CACHE,
+                default=options.get(CONF_SHARED_CACHE, DEFAULT_SHARED_CACHE),
+            ): str,
+            vol.Optional(
+                CONF_DAILY_QUOTA,
+                default=options.get(CONF_DAILY_QUOTA, DEFAULT_DAILY_QUOTA),
+            ): vol.All(vol.Coerce(int), vol.Range(min=0)),
+            vol.Optional(
+                CONF_QUOTA_MODE,
+                default=options.get(CONF_QUOTA_MODE, DEFAULT_QUOTA_MODE),
+            ): vol.In(QUOTA_MODES),
+            vol.Optional(
+                CONF_JITTER_BUFFER,
+                default=options.get(CONF_JITTER_BUFFER, DEFAULT_JITTER_BUFFER),
+            ): vol.All(vol.Coerce(int), vol.Range(min=0, max=MAX_JITTER_BUFFER)),
+            vol.Optional(
+                CONF_DISK_CACHE,
+                default=options.get(CONF_DISK_CACHE, DEFAULT_DISK_CACHE),
+            ): bool,
         }
 
         return self.async_show_form(
             step_id="init",
             data_schema=vol.Schema(schema_dict),
+            errors=errors,
         )
 
 
+def _valid_shared_cache(hass: HomeAssistant, location: str) -> bool:
+    """Return True if the shared cache is empty, a URL or an allowed directory."""
+    if not location or location.startswith(("http://", "https://")):
+        return True
+    return hass.config.is_allowed_path(hass.config.path(location))
+
+
 class InvalidAuth(HomeAssistantError):
     """Error to indicate there is invalid auth."""
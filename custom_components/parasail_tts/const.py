@@ -6,19 +6,46 @@ CONF_MODEL = "model"
 CONF_VOICE = "voice"
 CONF_TEMPERATURE = "temperature"
 CONF_EXAGGERATION = "exaggeration"
+CONF_LANGUAGE_VOICES = "language_voices"
+CONF_CACHE_PARTIAL = "cache_partial_audio"
+CONF_TRIM_SILENCE = "trim_silence"
+CONF_NORMALIZE_LOUDNESS = "normalize_loudness"
+CONF_TARGET_LOUDNESS = "target_loudness"
+CONF_SHARED_CACHE = "shared_cache"
+CONF_DAILY_QUOTA = "daily_character_quota"
+CONF_QUOTA_MODE = "quota_mode"
+CONF_JITTER_BUFFER = "jitter_buffer_ms"
+CONF_DISK_CACHE = "disk_cache"
 
 DEFAULT_MODEL = "parasail-resemble-tts-en"
 DEFAULT_VOICE = "oai_nova"
 DEFAULT_TEMPERATURE = 0.1
 DEFAULT_EXAGGERATION = 0.0
 DEFAULT_CFG_WEIGHT = 3.0
+DEFAULT_LANGUAGE = "en"
+DEFAULT_CACHE_PARTIAL = False
+DEFAULT_TRIM_SILENCE = False
+DEFAULT_NORMALIZE_LOUDNESS = False
+DEFAULT_TARGET_LOUDNESS = -20.0
+DEFAULT_SHARED_CACHE = ""
+DEFAULT_DAILY_QUOTA = 0
+DEFAULT_QUOTA_MODE = "cache_only"
+DEFAULT_JITTER_BUFFER = 100
+DEFAULT_DISK_CACHE = False
 
 PARASAIL_API_URL = "https://voice-demo.parasail.io/api/tts-stream"
+# Parasail does not document a catalog endpoint; this one is assumed from
+# the layout of the demo API. While it fails the built-in or stored catalog
+# stays in use.
+PARASAIL_CATALOG_URL = "https://voice-demo.parasail.io/api/voices"
 
-# Available TTS models on Parasail
-PARASAIL_TTS_MODELS = [
-    "parasail-resemble-tts-en",
-]
+# Available TTS models on Parasail, with their endpoint and languages
+PARASAIL_TTS_MODELS = {
+    "parasail-resemble-tts-en": {
+        "url": PARASAIL_API_URL,
+        "languages": ["en"],
+    },
+}
 
 # Available voices for TTS
 PARASAIL_TTS_VOICES = [
@@ -43,3 +70,162 @@ VOICE_NAMES = {
     "oai_sage": "Sage",
     "oai_shimmer": "Shimmer",
 }
+
+# Shared audio cache
+DATA_CACHE = f"{DOMAIN}_cache"
+DEFAULT_CACHE_MAX_BYTES = 64 * 1024 * 1024
+DEFAULT_CACHE_HOT_BYTES = 8 * 1024 * 1024
+# Cache variant of the unprocessed audio a cancelled request received
+PARTIAL_VARIANT = "partial"
+
+# Admission to the cold tier: a count-min sketch of how often keys are
+# requested, halved after SKETCH_SAMPLE_FACTOR requests per cached clip
+SKETCH_WIDTH = 4096
+SKETCH_DEPTH = 4
+SKETCH_SAMPLE_FACTOR = 10
+SKETCH_MIN_ENTRIES = 64
+# Largest count a 4-bit counter holds
+SKETCH_MAX_COUNT = 15
+
+# Disk tier of the audio cache: an append-only log of segments written by a
+# background task in batches, with one fsync per batch
+DATA_DISK_STORE = f"{DOMAIN}_disk_store"
+DISK_STORE_DIRECTORY = "parasail_tts_cache"
+DISK_STORE_MAX_BYTES = 256 * 1024 * 1024
+DISK_SEGMENT_BYTES = 8 * 1024 * 1024
+DISK_WRITE_QUEUE = 256
+DISK_WRITE_BATCH = 64
+DISK_COMMIT_INTERVAL = 1.0
+DISK_READ_AHEAD_BYTES = 256 * 1024
+DISK_READ_AHEAD_MAX_BYTES = 2 * 1024 * 1024
+DISK_RETRY_INTERVAL = 300
+
+# Index of the disk tier, saved now and then so that startup only has to
+# scan the records written after the last snapshot
+DISK_SNAPSHOT_FILE = "index.snapshot"
+DISK_SNAPSHOT_INTERVAL = 300
+
+# Cached clips served to media players: spooled to files so that the HTTP
+# server can answer range requests and send them with sendfile
+DATA_MEDIA_SPOOL = f"{DOMAIN}_media_spool"
+MEDIA_SPOOL_DIRECTORY = "parasail_tts_media"
+MEDIA_SPOOL_MAX_BYTES = 64 * 1024 * 1024
+MEDIA_BROWSE_LIMIT = 200
+MEDIA_URL = "/api/parasail_tts/media"
+MEDIA_MIME_TYPES = {"wav": "audio/wav", "mp3": "audio/mpeg"}
+
+# Cache shared between Home Assistant instances
+DATA_SHARED_CACHE = f"{DOMAIN}_shared_cache"
+SHARED_CACHE_TIMEOUT = 5
+# Seconds a shared cache server is skipped after a failed request, doubling
+# up to the maximum while it stays unreachable
+SHARED_CACHE_RETRY_INTERVAL = 30
+SHARED_CACHE_MAX_RETRY_INTERVAL = 600
+SHARED_FAILURE_TTL = 10
+# Format stored for a request that failed, so the instances waiting for it
+# do not all retry it at once
+FAILURE_FORMAT = "failure"
+SHARED_LOCK_TTL = 60
+SHARED_LOCK_WAIT = 30
+SHARED_LOCK_POLL_INTERVAL = 0.25
+# A shared cache directory is pruned of expired files at most this often, or
+# once it grows beyond its size, when it is trimmed to 90% of it
+SHARED_DIRECTORY_MAX_BYTES = 512 * 1024 * 1024
+SHARED_PRUNE_INTERVAL = 600
+
+# Usage accounting and daily quotas; a quota of 0 disables it
+DATA_USAGE = f"{DOMAIN}_usage"
+DATA_USAGE_ORIGINS = f"{DOMAIN}_usage_origins"
+SIGNAL_USAGE_UPDATED = f"{DOMAIN}_usage_updated_{{}}"
+USAGE_STORAGE_KEY = f"{DOMAIN}.usage"
+USAGE_STORAGE_VERSION = 1
+USAGE_SAVE_DELAY = 60
+USAGE_RETENTION_DAYS = 30
+USAGE_MAX_CONTEXTS = 50
+USAGE_MAX_ORIGINS = 256
+QUOTA_MODE_CACHE_ONLY = "cache_only"
+QUOTA_MODE_REJECT = "reject"
+QUOTA_MODES = [QUOTA_MODE_CACHE_ONLY, QUOTA_MODE_REJECT]
+
+# Batch synthesis service
+SERVICE_SYNTHESIZE_BATCH = "synthesize_batch"
+EVENT_BATCH_PROGRESS = f"{DOMAIN}_batch_progress"
+
+ATTR_CONFIG_ENTRY_ID = "config_entry_id"
+ATTR_MESSAGES = "messages"
+ATTR_MAX_CONCURRENCY = "max_concurrency"
+ATTR_OUTPUT_DIR = "output_dir"
+ATTR_REQUESTS = "requests"
+ATTR_BLOCK_THRESHOLD_MS = "block_threshold_ms"
+
+DEFAULT_BATCH_CONCURRENCY = 4
+MAX_BATCH_CONCURRENCY = 16
+BATCH_PROGRESS_INTERVAL = 25
+
+# Profiling service
+SERVICE_PROFILE = "profile"
+DATA_PROFILER = f"{DOMAIN}_profiler"
+PROFILE_DIRECTORY = "parasail_tts_profiles"
+DEFAULT_PROFILE_REQUESTS = 5
+DEFAULT_BLOCK_THRESHOLD_MS = 50
+# Seconds after which a session stops even if requests are left
+PROFILE_MAX_DURATION = 600
+
+# Stream capture service
+SERVICE_CAPTURE = "capture"
+DATA_CAPTURE = f"{DOMAIN}_capture"
+CAPTURE_DIRECTORY = "parasail_tts_captures"
+ATTR_REDACT_TEXT = "redact_text"
+DEFAULT_CAPTURE_REQUESTS = 10
+
+# Voice preview service
+SERVICE_PREVIEW_VOICES = "preview_voices"
+ATTR_MESSAGE = "message"
+ATTR_VOICES = "voices"
+DEFAULT_PREVIEW_MESSAGE = "Hello! This is how I sound when I read your announcements."
+DEFAULT_PREVIEW_CONCURRENCY = 8
+
+# Tracing of the chunks of a request while debug logging is on: the last
+# TRACE_MAX_EVENTS chunks of each of the last TRACE_MAX_REQUESTS requests
+DATA_TRACER = f"{DOMAIN}_tracer"
+TRACE_MAX_EVENTS = 512
+TRACE_MAX_REQUESTS = 20
+
+# Voice and model catalog
+DATA_CATALOG = f"{DOMAIN}_catalog"
+CATALOG_FILE = "parasail_tts_catalog.json"
+CATALOG_STORAGE_KEY = f"{DOMAIN}.catalog"
+CATALOG_STORAGE_VERSION = 1
+CATALOG_TTL = 24 * 60 * 60
+
+# Adaptive request timeouts, in seconds
+DATA_THROUGHPUT = f"{DOMAIN}_throughput"
+THROUGHPUT_STORAGE_KEY = f"{DOMAIN}.throughput"
+THROUGHPUT_STORAGE_VERSION = 1
+THROUGHPUT_SAVE_DELAY = 60
+THROUGHPUT_EWMA_ALPHA = 0.2
+DEFAULT_CHARS_PER_SECOND = 15.0
+TIMEOUT_CONNECT = 5
+TIMEOUT_FIRST_BYTE = 10
+TIMEOUT_IDLE = 10
+TIMEOUT_SAFETY_FACTOR = 2.0
+MAX_TOTAL_TIMEOUT = 600
+
+# Streaming of text from a conversation agent
+STREAM_MIN_SENTENCE_CHARS = 20
+STREAM_MAX_AHEAD = 2
+
+# Jitter buffer of streamed replies: the configured depth is the minimum, and
+# the depth grows to the mean lateness of chunks plus this many deviations
+DATA_JITTER = f"{DOMAIN}_jitter"
+JITTER_DEVIATIONS = 3.0
+JITTER_EWMA_ALPHA = 1 / 16
+JITTER_MAX_DEPTH = 2.0
+MAX_JITTER_BUFFER = 2000
+
+# Audio post-processing
+SILENCE_THRESHOLD_DB = -50.0
+SILENCE_PADDING_MS = 30
+MAX_GAIN_DB = 20.0
+# Voiced audio a stream is held back for before its gain is derived
+NORMALIZE_WINDOW_MS = 500
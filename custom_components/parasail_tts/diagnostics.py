@@ -0,0 +1,39 @@
+"""Diagnostics support for Parasail TTS."""
+from __future__ import annotations
+
+from typing import Any
+
+from homeassistant.config_entries import ConfigEntry
+from homeassistant.core import HomeAssistant
+
+from .cache import async_get_cache
+from .const import (
+    CONF_JITTER_BUFFER,
+    CONF_SHARED_CACHE,
+    DEFAULT_JITTER_BUFFER,
+    DEFAULT_SHARED_CACHE,
+)
+from .jitter import async_get_jitter
+from .trace import async_get_tracer
+
+
+async def async_get_config_entry_diagnostics(
+    hass: HomeAssistant, entry: ConfigEntry
+) -> dict[str, Any]:
+    """Return diagnostics for a config entry, including the cache footprint."""
+    config = entry.options or entry.data
+    diagnostics: dict[str, Any] = {
+        "options": dict(config),
+        "cache": async_get_cache(hass).footprint(),
+        "jitter_buffer": async_get_jitter(hass, entry).as_dict(
+            config.get(CONF_JITTER_BUFFER, DEFAULT_JITTER_BUFFER) / 1000
+        ),
+        "traces": async_get_tracer(hass).as_dict(),
+    }
+    if location := config.get(CONF_SHARED_CACHE, DEFAULT_SHARED_CACHE):
+        # pylint: disable-next=import-outside-toplevel
+        from .shared_cache import async_get_shared_cache
+
+        shared = async_get_shared_cache(hass, location)
+        diagnostics["shared_cache"] = await shared.async_footprint()
+    return diagnostics
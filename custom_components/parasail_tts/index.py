@@ -0,0 +1,167 @@
+"""Compact in-memory index of the disk cache."""
+from __future__ import annotations
+
+from array import array
+from dataclasses import dataclass
+import hashlib
+import struct
+import sys
+import zlib
+
+DIGEST_SIZE = 16
+
+# Magic with the version and byte order of the arrays, slots and segments
+SNAPSHOT_HEADER = struct.Struct("<4sII")
+SNAPSHOT_MAGIC = b"PT2" + (b"L" if sys.byteorder == "little" else b"B")
+SNAPSHOT_CRC = struct.Struct("<I")
+
+
+@dataclass(slots=True, frozen=True)
+class Location:
+    """Segment, offset and length of a record."""
+
+    segment: int
+    offset: int
+    length: int
+
+
+def key_digest(key: str) -> bytes:
+    """Return the fixed-width digest a key is indexed by."""
+    return hashlib.blake2b(key.encode(), digest_size=DIGEST_SIZE).digest()
+
+
+class DiskIndex:
+    """Location of every record on disk, in a few flat arrays.
+
+    Each key takes a slot: its 16-byte digest in one byte array and its
+    segment, offset and length in three typed arrays, so an entry costs a
+    few dozen bytes instead of a key string and an object. A dict maps
+    digests to slots and answers hits and misses alike with one lookup,
+    and the slots of removed keys are reused.
+
+    The arrays are saved as they are in a snapshot, which is loaded back
+    with a few copies instead of scanning the records on disk.
+    """
+
+    __slots__ = (
+        "_slots",
+        "_digests",
+        "_segments",
+        "_offsets",
+        "_lengths",
+        "_free",
+    )
+
+    def __init__(self) -> None:
+        """Initialize an empty index."""
+        self._slots: dict[bytes, int] = {}
+        self._digests = bytearray()
+        self._segments = array("I")
+        self._offsets = array("Q")
+        self._lengths = array("I")
+        self._free: list[int] = []
+
+    def __len__(self) -> int:
+        """Return the number of indexed keys."""
+        return len(self._slots)
+
+    def __contains__(self, digest: bytes) -> bool:
+        """Return True if the digest is indexed."""
+        return digest in self._slots
+
+    @property
+    def nbytes(self) -> int:
+        """Return the size of the arrays, without the dict."""
+        return (
+            len(self._digests)
+            + self._segments.itemsize * len(self._segments)
+            + self._offsets.itemsize * len(self._offsets)
+            + self._lengths.itemsize * len(self._lengths)
+        )
+
+    def get(self, digest: bytes) -> Location | None:
+        """Return the location of a digest."""
+        if (slot := self._slots.get(digest)) is None:
+            return None
+        return Location(self._segments[slot], self._offsets[slot], self._lengths[slot])
+
+    def add(self, digest: bytes, segment: int, offset: int, length: int) -> None:
+        """Index a record, replacing an older one of the same key."""
+        if (slot := self._slots.get(digest)) is None:
+            if self._free:
+                slot = self._free.pop()
+                self._digests[slot * DIGEST_SIZE:(slot + 1) * DIGEST_SIZE] = digest
+            else:
+                slot = len(self._lengths)
+                self._digests += digest
+                self._segments.append(0)
+                self._offsets.append(0)
+                self._lengths.append(0)
+            self._slots[digest] = slot
+        self._segments[slot] = segment
+        self._offsets[slot] = offset
+        self._lengths[slot] = length
+
+    def remove_segment(self, segment: int) -> int:
+        """Remove the records of a segment and return how many there were."""
+        removed = 0
+        for slot, number in enumerate(self._segments):
+            if number != segment or not self._lengths[slot]:
+                continue
+            del self._slots[bytes(self._digests[slot * DIGEST_SIZE:(slot + 1) * DIGEST_SIZE])]
+            self._lengths[slot] = 0
+            self._free.append(slot)
+            removed += 1
+        return removed
+
+    def to_snapshot(self, segments: dict[int, int]) -> bytes:
+        """Return the index and the segment sizes it covers as a snapshot."""
+        sizes = array("Q")
+        for number, size in segments.items():
+            sizes.extend((number, size))
+        data = b"".join(
+            (
+                SNAPSHOT_HEADER.pack(SNAPSHOT_MAGIC, len(self._lengths), len(segments)),
+                sizes.tobytes(),
+                self._digests,
+                self._segments.tobytes(),
+                self._offsets.tobytes(),
+                self._lengths.tobytes(),
+            )
+        )
+        return data + SNAPSHOT_CRC.pack(zlib.crc32(data))
+
+    @classmethod
+    def from_snapshot(cls, data: bytes) -> tuple[DiskIndex, dict[int, int]] | None:
+        """Return the index and segment sizes of a snapshot, or None if it is invalid."""
+        if len(data) < SNAPSHOT_HEADER.size + SNAPSHOT_CRC.size:
+            return None
+        body = memoryview(data)[:-SNAPSHOT_CRC.size]
+        (crc,) = SNAPSHOT_CRC.unpack_from(data, len(body))
+        magic, slots, segment_count = SNAPSHOT_HEADER.unpack_from(body)
+        if magic != SNAPSHOT_MAGIC or zlib.crc32(body) != crc:
+            return None
+
+        index = cls()
+        position = SNAPSHOT_HEADER.size
+
+        def take(size: int) -> memoryview:
+            nonlocal position
+            position += size
+            return body[position - size:position]
+
+        sizes = array("Q")
+        sizes.frombytes(take(segment_count * 2 * sizes.itemsize))
+        index._digests = bytearray(take(slots * DIGEST_SIZE))
+        for values in (index._segments, index._offsets, index._lengths):
+            values.frombytes(take(slots * values.itemsize))
+        if position != len(body):
+            return None
+
+        digests = index._digests
+        for slot, length in enumerate(index._lengths):
+            if length:
+                index._slots[bytes(digests[slot * DIGEST_SIZE:(slot + 1) * DIGEST_SIZE])] = slot
+            else:
+                index._free.append(slot)
+        return index, dict(zip(sizes[::2], sizes[1::2]))
@@ -0,0 +1,167 @@
+"""Jitter buffer between the streamed audio of a reply and its player."""
+from __future__ import annotations
+
+import asyncio
+from collections.abc import AsyncIterable, AsyncIterator, Callable
+import math
+import time
+from typing import Any
+
+from homeassistant.config_entries import ConfigEntry
+from homeassistant.core import HomeAssistant
+
+from .const import DATA_JITTER, JITTER_DEVIATIONS, JITTER_EWMA_ALPHA, JITTER_MAX_DEPTH
+
+_END = object()
+
+
+class JitterStats:
+    """Arrival statistics and underruns of the streamed replies of one entry.
+
+    For every chunk the lateness is the time since the previous chunk minus
+    the playing time of the previous chunk: negative while the server is
+    ahead of playback, positive when a burst is followed by a gap. Mean and
+    variance are averaged with exponential weights, like RTP receivers
+    estimate jitter, and carried over from one reply to the next. A server
+    that keeps ahead gets the configured depth and the lowest start latency;
+    a bursty one gets a deeper buffer.
+    """
+
+    def __init__(self) -> None:
+        """Initialize the statistics."""
+        self.mean = 0.0
+        self.variance = 0.0
+        self.samples = 0
+        self.streams = 0
+        self.underruns = 0
+        self.underrun_seconds = 0.0
+        self.start_latency = 0.0
+
+    def depth(self, min_depth: float) -> float:
+        """Return the seconds of audio to hold back before playing."""
+        adaptive = self.mean + JITTER_DEVIATIONS * math.sqrt(self.variance)
+        return min(max(min_depth, adaptive), max(min_depth, JITTER_MAX_DEPTH))
+
+    def observe(self, lateness: float) -> None:
+        """Add the lateness of a chunk to the averages."""
+        if not self.samples:
+            self.mean = lateness
+        else:
+            delta = lateness - self.mean
+            self.mean += JITTER_EWMA_ALPHA * delta
+            self.variance = (1 - JITTER_EWMA_ALPHA) * (
+                self.variance + JITTER_EWMA_ALPHA * delta * delta
+            )
+        self.samples += 1
+
+    def as_dict(self, min_depth: float) -> dict[str, Any]:
+        """Return the statistics for diagnostics, in milliseconds."""
+        return {
+            "depth_ms": round(self.depth(min_depth) * 1000),
+            "lateness_mean_ms": round(self.mean * 1000, 1),
+            "lateness_deviation_ms": round(math.sqrt(self.variance) * 1000, 1),
+            "streams": self.streams,
+            "underruns": self.underruns,
+            "underrun_ms": round(self.underrun_seconds * 1000),
+            "last_start_latency_ms": round(self.start_latency * 1000),
+        }
+
+
+async def async_iter_jitter_buffered(
+    source: AsyncIterable[bytes],
+    seconds: Callable[[bytes], float | None],
+    stats: JitterStats,
+    min_depth: float,
+) -> AsyncIterator[bytes]:
+    """Yield the chunks of a stream once enough audio is buffered to play smoothly.
+
+    The source is read ahead in a task, so chunks keep arriving while the
+    consumer is busy. Nothing is yielded until ``stats.depth`` seconds of
+    audio are held, or the stream ended. After that chunks are passed on
+    as they arrive, while the audio handed out is compared with the time
+    since playback started. When a chunk arrives after the player would
+    have run dry, that is counted as an underrun and the buffer fills up
+    again before playing on. Audio of unknown length is passed straight
+    through, and so is everything when ``min_depth`` is 0.
+    """
+    if not min_depth:
+        async for chunk in source:
+            yield chunk
+        return
+
+    queue: asyncio.Queue[Any] = asyncio.Queue()
+
+    async def read() -> None:
+        """Read the source ahead and record the lateness of every chunk."""
+        previous: tuple[float, float] | None = None
+        try:
+            async for chunk in source:
+                arrival = time.monotonic()
+                duration = seconds(chunk)
+                if previous is not None and duration is not None:
+                    stats.observe(arrival - previous[0] - previous[1])
+                previous = (arrival, duration or 0.0)
+                queue.put_nowait((chunk, duration))
+        except Exception as err:  # pylint: disable=broad-except
+            queue.put_nowait(err)
+        finally:
+            queue.put_nowait(_END)
+
+    reader = asyncio.create_task(read())
+    started = time.monotonic()
+    stats.streams += 1
+    held: list[bytes] = []
+    held_seconds = 0.0
+    # Start of playback and the audio handed out since; None while buffering
+    playing_since: float | None = None
+    played = 0.0
+    first = True
+    ended = False
+    try:
+        while not ended:
+            item = await queue.get()
+            now = time.monotonic()
+            if item is _END:
+                ended = True
+            elif isinstance(item, Exception):
+                raise item
+            else:
+                chunk, duration = item
+                if playing_since is not None and now - playing_since > played:
+                    stats.underruns += 1
+                    stats.underrun_seconds += now - playing_since - played
+                    playing_since = None
+                held.append(chunk)
+                if duration is None:
+                    # Nothing to measure; do not hold back audio of unknown length
+                    held_seconds = math.inf
+                else:
+                    held_seconds += duration
+
+            if playing_since is None:
+                if not ended and held_seconds < stats.depth(min_depth):
+                    continue
+                playing_since = now
+                played = 0.0
+                if first:
+                    first = False
+                    stats.start_latency = now - started
+            for chunk in held:
+                yield chunk
+            if math.isinf(held_seconds):
+                # Playback can no longer be followed, so no underruns are counted
+                played = math.inf
+            else:
+                played += held_seconds
+            held.clear()
+            held_seconds = 0.0
+    finally:
+        reader.cancel()
+
+
+def async_get_jitter(hass: HomeAssistant, entry: ConfigEntry) -> JitterStats:
+    """Return the jitter statistics of a config entry, kept across reloads."""
+    entries: dict[str, JitterStats] = hass.data.setdefault(DATA_JITTER, {})
+    if (stats := entries.get(entry.entry_id)) is None:
+        stats = entries[entry.entry_id] = JitterStats()
+    return stats
@@ -0,0 +1,178 @@
+"""Cached clips served to media players straight from files."""
+from __future__ import annotations
+
+import asyncio
+from collections import OrderedDict
+import contextlib
+import logging
+import os
+from pathlib import Path
+import re
+
+from aiohttp import web
+
+from homeassistant.components.http import HomeAssistantView
+from homeassistant.core import HomeAssistant
+
+from .cache import async_get_cache
+from .const import (
+    DATA_MEDIA_SPOOL,
+    MEDIA_MIME_TYPES,
+    MEDIA_SPOOL_DIRECTORY,
+    MEDIA_SPOOL_MAX_BYTES,
+    MEDIA_URL,
+)
+
+_LOGGER = logging.getLogger(__name__)
+
+MEDIA_KEY = re.compile(r"^[0-9a-f]{64}$")
+MEDIA_FILENAME = re.compile(r"^([0-9a-f]{64})\.([a-z0-9]+)$")
+
+
+class MediaSpool:
+    """Directory of cached clips written out as plain audio files.
+
+    The audio cache keeps clips in memory, compressed, or inside the segments
+    of the disk tier, none of which the HTTP server can send as they are.
+    A clip requested by a media player is written out once, in the executor,
+    as ``<key>.<format>``. From then on every request, including the range
+    requests of players that seek or fetch a clip in parts, is answered by
+    the HTTP server from the file with ``sendfile`` and an ``ETag``, without
+    the bytes passing through Python. The files are bounded by ``max_bytes``,
+    least recently requested first out, and reused after a restart.
+    """
+
+    def __init__(
+        self, hass: HomeAssistant, directory: Path, max_bytes: int = MEDIA_SPOOL_MAX_BYTES
+    ) -> None:
+        """Initialize the spool."""
+        self._hass = hass
+        self.directory = directory
+        self._max_bytes = max_bytes
+        self._files: OrderedDict[str, tuple[str, int]] = OrderedDict()
+        self._writing: dict[str, asyncio.Future[Path | None]] = {}
+        self._loaded: asyncio.Future[None] | None = None
+        self.size = 0
+
+    async def async_path(self, key: str) -> Path | None:
+        """Return the file of a cached clip, writing it out first if needed."""
+        if self._loaded is None:
+            self._loaded = self._hass.async_add_executor_job(self._scan)
+        await self._loaded
+
+        if (spooled := self._files.get(key)) is not None:
+            self._files.move_to_end(key)
+            return self.directory / spooled[0]
+        if (writing := self._writing.get(key)) is not None:
+            return await asyncio.shield(writing)
+
+        writing = self._writing[key] = self._hass.loop.create_future()
+        try:
+            path = await self._async_write(key)
+            writing.set_result(path)
+            return path
+        finally:
+            del self._writing[key]
+            if not writing.done():
+                writing.cancel()
+
+    async def _async_write(self, key: str) -> Path | None:
+        """Write a clip from the audio cache to its file."""
+        if (entry := await async_get_cache(self._hass).async_get(key)) is None:
+            return None
+        audio_format, audio_data = entry
+        filename = f"{key}.{audio_format}"
+        try:
+            await self._hass.async_add_executor_job(self._write, filename, audio_data)
+        except OSError as err:
+            _LOGGER.warning("Could not spool clip %s for media players: %s", filename, err)
+            return None
+        self._files[key] = (filename, len(audio_data))
+        self.size += len(audio_data)
+        await self._async_trim()
+        return self.directory / filename
+
+    async def _async_trim(self) -> None:
+        """Delete the least recently requested files beyond the size limit."""
+        stale = []
+        while self.size > self._max_bytes and len(self._files) > 1:
+            _, (filename, size) = self._files.popitem(last=False)
+            self.size -= size
+            stale.append(self.directory / filename)
+        if stale:
+            await self._hass.async_add_executor_job(_unlink, stale)
+
+    def _scan(self) -> None:
+        """Index the files left from before, oldest first."""
+        self.directory.mkdir(parents=True, exist_ok=True)
+        found = []
+        for path in self.directory.iterdir():
+            if (match := MEDIA_FILENAME.match(path.name)) is None:
+                # A write interrupted by a crash
+                with contextlib.suppress(OSError):
+                    path.unlink()
+                continue
+            stat = path.stat()
+            found.append((stat.st_mtime, match.group(1), path.name, stat.st_size))
+        for _, key, filename, size in sorted(found):
+            self._files[key] = (filename, size)
+            self.size += size
+
+    def _write(self, filename: str, data: bytes) -> None:
+        """Write a file atomically, so a player never gets half of it."""
+        temporary = self.directory / f".{filename}.tmp"
+        temporary.write_bytes(data)
+        os.replace(temporary, self.directory / filename)
+
+
+def _unlink(paths: list[Path]) -> None:
+    """Delete files, ignoring those already gone."""
+    for path in paths:
+        with contextlib.suppress(OSError):
+            path.unlink()
+
+
+def async_get_media_spool(hass: HomeAssistant) -> MediaSpool:
+    """Return the spool of clips served to media players."""
+    if (spool := hass.data.get(DATA_MEDIA_SPOOL)) is None:
+        spool = hass.data[DATA_MEDIA_SPOOL] = MediaSpool(
+            hass, Path(hass.config.path(MEDIA_SPOOL_DIRECTORY))
+        )
+    return spool
+
+
+def media_url(key: str, audio_format: str) -> str:
+    """Return the URL a media player fetches a cached clip from."""
+    return f"{MEDIA_URL}/{key}.{audio_format}"
+
+
+class ParasailMediaView(HomeAssistantView):
+    """Serve cached clips with range requests, ETags and sendfile.
+
+    Media players get the URL from the media source, signed by Home
+    Assistant, so the view requires authentication like any other.
+    """
+
+    url = MEDIA_URL + "/{filename}"
+    name = "api:parasail_tts:media"
+
+    def __init__(self, hass: HomeAssistant) -> None:
+        """Initialize the view."""
+        self._hass = hass
+
+    async def get(self, request: web.Request, filename: str) -> web.FileResponse:
+        """Return a cached clip."""
+        if (match := MEDIA_FILENAME.match(filename)) is None:
+            raise web.HTTPNotFound()
+        key, audio_format = match.groups()
+        path = await async_get_media_spool(self._hass).async_path(key)
+        if path is None or path.name != filename:
+            raise web.HTTPNotFound()
+        return web.FileResponse(
+            path,
+            headers={
+                "Content-Type": MEDIA_MIME_TYPES.get(audio_format, "application/octet-stream"),
+                # The key is a hash of everything that makes up the clip
+                "Cache-Control": "private, max-age=86400, immutable",
+            },
+        )
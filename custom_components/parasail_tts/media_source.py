@@ -0,0 +1,78 @@
+"""Media source listing the clips in the Parasail TTS audio cache."""
+from __future__ import annotations
+
+from homeassistant.components.media_player import BrowseError, MediaClass, MediaType
+from homeassistant.components.media_source import (
+    BrowseMediaSource,
+    MediaSource,
+    MediaSourceItem,
+    PlayMedia,
+    Unresolvable,
+)
+from homeassistant.core import HomeAssistant
+
+from .cache import async_get_cache
+from .const import DOMAIN, MEDIA_BROWSE_LIMIT, MEDIA_MIME_TYPES
+from .media import MEDIA_KEY, async_get_media_spool, media_url
+
+
+async def async_get_media_source(hass: HomeAssistant) -> ParasailMediaSource:
+    """Set up the Parasail TTS media source."""
+    return ParasailMediaSource(hass)
+
+
+class ParasailMediaSource(MediaSource):
+    """Clips in the audio cache, played from the files of the media spool.
+
+    Unlike the TTS media source, which passes every clip through the TTS
+    proxy, a clip resolved here is fetched by the player from
+    ``ParasailMediaView``, which supports range requests.
+    """
+
+    name = "Parasail TTS"
+
+    def __init__(self, hass: HomeAssistant) -> None:
+        """Initialize the media source."""
+        super().__init__(DOMAIN)
+        self.hass = hass
+
+    async def async_resolve_media(self, item: MediaSourceItem) -> PlayMedia:
+        """Write the clip out if needed and return its URL."""
+        path = None
+        if MEDIA_KEY.match(item.identifier):
+            path = await async_get_media_spool(self.hass).async_path(item.identifier)
+        if path is None:
+            raise Unresolvable(f"Clip {item.identifier} is not in the cache")
+        audio_format = path.suffix[1:]
+        return PlayMedia(
+            media_url(item.identifier, audio_format),
+            MEDIA_MIME_TYPES.get(audio_format, "application/octet-stream"),
+        )
+
+    async def async_browse_media(self, item: MediaSourceItem) -> BrowseMediaSource:
+        """List the most recently used clips, titled with their messages."""
+        if item.identifier:
+            raise BrowseError("Cached clips have no children")
+        messages = async_get_cache(self.hass).messages()[:MEDIA_BROWSE_LIMIT]
+        return BrowseMediaSource(
+            domain=DOMAIN,
+            identifier=None,
+            media_class=MediaClass.DIRECTORY,
+            media_content_type=MediaType.APP,
+            title=self.name,
+            can_play=False,
+            can_expand=True,
+            children_media_class=MediaClass.MUSIC,
+            children=[
+                BrowseMediaSource(
+                    domain=DOMAIN,
+                    identifier=key,
+                    media_class=MediaClass.MUSIC,
+                    media_content_type=MEDIA_MIME_TYPES.get(audio_format, MediaType.MUSIC),
+                    title=message,
+                    can_play=True,
+                    can_expand=False,
+                )
+                for key, audio_format, message in messages
+            ],
+        )
@@ -0,0 +1,143 @@
+"""Scheduling of audio post-processing for Parasail TTS clips.
+
+The processing itself lives in ``audio``, which needs NumPy.
+This module does not, so importing the integration stays cheap: NumPy is
+first imported by an executor job, never while Home Assistant starts or in
+the event loop.
+"""
+from __future__ import annotations
+
+from collections.abc import AsyncIterator, Mapping
+from contextlib import aclosing
+import logging
+from typing import TYPE_CHECKING, Any
+
+from homeassistant.core import HomeAssistant
+
+from .const import (
+    CONF_NORMALIZE_LOUDNESS,
+    CONF_TARGET_LOUDNESS,
+    CONF_TRIM_SILENCE,
+    DEFAULT_NORMALIZE_LOUDNESS,
+    DEFAULT_TARGET_LOUDNESS,
+    DEFAULT_TRIM_SILENCE,
+)
+from .wav import WAV_HEADER_SIZE, WavInfo, WavStreamWriter
+
+if TYPE_CHECKING:
+    from .audio import PcmProcessor
+
+_LOGGER = logging.getLogger(__name__)
+
+
+def processing_variant(config: Mapping[str, Any]) -> str:
+    """Return a cache variant string for the configured processing."""
+    parts = []
+    if config.get(CONF_TRIM_SILENCE, DEFAULT_TRIM_SILENCE):
+        parts.append("trim")
+    if config.get(CONF_NORMALIZE_LOUDNESS, DEFAULT_NORMALIZE_LOUDNESS):
+        parts.append(f"norm{config.get(CONF_TARGET_LOUDNESS, DEFAULT_TARGET_LOUDNESS)}")
+    return "+".join(parts)
+
+
+def _process_wav(
+    data: bytes, trim_silence: bool, normalize: bool, target_db: float
+) -> bytes:
+    """Post-process a WAV clip, importing the NumPy code on first use."""
+    from .audio import process_wav  # pylint: disable=import-outside-toplevel
+
+    return process_wav(data, trim_silence, normalize, target_db)
+
+
+def _create_processor(
+    info: WavInfo, trim_silence: bool, normalize: bool, target_db: float
+) -> PcmProcessor:
+    """Create a processor for streamed PCM, importing the NumPy code on first use."""
+    from .audio import PcmProcessor  # pylint: disable=import-outside-toplevel
+
+    return PcmProcessor(info.channels, info.sample_rate, trim_silence, normalize, target_db)
+
+
+def _finish_processor(processor: PcmProcessor, tail: bytes) -> bytes:
+    """Process the last bytes of a stream and return the rest of its audio."""
+    return processor.feed(tail) + processor.flush()
+
+
+def import_processing() -> None:
+    """Import the NumPy code, so the first clip does not wait for it."""
+    # pylint: disable-next=import-outside-toplevel,unused-import
+    from . import audio  # noqa: F401
+
+
+async def async_postprocess(
+    hass: HomeAssistant,
+    config: Mapping[str, Any],
+    audio_format: str,
+    audio_data: bytes,
+) -> tuple[str, bytes]:
+    """Apply the configured post-processing to a clip in the executor."""
+    trim_silence = config.get(CONF_TRIM_SILENCE, DEFAULT_TRIM_SILENCE)
+    normalize = config.get(CONF_NORMALIZE_LOUDNESS, DEFAULT_NORMALIZE_LOUDNESS)
+    if audio_format != "wav" or not (trim_silence or normalize):
+        return audio_format, audio_data
+
+    processed = await hass.async_add_executor_job(
+        _process_wav,
+        audio_data,
+        trim_silence,
+        normalize,
+        config.get(CONF_TARGET_LOUDNESS, DEFAULT_TARGET_LOUDNESS),
+    )
+    _LOGGER.debug(
+        "Post-processed audio from %d to %d bytes", len(audio_data), len(processed)
+    )
+    return audio_format, processed
+
+
+async def async_iter_postprocessed(
+    hass: HomeAssistant, config: Mapping[str, Any], chunks: AsyncIterator[bytes]
+) -> AsyncIterator[bytes]:
+    """Apply the configured post-processing to streamed audio as it arrives.
+
+    The WAV segments of the stream are framed as one WAV stream whose PCM
+    passes through a ``PcmProcessor``, so leading silence is dropped before
+    the first voiced chunk is played. The processor is created once the
+    format is known, and like every chunk it processes, in the executor.
+    Audio that is not 16-bit PCM WAV, or with no processing configured, is
+    passed through unchanged.
+    """
+    trim_silence = config.get(CONF_TRIM_SILENCE, DEFAULT_TRIM_SILENCE)
+    normalize = config.get(CONF_NORMALIZE_LOUDNESS, DEFAULT_NORMALIZE_LOUDNESS)
+    async with aclosing(chunks) as stream:
+        if not (trim_silence or normalize):
+            async for chunk in stream:
+                yield chunk
+            return
+
+        writer = WavStreamWriter()
+        processor: PcmProcessor | None = None
+        async for chunk in stream:
+            if not (framed := writer.feed(chunk)):
+                continue
+            if processor is None:
+                if (info := writer.info) is None or info.bits_per_sample != 16:
+                    yield framed
+                    continue
+                processor = await hass.async_add_executor_job(
+                    _create_processor,
+                    info,
+                    trim_silence,
+                    normalize,
+                    config.get(CONF_TARGET_LOUDNESS, DEFAULT_TARGET_LOUDNESS),
+                )
+                # The first framed bytes start with the streaming header
+                yield framed[:WAV_HEADER_SIZE]
+                framed = framed[WAV_HEADER_SIZE:]
+            if pcm := await hass.async_add_executor_job(processor.feed, framed):
+                yield pcm
+
+        tail = writer.flush()
+        if processor is not None:
+            tail = await hass.async_add_executor_job(_finish_processor, processor, tail)
+        if tail:
+            yield tail
@@ -0,0 +1,83 @@
+"""Rendering of one sample text in several voices at once."""
+from __future__ import annotations
+
+import asyncio
+from collections.abc import Mapping
+import logging
+import time
+from typing import TYPE_CHECKING, Any
+
+from homeassistant.components.tts import ATTR_VOICE, generate_media_source_id
+from homeassistant.core import Context, HomeAssistant
+
+from .catalog import async_get_catalog
+
+if TYPE_CHECKING:
+    from .tts import ParasailTTSEntity
+
+_LOGGER = logging.getLogger(__name__)
+
+
+async def async_render_previews(
+    hass: HomeAssistant,
+    entity: ParasailTTSEntity,
+    message: str,
+    voices: list[str],
+    max_concurrency: int,
+    config: Mapping[str, Any],
+    context: Context | None,
+) -> dict[str, Any]:
+    """Render a message in every voice, ``max_concurrency`` voices at a time.
+
+    Each voice is rendered by the entity itself with the ``voice`` option,
+    so the requests share the connection pool of the entity and the clips
+    land in the audio cache under the keys the entity looks up later. The
+    usage is recorded for the caller's ``context``.
+    Every result carries a ``media_content_id`` that plays the clip from
+    the cache through the TTS media source, for example in a media player
+    card, without another request to Parasail.
+    """
+    results: list[dict[str, Any]] = [{} for _ in voices]
+    pending = iter(enumerate(voices))
+    names = async_get_catalog(hass).voices
+    language = entity.default_language
+    started = time.monotonic()
+
+    async def render(voice: str) -> dict[str, Any]:
+        """Render the message in one voice and return its result record."""
+        voice_started = time.monotonic()
+        options = {ATTR_VOICE: voice}
+        result: dict[str, Any] = {"voice": voice, "name": names.get(voice, voice)}
+        try:
+            _, _, audio = await entity.async_render(message, language, options, config, context)
+        except Exception as err:  # pylint: disable=broad-except
+            _LOGGER.warning("Rendering the preview of voice %s failed: %s", voice, err)
+            audio = None
+        result["duration_ms"] = round((time.monotonic() - voice_started) * 1000)
+        if audio is None:
+            result["status"] = "error"
+            return result
+
+        audio_format, audio_data = audio
+        result["status"] = "ok"
+        result["format"] = audio_format
+        result["bytes"] = len(audio_data)
+        result["media_content_id"] = generate_media_source_id(
+            hass, message, entity.entity_id, language, options
+        )
+        return result
+
+    async def worker() -> None:
+        """Render voices until none are left."""
+        for index, voice in pending:
+            results[index] = await render(voice)
+
+    await asyncio.gather(*(worker() for _ in range(min(max_concurrency, len(voices)))))
+
+    return {
+        "message": message,
+        "items": results,
+        "succeeded": sum(1 for item in results if item["status"] == "ok"),
+        "failed": sum(1 for item in results if item["status"] == "error"),
+        "elapsed_ms": round((time.monotonic() - started) * 1000),
+    }
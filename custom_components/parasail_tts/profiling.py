@@ -0,0 +1,217 @@
+"""Opt-in profiling of the Parasail TTS hot path."""
+from __future__ import annotations
+
+import asyncio
+from collections.abc import AsyncIterator
+from contextlib import asynccontextmanager
+import cProfile
+from datetime import datetime
+import json
+import logging
+from pathlib import Path
+import sys
+import threading
+import time
+import traceback
+from typing import Any
+
+from homeassistant.const import EVENT_HOMEASSISTANT_STOP
+from homeassistant.core import Event, HomeAssistant, callback
+from homeassistant.helpers.event import async_call_later
+
+from .const import DATA_PROFILER, PROFILE_DIRECTORY, PROFILE_MAX_DURATION
+
+_LOGGER = logging.getLogger(__name__)
+
+# How often the event loop heartbeat runs and the watchdog checks it
+HEARTBEAT_INTERVAL = 0.05
+
+
+class ProfileSession:
+    """Profile the next requests and record event-loop blocking spans.
+
+    While the session is installed in ``hass.data`` the entity runs its
+    requests under cProfile. Requests that overlap share one profile, since
+    only one profiler can be active per thread; every profile is written as
+    a ``.prof`` file readable with ``pstats`` or snakeviz.
+
+    A watchdog thread checks a heartbeat scheduled on the event loop. When
+    the heartbeat is late by more than the threshold, the watchdog snapshots
+    the stack of the loop thread, so the blocking code can be found.
+
+    The session stops after ``max_duration`` seconds even if requests are
+    left, so a forgotten session does not keep the watchdog running.
+    """
+
+    def __init__(
+        self,
+        hass: HomeAssistant,
+        requests: int,
+        block_threshold_ms: float,
+        max_duration: float = PROFILE_MAX_DURATION,
+    ) -> None:
+        """Initialize the session."""
+        self._hass = hass
+        self.remaining = requests
+        self._threshold = block_threshold_ms / 1000
+        self._max_duration = max_duration
+        self.directory = Path(hass.config.path(PROFILE_DIRECTORY))
+        self._started = datetime.now().strftime("%Y%m%d-%H%M%S")
+        self._profiler: cProfile.Profile | None = None
+        self._profile_labels: list[str] = []
+        self._active = 0
+        self._profile_count = 0
+        self._blocking: list[dict[str, Any]] = []
+        self._heartbeat = time.monotonic()
+        self._snapshot: list[str] | None = None
+        self._loop_thread_id = threading.get_ident()
+        self._stop = threading.Event()
+        self._watchdog = threading.Thread(
+            target=self._watch, name="parasail_tts_profile_watchdog", daemon=True
+        )
+        self._unsub_stop = None
+        self._unsub_timeout = None
+        self._stopped = False
+        self._beat_handle: asyncio.Handle | None = None
+
+    @callback
+    def async_start(self) -> None:
+        """Install the session and start watching the event loop."""
+        self._hass.data[DATA_PROFILER] = self
+        self._beat_handle = self._hass.loop.call_soon(self._beat)
+        self._watchdog.start()
+        self._unsub_stop = self._hass.bus.async_listen_once(
+            EVENT_HOMEASSISTANT_STOP, self._async_on_stop
+        )
+        self._unsub_timeout = async_call_later(
+            self._hass, self._max_duration, self._async_on_timeout
+        )
+        _LOGGER.info(
+            "Profiling the next %d Parasail TTS requests into %s",
+            self.remaining,
+            self.directory,
+        )
+
+    @asynccontextmanager
+    async def async_profile(self, label: str) -> AsyncIterator[None]:
+        """Profile the wrapped request if the session still has requests left.
+
+        A request overlapping one that is already profiled joins its profile.
+        """
+        if self.remaining > 0:
+            self.remaining -= 1
+        elif not self._active:
+            yield
+            return
+
+        if not self._active:
+            self._profiler = cProfile.Profile()
+            self._profiler.enable()
+        self._active += 1
+        self._profile_labels.append(label)
+        try:
+            yield
+        finally:
+            self._active -= 1
+            if not self._active:
+                await self._async_dump_profile()
+                if self.remaining <= 0:
+                    await self.async_stop()
+
+    async def async_stop(self) -> None:
+        """Stop the session and write the blocking spans.
+
+        A profile still running is written as it is.
+        """
+        if self._stopped:
+            return
+        self._stopped = True
+        self.remaining = 0
+        if self._hass.data.get(DATA_PROFILER) is self:
+            del self._hass.data[DATA_PROFILER]
+        if self._unsub_stop is not None:
+            self._unsub_stop()
+            self._unsub_stop = None
+        if self._unsub_timeout is not None:
+            self._unsub_timeout()
+            self._unsub_timeout = None
+        self._stop.set()
+        if self._beat_handle is not None:
+            self._beat_handle.cancel()
+            self._beat_handle = None
+        await self._async_dump_profile()
+
+        path = self.directory / f"{self._started}_blocking.json"
+        await self._hass.async_add_executor_job(
+            _write_json, path, {"threshold_ms": self._threshold * 1000, "spans": self._blocking}
+        )
+        _LOGGER.info(
+            "Profiling finished: %d profiles and %d blocking spans written to %s",
+            self._profile_count,
+            len(self._blocking),
+            self.directory,
+        )
+
+    async def _async_on_stop(self, event: Event) -> None:
+        """Stop the session when Home Assistant stops."""
+        self._unsub_stop = None
+        await self.async_stop()
+
+    async def _async_on_timeout(self, now: datetime) -> None:
+        """Stop the session when it has run for its maximum duration."""
+        self._unsub_timeout = None
+        _LOGGER.info(
+            "Profiling stopped after %d seconds with %d requests left",
+            self._max_duration,
+            self.remaining,
+        )
+        await self.async_stop()
+
+    async def _async_dump_profile(self) -> None:
+        """Disable the profiler and write its stats."""
+        profiler, self._profiler = self._profiler, None
+        if profiler is None:
+            return
+        profiler.disable()
+        self._profile_count += 1
+        path = self.directory / f"{self._started}_{self._profile_count:03d}.prof"
+        labels, self._profile_labels = self._profile_labels, []
+        await self._hass.async_add_executor_job(_write_profile, profiler, path)
+        _LOGGER.debug("Wrote profile of %d requests to %s: %s", len(labels), path, labels)
+
+    def _beat(self) -> None:
+        """Record a heartbeat on the event loop and finish any blocking span."""
+        now = time.monotonic()
+        late = now - self._heartbeat - HEARTBEAT_INTERVAL
+        if late > self._threshold:
+            self._blocking.append(
+                {
+                    "at": datetime.now().isoformat(),
+                    "blocked_ms": round(late * 1000, 1),
+                    "stack": self._snapshot or [],
+                }
+            )
+        self._snapshot = None
+        self._heartbeat = now
+        if not self._stop.is_set():
+            self._beat_handle = self._hass.loop.call_later(HEARTBEAT_INTERVAL, self._beat)
+
+    def _watch(self) -> None:
+        """Snapshot the loop thread's stack while the heartbeat is late."""
+        while not self._stop.wait(HEARTBEAT_INTERVAL):
+            late = time.monotonic() - self._heartbeat - HEARTBEAT_INTERVAL
+            if late > self._threshold and self._snapshot is None:
+                if (frame := sys._current_frames().get(self._loop_thread_id)) is not None:
+                    self._snapshot = traceback.format_stack(frame)
+
+
+def _write_profile(profiler: cProfile.Profile, path: Path) -> None:
+    """Write profiler stats to disk."""
+    path.parent.mkdir(parents=True, exist_ok=True)
+    profiler.dump_stats(path)
+
+
+def _write_json(path: Path, data: Any) -> None:
+    """Write JSON data to disk."""
+    path.parent.mkdir(parents=True, exist_ok=True)
+    path.write_text(json.dumps(data, indent=2), encoding="utf-8")
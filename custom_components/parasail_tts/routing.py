@@ -0,0 +1,98 @@
+"""Per-language model and voice routing for Parasail TTS."""
+from __future__ import annotations
+
+from collections.abc import Mapping
+from dataclasses import dataclass
+from typing import Any
+
+from .const import (
+    CONF_LANGUAGE_VOICES,
+    CONF_MODEL,
+    CONF_VOICE,
+    DEFAULT_LANGUAGE,
+    DEFAULT_MODEL,
+    DEFAULT_VOICE,
+    PARASAIL_TTS_MODELS,
+)
+
+
+@dataclass(frozen=True, slots=True)
+class LanguageRoute:
+    """Model, endpoint and voice used for one language."""
+
+    language: str
+    model: str
+    url: str
+    voice: str
+
+
+def parse_language_voices(value: str) -> dict[str, str]:
+    """Parse a ``language=voice`` list such as ``"en=oai_nova, de=oai_echo"``.
+
+    Raises ``ValueError`` if an item is not of the form ``language=voice``.
+    """
+    language_voices: dict[str, str] = {}
+    for item in value.split(","):
+        if not (item := item.strip()):
+            continue
+        language, sep, voice = item.partition("=")
+        language, voice = language.strip(), voice.strip()
+        if not sep or not language or not voice:
+            raise ValueError(f"Expected language=voice, got {item!r}")
+        language_voices[language] = voice
+    return language_voices
+
+
+def _model_for_language(
+    language: str, preferred: str, models: Mapping[str, dict[str, Any]]
+) -> str:
+    """Return the preferred model if it supports the language, else the first that does."""
+    if language in models[preferred]["languages"]:
+        return preferred
+    for model, info in models.items():
+        if language in info["languages"]:
+            return model
+    return preferred
+
+
+def build_routes(
+    config: Mapping[str, Any],
+    models: Mapping[str, dict[str, Any]] = PARASAIL_TTS_MODELS,
+) -> dict[str, LanguageRoute]:
+    """Build the language routing table from entry options or data.
+
+    Every language of the configured model is routed to the configured
+    voice; ``language_voices`` adds languages or overrides their voice.
+    ``models`` is the model catalog, which defaults to the built-in one.
+    """
+    preferred = config.get(CONF_MODEL, DEFAULT_MODEL)
+    if preferred not in models:
+        preferred = DEFAULT_MODEL if DEFAULT_MODEL in models else next(iter(models))
+    voice = config.get(CONF_VOICE, DEFAULT_VOICE)
+
+    language_voices = {
+        language: voice for language in models[preferred]["languages"]
+    }
+    language_voices.update(parse_language_voices(config.get(CONF_LANGUAGE_VOICES, "")))
+
+    routes: dict[str, LanguageRoute] = {}
+    for language, language_voice in language_voices.items():
+        model = _model_for_language(language, preferred, models)
+        routes[language] = LanguageRoute(
+            language, model, models[model]["url"], language_voice
+        )
+
+    if not routes:
+        routes[DEFAULT_LANGUAGE] = LanguageRoute(
+            DEFAULT_LANGUAGE, preferred, models[preferred]["url"], voice
+        )
+    return routes
+
+
+def resolve_route(
+    routes: Mapping[str, LanguageRoute], language: str, default: LanguageRoute
+) -> LanguageRoute:
+    """Return the route for a language, falling back to its base language."""
+    if (route := routes.get(language)) is not None:
+        return route
+    return routes.get(language.split("-", 1)[0].split("_", 1)[0], default)
@@ -0,0 +1,156 @@
+"""Usage sensors of the Parasail TTS integration."""
+from __future__ import annotations
+
+from collections.abc import Callable
+from dataclasses import dataclass
+from typing import Any
+
+from homeassistant.components.sensor import (
+    SensorDeviceClass,
+    SensorEntity,
+    SensorEntityDescription,
+    SensorStateClass,
+)
+from homeassistant.config_entries import ConfigEntry
+from homeassistant.const import UnitOfTime
+from homeassistant.core import HomeAssistant, callback
+from homeassistant.helpers.dispatcher import async_dispatcher_connect
+from homeassistant.helpers.entity_platform import AddEntitiesCallback
+from homeassistant.helpers.event import async_track_time_change
+
+from .const import (
+    CONF_DAILY_QUOTA,
+    CONF_MODEL,
+    CONF_QUOTA_MODE,
+    DEFAULT_DAILY_QUOTA,
+    DEFAULT_MODEL,
+    DEFAULT_QUOTA_MODE,
+    SIGNAL_USAGE_UPDATED,
+    USAGE_RETENTION_DAYS,
+)
+from .usage import UsageCounters, UsageTracker, async_get_usage
+
+
+@dataclass(frozen=True, kw_only=True)
+class UsageSensorEntityDescription(SensorEntityDescription):
+    """Describe a usage sensor."""
+
+    value_fn: Callable[[UsageCounters], float]
+
+
+SENSORS = (
+    UsageSensorEntityDescription(
+        key="characters",
+        name="Characters today",
+        state_class=SensorStateClass.TOTAL_INCREASING,
+        value_fn=lambda usage: usage.characters,
+    ),
+    UsageSensorEntityDescription(
+        key="requests",
+        name="Requests today",
+        state_class=SensorStateClass.TOTAL_INCREASING,
+        value_fn=lambda usage: usage.requests,
+    ),
+    UsageSensorEntityDescription(
+        key="audio_seconds",
+        name="Audio today",
+        device_class=SensorDeviceClass.DURATION,
+        native_unit_of_measurement=UnitOfTime.SECONDS,
+        state_class=SensorStateClass.TOTAL_INCREASING,
+        suggested_display_precision=1,
+        value_fn=lambda usage: round(usage.audio_seconds, 3),
+    ),
+    UsageSensorEntityDescription(
+        key="cached_characters",
+        name="Characters saved by cache today",
+        state_class=SensorStateClass.TOTAL_INCREASING,
+        value_fn=lambda usage: usage.cached_characters,
+    ),
+)
+
+# Calling contexts listed in the attributes, busiest first
+MAX_CONTEXT_ATTRIBUTES = 10
+
+
+async def async_setup_entry(
+    hass: HomeAssistant,
+    config_entry: ConfigEntry,
+    async_add_entities: AddEntitiesCallback,
+) -> None:
+    """Set up the Parasail TTS usage sensors."""
+    usage = async_get_usage(hass, config_entry)
+    async_add_entities(
+        ParasailUsageSensor(config_entry, usage, description) for description in SENSORS
+    )
+
+
+class ParasailUsageSensor(SensorEntity):
+    """Sensor of one usage counter of a config entry, reset every day."""
+
+    _attr_should_poll = False
+    entity_description: UsageSensorEntityDescription
+
+    def __init__(
+        self,
+        config_entry: ConfigEntry,
+        usage: UsageTracker,
+        description: UsageSensorEntityDescription,
+    ) -> None:
+        """Initialize the sensor."""
+        self.entity_description = description
+        self._config_entry = config_entry
+        self._usage = usage
+        model = config_entry.data.get(CONF_MODEL, DEFAULT_MODEL)
+        self._attr_name = f"Parasail TTS {model} {description.name}"
+        self._attr_unique_id = f"{config_entry.entry_id}_{description.key}"
+
+    async def async_added_to_hass(self) -> None:
+        """Follow the usage counters."""
+        self.async_on_remove(
+            async_dispatcher_connect(
+                self.hass,
+                SIGNAL_USAGE_UPDATED.format(self._config_entry.entry_id),
+                self._async_usage_updated,
+            )
+        )
+        # The counters start over at local midnight, without a request to announce it
+        self.async_on_remove(
+            async_track_time_change(
+                self.hass, self._async_usage_updated, hour=0, minute=0, second=0
+            )
+        )
+
+    @callback
+    def _async_usage_updated(self, *_: Any) -> None:
+        """Write the new counts."""
+        self.async_write_ha_state()
+
+    @property
+    def native_value(self) -> float:
+        """Return today's count."""
+        return self.entity_description.value_fn(self._usage.today)
+
+    @property
+    def extra_state_attributes(self) -> dict[str, Any]:
+        """Return the count of the retention window and per calling context."""
+        contexts = sorted(
+            self._usage.contexts_today().items(),
+            key=lambda item: self.entity_description.value_fn(item[1]),
+            reverse=True,
+        )
+        attributes: dict[str, Any] = {
+            f"last_{USAGE_RETENTION_DAYS}_days": self.entity_description.value_fn(
+                self._usage.window()
+            ),
+            "contexts": {
+                context: self.entity_description.value_fn(counters)
+                for context, counters in contexts[:MAX_CONTEXT_ATTRIBUTES]
+            },
+        }
+        if self.entity_description.key == "characters":
+            config = self._config_entry.options or self._config_entry.data
+            attributes["daily_quota"] = config.get(CONF_DAILY_QUOTA, DEFAULT_DAILY_QUOTA)
+            attributes["quota_mode"] = config.get(CONF_QUOTA_MODE, DEFAULT_QUOTA_MODE)
+            attributes["quota_exceeded"] = self._usage.quota_exceeded
+            attributes["rejected_requests"] = self._usage.today.rejected_requests
+        return attributes
@@ -0,0 +1,455 @@
+"""Audio cache shared between several Home Assistant instances."""
+from __future__ import annotations
+
+from abc import ABC, abstractmethod
+import asyncio
+from collections.abc import Callable
+import logging
+import os
+from pathlib import Path
+import socket
+import tempfile
+import time
+from typing import Any
+
+from aiohttp import ClientError, ClientSession, ClientTimeout
+
+from homeassistant.core import HomeAssistant
+from homeassistant.helpers.aiohttp_client import async_get_clientsession
+
+from .codec import compress_audio, decompress_audio
+from .const import (
+    DATA_SHARED_CACHE,
+    FAILURE_FORMAT,
+    SHARED_CACHE_MAX_RETRY_INTERVAL,
+    SHARED_CACHE_RETRY_INTERVAL,
+    SHARED_CACHE_TIMEOUT,
+    SHARED_DIRECTORY_MAX_BYTES,
+    SHARED_FAILURE_TTL,
+    SHARED_LOCK_POLL_INTERVAL,
+    SHARED_LOCK_TTL,
+    SHARED_PRUNE_INTERVAL,
+)
+
+_LOGGER = logging.getLogger(__name__)
+
+LOCK_SUFFIX = ".lock"
+FAILURE_SUFFIX = ".failure"
+
+
+class SharedCacheBackend(ABC):
+    """Base class of a cache shared by several Home Assistant instances.
+
+    Keys are the ``cache_key`` of the request, which only depends on the
+    payload, model and processing, so every instance computes the same key
+    for the same phrase. A lock per key lets one instance synthesize a
+    phrase while the others wait for its result instead of calling the API
+    as well. A failure is stored for a few seconds under a key of its own,
+    and only read by the instances that were waiting for the result; the
+    next request for the phrase tries again.
+
+    Backends never raise; an unreachable backend behaves like an empty one.
+    """
+
+    @property
+    def available(self) -> bool:
+        """Return False while the backend is skipped after errors."""
+        return True
+
+    @abstractmethod
+    async def async_get(self, key: str) -> tuple[str, bytes] | None:
+        """Return the cached format and audio of a key."""
+
+    @abstractmethod
+    async def async_put(
+        self, key: str, audio_format: str, audio_data: bytes, ttl: float | None = None
+    ) -> None:
+        """Store audio under a key, expiring after ``ttl`` seconds if given."""
+
+    @abstractmethod
+    async def async_lock(self, key: str) -> bool:
+        """Take the lock of a key, returning False if another instance holds it."""
+
+    @abstractmethod
+    async def async_unlock(self, key: str) -> None:
+        """Release the lock of a key."""
+
+    @abstractmethod
+    async def async_is_locked(self, key: str) -> bool:
+        """Return True if an instance holds the lock of a key."""
+
+    async def async_footprint(self) -> dict[str, Any]:
+        """Return what the backend knows about its size."""
+        return {}
+
+    async def async_put_failure(self, key: str, message: str) -> None:
+        """Tell the instances waiting for a key that its request failed."""
+        await self.async_put(
+            key + FAILURE_SUFFIX, FAILURE_FORMAT, message.encode(), SHARED_FAILURE_TTL
+        )
+
+    async def async_wait(self, key: str, timeout: float) -> tuple[str, bytes] | None:
+        """Wait for the instance holding the lock of a key to store its result.
+
+        Returns a ``FAILURE_FORMAT`` entry if the request failed, and
+        ``None`` if the lock is released without a result, the timeout
+        passes or the backend becomes unavailable.
+        """
+        deadline = time.monotonic() + timeout
+        while time.monotonic() < deadline and self.available:
+            await asyncio.sleep(SHARED_LOCK_POLL_INTERVAL)
+            # Check the lock first, since the result is stored before unlocking
+            locked = await self.async_is_locked(key)
+            if (entry := await self.async_get(key)) is not None:
+                return entry
+            if not locked:
+                return await self.async_get(key + FAILURE_SUFFIX)
+        return None
+
+
+class FileCacheBackend(SharedCacheBackend):
+    """Shared cache in a directory, for example on a network share.
+
+    Every clip is a file named after its key, in a subdirectory named after
+    the first two characters of the key. Files are written to a temporary
+    name and renamed into place, so readers never see a partial file. Locks
+    are files created exclusively, and are broken once they are older than
+    ``SHARED_LOCK_TTL``, in case the instance holding them went away.
+
+    Expired files are deleted when they are read, and by a sweep that every
+    instance runs after its writes, at most every ``SHARED_PRUNE_INTERVAL``
+    seconds or as soon as the directory grows beyond ``max_bytes``. The
+    sweep also deletes the oldest clips until the directory is back under
+    90% of ``max_bytes``.
+    """
+
+    def __init__(
+        self,
+        hass: HomeAssistant,
+        directory: Path,
+        max_bytes: int = SHARED_DIRECTORY_MAX_BYTES,
+    ) -> None:
+        """Initialize the backend."""
+        self._hass = hass
+        self.directory = directory
+        self._max_bytes = max_bytes
+        # Bytes in the directory as of the last sweep, plus what was written since
+        self._size: int | None = None
+        self._pruned_at = 0.0
+        self._pruning = False
+
+    def _path(self, key: str) -> Path:
+        """Return the path of a key."""
+        return self.directory / key[:2] / key
+
+    async def async_get(self, key: str) -> tuple[str, bytes] | None:
+        """Return the cached format and audio of a key."""
+        return await self._async_run(_read_entry, self._path(key))
+
+    async def async_put(
+        self, key: str, audio_format: str, audio_data: bytes, ttl: float | None = None
+    ) -> None:
+        """Store audio under a key, expiring after ``ttl`` seconds if given."""
+        expires = time.time() + ttl if ttl else 0
+        header = f"{audio_format} {expires:.0f}\n".encode()
+        if (written := await self._async_run(_write_entry, self._path(key), header, audio_data)):
+            if self._size is not None:
+                self._size += written
+            await self._async_prune()
+
+    async def _async_prune(self) -> None:
+        """Sweep the directory when it is due or has grown beyond its size."""
+        if self._pruning or (
+            self._size is not None
+            and self._size <= self._max_bytes
+            and time.monotonic() - self._pruned_at < SHARED_PRUNE_INTERVAL
+        ):
+            return
+        self._pruning = True
+        self._pruned_at = time.monotonic()
+        try:
+            self._size = await self._async_run(_prune_directory, self.directory, self._max_bytes)
+        finally:
+            self._pruning = False
+
+    async def async_lock(self, key: str) -> bool:
+        """Take the lock of a key, returning False if another instance holds it."""
+        return bool(await self._async_run(_create_lock, self._path(key + LOCK_SUFFIX)))
+
+    async def async_unlock(self, key: str) -> None:
+        """Release the lock of a key."""
+        await self._async_run(_remove, self._path(key + LOCK_SUFFIX))
+
+    async def async_is_locked(self, key: str) -> bool:
+        """Return True if an instance holds the lock of a key."""
+        return bool(await self._async_run(_lock_held, self._path(key + LOCK_SUFFIX)))
+
+    async def async_footprint(self) -> dict[str, Any]:
+        """Return the entries and bytes stored in the directory."""
+        return await self._async_run(_directory_footprint, self.directory) or {}
+
+    async def _async_run(
+        self, target: Callable[..., Any], path: Path, *args: Any
+    ) -> Any:
+        """Run a file operation in the executor, treating errors as a miss."""
+        try:
+            return await self._hass.async_add_executor_job(target, path, *args)
+        except (OSError, ValueError) as err:
+            _LOGGER.debug("Shared cache operation on %s failed: %s", path, err)
+            return None
+
+
+def _expired(header: bytes) -> bool:
+    """Return True if the header of a cache file has an expiry in the past."""
+    expires = float(header.decode().partition(" ")[2] or 0)
+    return bool(expires) and expires < time.time()
+
+
+def _read_entry(path: Path) -> tuple[str, bytes] | None:
+    """Read a cache file, deleting it once expired."""
+    try:
+        raw = path.read_bytes()
+    except FileNotFoundError:
+        return None
+    header, _, data = raw.partition(b"\n")
+    if _expired(header):
+        _remove(path)
+        return None
+    return header.decode().partition(" ")[0], decompress_audio(data)
+
+
+def _write_entry(path: Path, header: bytes, audio_data: bytes) -> int:
+    """Compress a clip, write it as a cache file and return its size."""
+    data = header + compress_audio(audio_data)
+    _write_atomic(path, data)
+    return len(data)
+
+
+def _write_atomic(path: Path, data: bytes) -> None:
+    """Write a file under a temporary name and rename it into place."""
+    path.parent.mkdir(parents=True, exist_ok=True)
+    fd, temporary = tempfile.mkstemp(dir=path.parent, prefix=".tmp-")
+    try:
+        with os.fdopen(fd, "wb") as file:
+            file.write(data)
+        os.replace(temporary, path)
+    except BaseException:
+        os.unlink(temporary)
+        raise
+
+
+def _create_lock(path: Path) -> bool:
+    """Create a lock file exclusively, breaking it if it is stale."""
+    path.parent.mkdir(parents=True, exist_ok=True)
+    for _ in range(2):
+        try:
+            fd = os.open(path, os.O_CREAT | os.O_EXCL | os.O_WRONLY)
+        except FileExistsError:
+            if _lock_held(path):
+                return False
+            _remove(path)
+            continue
+        with os.fdopen(fd, "w") as file:
+            file.write(f"{socket.gethostname()} {os.getpid()}\n")
+        return True
+    return False
+
+
+def _lock_held(path: Path) -> bool:
+    """Return True if a lock file exists and is not stale."""
+    try:
+        return time.time() - path.stat().st_mtime < SHARED_LOCK_TTL
+    except FileNotFoundError:
+        return False
+
+
+def _remove(path: Path) -> None:
+    """Remove a file if it exists."""
+    path.unlink(missing_ok=True)
+
+
+def _prune_directory(directory: Path, max_bytes: int) -> int:
+    """Delete expired and abandoned files, then the oldest clips beyond the size.
+
+    Returns the bytes left in the directory.
+    """
+    now = time.time()
+    clips: list[tuple[float, int, Path]] = []
+    size = 0
+    for path in directory.glob("*/*"):
+        try:
+            stat = path.stat()
+            if path.name.startswith(".") or path.name.endswith(LOCK_SUFFIX):
+                # Temporary files of a crashed writer and stale locks
+                if now - stat.st_mtime >= SHARED_LOCK_TTL:
+                    _remove(path)
+                continue
+            with path.open("rb") as file:
+                expired = _expired(file.readline())
+        except (FileNotFoundError, ValueError):
+            continue
+        if expired:
+            _remove(path)
+            continue
+        clips.append((stat.st_mtime, stat.st_size, path))
+        size += stat.st_size
+
+    if size > max_bytes:
+        clips.sort()
+        for _, clip_size, path in clips:
+            if size <= max_bytes * 0.9:
+                break
+            _remove(path)
+            size -= clip_size
+    return size
+
+
+def _directory_footprint(directory: Path) -> dict[str, Any]:
+    """Count the cache files in a directory and their size on disk."""
+    entries = 0
+    size = 0
+    for path in directory.glob("*/*"):
+        if path.name.startswith(".") or path.name.endswith(LOCK_SUFFIX):
+            continue
+        try:
+            size += path.stat().st_size
+        except FileNotFoundError:
+            continue
+        entries += 1
+    return {"directory": str(directory), "entries": entries, "bytes": size}
+
+
+class HttpCacheBackend(SharedCacheBackend):
+    """Shared cache on a key-value server, such as ``tools/cache_server.py``.
+
+    Entries are read and written with ``GET`` and ``PUT`` on
+    ``<url>/cache/<key>``, with the audio format in the ``X-Audio-Format``
+    header and an optional lifetime in ``X-TTL``. Locks are entries created
+    with ``If-None-Match: *``, which the server refuses if they exist.
+
+    A server that is down would cost every request a timeout for each of
+    its reads and writes, so after a failed request the server is skipped
+    for ``SHARED_CACHE_RETRY_INTERVAL`` seconds, doubling while it keeps
+    failing, and the instance synthesizes on its own in the meantime.
+    """
+
+    def __init__(self, session: ClientSession, url: str) -> None:
+        """Initialize the backend."""
+        self._session = session
+        self._url = url.rstrip("/")
+        self._timeout = ClientTimeout(total=SHARED_CACHE_TIMEOUT)
+        self._retry_interval = 0.0
+        self._retry_at = 0.0
+
+    @property
+    def available(self) -> bool:
+        """Return False while the server is skipped after errors."""
+        return time.monotonic() >= self._retry_at
+
+    def _succeeded(self) -> None:
+        """Reset the backoff after a request the server answered."""
+        if self._retry_interval:
+            _LOGGER.info("Shared cache at %s is reachable again", self._url)
+            self._retry_interval = 0.0
+
+    def _failed(self, action: str, key: str, err: Exception) -> None:
+        """Skip the server for a while after a request that failed."""
+        if not self.available:
+            # Another request was already under way when the server went down
+            return
+        self._retry_interval = min(
+            self._retry_interval * 2 or SHARED_CACHE_RETRY_INTERVAL,
+            SHARED_CACHE_MAX_RETRY_INTERVAL,
+        )
+        self._retry_at = time.monotonic() + self._retry_interval
+        _LOGGER.warning(
+            "Shared cache %s of %s failed, skipping %s for %.0f seconds: %s",
+            action,
+            key,
+            self._url,
+            self._retry_interval,
+            err,
+        )
+
+    async def async_get(self, key: str) -> tuple[str, bytes] | None:
+        """Return the cached format and audio of a key."""
+        if not self.available:
+            return None
+        try:
+            async with self._session.get(
+                f"{self._url}/cache/{key}", timeout=self._timeout
+            ) as response:
+                self._succeeded()
+                if response.status != 200:
+                    return None
+                return response.headers.get("X-Audio-Format", "wav"), await response.read()
+        except (ClientError, asyncio.TimeoutError) as err:
+            self._failed("read", key, err)
+            return None
+
+    async def async_put(
+        self, key: str, audio_format: str, audio_data: bytes, ttl: float | None = None
+    ) -> None:
+        """Store audio under a key, expiring after ``ttl`` seconds if given."""
+        headers = {"X-Audio-Format": audio_format}
+        if ttl:
+            headers["X-TTL"] = str(ttl)
+        await self._async_put(key, audio_data, headers)
+
+    async def async_lock(self, key: str) -> bool:
+        """Take the lock of a key, returning False if another instance holds it."""
+        return await self._async_put(
+            key + LOCK_SUFFIX,
+            socket.gethostname().encode(),
+            {"If-None-Match": "*", "X-TTL": str(SHARED_LOCK_TTL)},
+        )
+
+    async def async_unlock(self, key: str) -> None:
+        """Release the lock of a key."""
+        if not self.available:
+            # The lock expires on the server after SHARED_LOCK_TTL
+            return
+        try:
+            async with self._session.delete(
+                f"{self._url}/cache/{key}{LOCK_SUFFIX}", timeout=self._timeout
+            ):
+                self._succeeded()
+        except (ClientError, asyncio.TimeoutError) as err:
+            self._failed("unlock", key, err)
+
+    async def async_is_locked(self, key: str) -> bool:
+        """Return True if an instance holds the lock of a key."""
+        return await self.async_get(key + LOCK_SUFFIX) is not None
+
+    async def _async_put(self, key: str, data: bytes, headers: dict[str, str]) -> bool:
+        """Store data under a key and return True if the server accepted it."""
+        if not self.available:
+            return False
+        try:
+            async with self._session.put(
+                f"{self._url}/cache/{key}", data=data, headers=headers, timeout=self._timeout
+            ) as response:
+                self._succeeded()
+                return response.status < 300
+        except (ClientError, asyncio.TimeoutError) as err:
+            self._failed("write", key, err)
+            return False
+
+
+def async_get_shared_cache(
+    hass: HomeAssistant, location: str
+) -> SharedCacheBackend | None:
+    """Return the shared cache at a directory or URL, or None if not configured.
+
+    Config entries using the same location share one backend.
+    """
+    if not location:
+        return None
+    backends: dict[str, SharedCacheBackend] = hass.data.setdefault(DATA_SHARED_CACHE, {})
+    if (backend := backends.get(location)) is None:
+        if location.startswith(("http://", "https://")):
+            backend = HttpCacheBackend(async_get_clientsession(hass), location)
+        else:
+            backend = FileCacheBackend(hass, Path(hass.config.path(location)))
+        backends[location] = backend
+    return backend
@@ -0,0 +1,145 @@
+"""Server-Sent Events (SSE) parsing for the Parasail TTS stream."""
+from __future__ import annotations
+
+from collections.abc import AsyncIterator
+import json
+import logging
+from typing import Any
+
+_LOGGER = logging.getLogger(__name__)
+
+# Bounds for the adaptive read size. The lower bound matches the previous
+# fixed read size; the upper bound caps how much a single read may pull
+# out of the aiohttp buffer.
+MIN_READ_SIZE = 4096
+MAX_READ_SIZE = 1 << 20
+
+_DATA_PREFIX = b"data:"
+
+
+class SSEParser:
+    """Incremental parser turning raw SSE bytes into decoded JSON events.
+
+    Each ``data:`` line is treated as one complete event, which is how the
+    Parasail endpoint frames its responses. Bytes are accumulated in a
+    ``bytearray`` and scanned for newlines only from where the previous scan
+    stopped, so a multi-megabyte line costs linear time no matter how many
+    reads it arrives in.
+    """
+
+    __slots__ = ("_buffer", "_scan_from", "events", "bytes_fed")
+
+    def __init__(self) -> None:
+        """Initialize the parser."""
+        self._buffer = bytearray()
+        self._scan_from = 0
+        self.events = 0
+        self.bytes_fed = 0
+
+    @property
+    def pending(self) -> int:
+        """Return the number of buffered bytes not yet forming a full line."""
+        return len(self._buffer)
+
+    def feed(self, data: bytes) -> list[dict[str, Any]]:
+        """Feed raw bytes and return the events completed by them."""
+        self.bytes_fed += len(data)
+        buffer = self._buffer
+        buffer += data
+
+        events: list[dict[str, Any]] = []
+        start = 0
+        newline = buffer.find(b"\n", self._scan_from)
+        while newline != -1:
+            self._parse_line(bytes(buffer[start:newline]), events)
+            start = newline + 1
+            newline = buffer.find(b"\n", start)
+
+        if start:
+            del buffer[:start]
+        self._scan_from = len(buffer)
+        return events
+
+    def flush(self) -> list[dict[str, Any]]:
+        """Parse whatever is left once the stream has ended."""
+        events: list[dict[str, Any]] = []
+        if self._buffer:
+            self._parse_line(bytes(self._buffer), events)
+            self._buffer.clear()
+        self._scan_from = 0
+        return events
+
+    def _parse_line(self, line: bytes, events: list[dict[str, Any]]) -> None:
+        """Parse a single SSE line and append its event, if any."""
+        line = line.strip()
+        if not line.startswith(_DATA_PREFIX):
+            return
+
+        try:
+            event = json.loads(line[len(_DATA_PREFIX):])
+        except (json.JSONDecodeError, UnicodeDecodeError) as err:
+            _LOGGER.warning("Failed to parse SSE event JSON: %s", err)
+            return
+
+        if isinstance(event, dict):
+            self.events += 1
+            events.append(event)
+
+
+class AdaptiveReadSize:
+    """Grow the read size from observed event sizes and throughput.
+
+    The size starts at ``MIN_READ_SIZE`` and doubles whenever a read comes
+    back completely full (more data was already waiting) or a single event
+    is larger than the current size. It never exceeds ``MAX_READ_SIZE``.
+    """
+
+    __slots__ = ("size", "maximum")
+
+    def __init__(
+        self, initial: int = MIN_READ_SIZE, maximum: int = MAX_READ_SIZE
+    ) -> None:
+        """Initialize the controller."""
+        self.size = initial
+        self.maximum = maximum
+
+    def observe(self, received: int, pending: int) -> None:
+        """Update the size after a read of ``received`` bytes.
+
+        ``pending`` is the length of the partial line still held by the
+        parser, which is a lower bound on the size of the event in flight.
+        """
+        size = self.size
+        if received >= size:
+            size <<= 1
+        while size < pending and size < self.maximum:
+            size <<= 1
+        self.size = min(size, self.maximum)
+
+
+async def async_iter_events(
+    content: Any, read_size: AdaptiveReadSize | None = None
+) -> AsyncIterator[dict[str, Any]]:
+    """Yield decoded SSE events from an aiohttp ``StreamReader``.
+
+    Nothing is read ahead of the consumer: the next read is only issued once
+    the caller asks for the next event. A slow consumer therefore lets the
+    aiohttp buffer fill up, at which point aiohttp pauses the transport and
+    the backpressure reaches the server through TCP flow control.
+    """
+    parser = SSEParser()
+    if read_size is None:
+        read_size = AdaptiveReadSize()
+
+    while True:
+        chunk = await content.read(read_size.size)
+        if not chunk:
+            break
+
+        events = parser.feed(chunk)
+        read_size.observe(len(chunk), parser.pending)
+        for event in events:
+            yield event
+
+    for event in parser.flush():
+        yield event
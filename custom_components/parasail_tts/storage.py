@@ -0,0 +1,500 @@
+"""Disk tier of the audio cache, read and written without blocking the event loop."""
+from __future__ import annotations
+
+import asyncio
+from collections import OrderedDict
+from collections.abc import Awaitable, Callable
+import contextlib
+import logging
+import os
+from pathlib import Path
+import re
+import struct
+import time
+from typing import Any
+import zlib
+
+from homeassistant.const import EVENT_HOMEASSISTANT_FINAL_WRITE
+from homeassistant.core import CALLBACK_TYPE, Event, HomeAssistant, callback
+
+from .cache import async_get_cache
+from .codec import compress_audio, decompress_audio
+from .const import (
+    DATA_DISK_STORE,
+    DISK_COMMIT_INTERVAL,
+    DISK_READ_AHEAD_BYTES,
+    DISK_READ_AHEAD_MAX_BYTES,
+    DISK_RETRY_INTERVAL,
+    DISK_SEGMENT_BYTES,
+    DISK_SNAPSHOT_FILE,
+    DISK_SNAPSHOT_INTERVAL,
+    DISK_STORE_DIRECTORY,
+    DISK_STORE_MAX_BYTES,
+    DISK_WRITE_BATCH,
+    DISK_WRITE_QUEUE,
+)
+from .index import DiskIndex, key_digest
+
+_LOGGER = logging.getLogger(__name__)
+
+# Record header: magic, CRC-32 of the rest, key, format and data lengths
+RECORD = struct.Struct("<4sIHHI")
+RECORD_MAGIC = b"PTS1"
+SEGMENT_PATTERN = re.compile(r"^segment-(\d{6})\.log$")
+
+
+class DiskStore:
+    """Append-only store of audio clips on local disk.
+
+    The event loop never touches the disk. ``put`` only queues a clip, and
+    a background task writes what was queued within the commit interval
+    as one batch in the executor: appended to the current segment with a
+    single fsync, so a burst of clips costs one flush of an SD card instead
+    of one per clip. Clips waiting to be written are served from memory.
+
+    Reads run in the executor and read ``DISK_READ_AHEAD_BYTES`` at once.
+    The clips written next to the requested one, usually sentences of the
+    same reply or messages of the same batch, are decoded in the same job
+    and kept in memory for the requests that follow.
+
+    When the queue is full because the disk is slower than the clips
+    arrive, or when writing fails, the store switches to memory-only mode
+    and drops new clips instead of making anyone wait. It switches back
+    once the queue drained, or ``DISK_RETRY_INTERVAL`` after an error.
+    Segments are rotated at ``DISK_SEGMENT_BYTES``, and the oldest are
+    deleted once the store grows beyond ``max_bytes``.
+
+    The index is kept in memory and saved as a snapshot every
+    ``DISK_SNAPSHOT_INTERVAL`` seconds and on shutdown. At startup it is
+    loaded from the snapshot in the background, and only the records
+    written after the snapshot are scanned.
+    """
+
+    def __init__(
+        self,
+        hass: HomeAssistant,
+        directory: Path,
+        max_bytes: int = DISK_STORE_MAX_BYTES,
+        queue_size: int = DISK_WRITE_QUEUE,
+        commit_interval: float = DISK_COMMIT_INTERVAL,
+    ) -> None:
+        """Initialize the store."""
+        self._hass = hass
+        self.directory = directory
+        self._max_bytes = max_bytes
+        self._commit_interval = commit_interval
+        self._index = DiskIndex()
+        self._segments: dict[int, int] = {}
+        self._segment = 1
+        self._pending: dict[str, tuple[str, bytes]] = {}
+        self._queue: asyncio.Queue[str | None] = asyncio.Queue(queue_size)
+        self._wake = asyncio.Event()
+        self._read_ahead: OrderedDict[tuple[int, int], tuple[str, bytes]] = OrderedDict()
+        self._read_ahead_size = 0
+        self._writer: asyncio.Task[None] | None = None
+        self._job: asyncio.Future[Any] | None = None
+        self._unsub_final_write: CALLBACK_TYPE | None = None
+        self._closing = False
+        self._retry_at = 0.0
+        self._snapshot_at = 0.0
+        self._dirty = False
+        self.users = 0
+        self.loaded = False
+        self.memory_only = False
+        self.stats = {
+            "writes": 0,
+            "batches": 0,
+            "dropped": 0,
+            "reads": 0,
+            "read_ahead_hits": 0,
+            "errors": 0,
+        }
+
+    def __contains__(self, key: str) -> bool:
+        """Return True if the key is on disk or queued to be written."""
+        return key in self._pending or key_digest(key) in self._index
+
+    @callback
+    def async_start(self) -> None:
+        """Index the segments and start writing, in the background."""
+        self._unsub_final_write = self._hass.bus.async_listen_once(
+            EVENT_HOMEASSISTANT_FINAL_WRITE, self._async_final_write
+        )
+        self._writer = self._hass.async_create_background_task(
+            self._async_run(), "parasail_tts disk store"
+        )
+
+    async def async_close(self) -> None:
+        """Write what is still queued and stop the writer."""
+        self._closing = True
+        if self._unsub_final_write is not None:
+            self._unsub_final_write()
+            self._unsub_final_write = None
+        if self._writer is not None:
+            self._writer.cancel()
+            await asyncio.wait([self._writer])
+            self._writer = None
+        # A job running when the writer was cancelled still finishes
+        if self._job is not None:
+            await asyncio.wait([self._job])
+        if self.loaded and not self.memory_only and self._pending:
+            await self._async_write(list(self._pending))
+        if self._dirty:
+            await self._async_save_snapshot()
+
+    @callback
+    def put(self, key: str, audio_format: str, audio_data: bytes) -> None:
+        """Queue a clip to be written, or drop it in memory-only mode."""
+        if self.memory_only and self._retry_at and time.monotonic() >= self._retry_at:
+            self.memory_only = False
+            self._retry_at = 0.0
+        if self.memory_only or self._closing:
+            self.stats["dropped"] += 1
+            return
+        if key not in self._pending:
+            try:
+                self._queue.put_nowait(key)
+            except asyncio.QueueFull:
+                self.memory_only = True
+                self.stats["dropped"] += 1
+                _LOGGER.warning(
+                    "Disk cache in %s cannot keep up, keeping new clips in memory only",
+                    self.directory,
+                )
+                return
+            if self._queue.qsize() >= DISK_WRITE_BATCH:
+                self._wake.set()
+        self._pending[key] = (audio_format, audio_data)
+
+    async def async_get(self, key: str) -> tuple[str, bytes] | None:
+        """Return the format and audio of a clip, reading ahead of it."""
+        if (entry := self._pending.get(key)) is not None:
+            return entry
+        if (location := self._index.get(key_digest(key))) is None:
+            return None
+        place = (location.segment, location.offset)
+        if (entry := self._read_ahead.pop(place, None)) is not None:
+            self._read_ahead_size -= len(entry[1])
+            self.stats["read_ahead_hits"] += 1
+            return entry
+
+        self.stats["reads"] += 1
+        try:
+            records = await self._hass.async_add_executor_job(
+                _read_records,
+                self._path(location.segment),
+                location.offset,
+                max(location.length, DISK_READ_AHEAD_BYTES),
+            )
+        except (OSError, ValueError) as err:
+            _LOGGER.debug("Reading %s from the disk cache failed: %s", key, err)
+            return None
+
+        entry = None
+        for offset, record_key, record in records:
+            if offset == location.offset:
+                entry = record
+                continue
+            # Keep the neighbours that are still the current version of their key
+            other = self._index.get(key_digest(record_key))
+            if other is None or (other.segment, other.offset) != (location.segment, offset):
+                continue
+            self._read_ahead[(location.segment, offset)] = record
+            self._read_ahead_size += len(record[1])
+        while self._read_ahead_size > DISK_READ_AHEAD_MAX_BYTES:
+            self._read_ahead_size -= len(self._read_ahead.popitem(last=False)[1][1])
+        return entry
+
+    def footprint(self) -> dict[str, Any]:
+        """Return the size of the store and its counters."""
+        return {
+            "entries": len(self._index),
+            "index_bytes": self._index.nbytes,
+            "segments": len(self._segments),
+            "bytes": sum(self._segments.values()),
+            "max_bytes": self._max_bytes,
+            "queued": len(self._pending),
+            "memory_only": self.memory_only,
+            **self.stats,
+        }
+
+    async def _async_run(self) -> None:
+        """Load the index, then write queued clips in batches."""
+        try:
+            self._index, self._segments, self._dirty = (
+                await self._hass.async_add_executor_job(_load_index, self.directory)
+            )
+        except OSError as err:
+            self._async_failed(err)
+        self._snapshot_at = time.monotonic()
+        # Never append after a torn record left by a crash
+        self._segment = max(self._segments, default=0) + 1
+        self.loaded = True
+
+        while True:
+            key = await self._queue.get()
+            if key is None:
+                continue
+            if self._queue.qsize() < DISK_WRITE_BATCH - 1:
+                # Group commit: what arrives meanwhile shares the batch and its fsync
+                self._wake.clear()
+                with contextlib.suppress(TimeoutError):
+                    await asyncio.wait_for(self._wake.wait(), self._commit_interval)
+            keys = [key]
+            while len(keys) < DISK_WRITE_BATCH and not self._queue.empty():
+                if (key := self._queue.get_nowait()) is not None:
+                    keys.append(key)
+            await self._async_write(keys)
+            if self._dirty and time.monotonic() - self._snapshot_at >= DISK_SNAPSHOT_INTERVAL:
+                await self._async_save_snapshot()
+            if self.memory_only and not self._retry_at and self._queue.empty():
+                self.memory_only = False
+                _LOGGER.info("Disk cache in %s caught up", self.directory)
+
+    async def _async_write(self, keys: list[str]) -> None:
+        """Append the clips of some keys to the current segment."""
+        items = [(key, *self._pending[key]) for key in keys if key in self._pending]
+        if not items or self.memory_only and self._retry_at:
+            return
+        if self._segments.get(self._segment, 0) >= DISK_SEGMENT_BYTES:
+            self._segment += 1
+        segment = self._segment
+
+        self._job = self._hass.async_add_executor_job(
+            _append_records, self._path(segment), items
+        )
+        try:
+            locations = await self._job
+        except OSError as err:
+            self._async_failed(err)
+            return
+        finally:
+            self._job = None
+
+        self._dirty = True
+        for (key, audio_format, audio_data), (offset, length) in zip(items, locations):
+            self._index.add(key_digest(key), segment, offset, length)
+            self._segments[segment] = offset + length
+            pending = self._pending.get(key)
+            if pending is None:
+                continue
+            if pending[1] is audio_data:
+                del self._pending[key]
+            else:
+                # Replaced while being written; write the new clip as well
+                try:
+                    self._queue.put_nowait(key)
+                except asyncio.QueueFull:
+                    del self._pending[key]
+        self.stats["writes"] += len(items)
+        self.stats["batches"] += 1
+        await self._async_trim()
+
+    async def _async_trim(self) -> None:
+        """Delete the oldest segments while the store is too large."""
+        while sum(self._segments.values()) > self._max_bytes and len(self._segments) > 1:
+            oldest = min(self._segments)
+            del self._segments[oldest]
+            self._index.remove_segment(oldest)
+            try:
+                await self._hass.async_add_executor_job(self._path(oldest).unlink)
+            except OSError as err:
+                _LOGGER.debug("Deleting disk cache segment %d failed: %s", oldest, err)
+
+    async def _async_save_snapshot(self) -> None:
+        """Save the index with the segment sizes it covers."""
+        self._dirty = False
+        self._snapshot_at = time.monotonic()
+        self._job = self._hass.async_add_executor_job(
+            _write_snapshot,
+            self.directory / DISK_SNAPSHOT_FILE,
+            self._index.to_snapshot(self._segments),
+        )
+        try:
+            await self._job
+        except OSError as err:
+            _LOGGER.debug("Saving the disk cache index failed: %s", err)
+        finally:
+            self._job = None
+
+    @callback
+    def _async_failed(self, err: OSError) -> None:
+        """Switch to memory-only mode for a while after a disk error."""
+        self.stats["errors"] += 1
+        self.stats["dropped"] += len(self._pending)
+        self._pending.clear()
+        while not self._queue.empty():
+            self._queue.get_nowait()
+        self.memory_only = True
+        self._retry_at = time.monotonic() + DISK_RETRY_INTERVAL
+        _LOGGER.warning(
+            "Disk cache in %s failed, keeping new clips in memory only for %d seconds: %s",
+            self.directory,
+            DISK_RETRY_INTERVAL,
+            err,
+        )
+
+    async def _async_final_write(self, event: Event) -> None:
+        """Write what is still queued before Home Assistant stops."""
+        self._unsub_final_write = None
+        await self.async_close()
+
+    def _path(self, segment: int) -> Path:
+        """Return the path of a segment."""
+        return self.directory / f"segment-{segment:06d}.log"
+
+
+def _encode_record(key: str, audio_format: str, audio_data: bytes) -> bytes:
+    """Return a record, with the audio compressed when that makes it smaller."""
+    if len(compressed := compress_audio(audio_data)) < len(audio_data):
+        audio_data = compressed
+    key_bytes = key.encode()
+    format_bytes = audio_format.encode()
+    body = key_bytes + format_bytes + audio_data
+    return RECORD.pack(
+        RECORD_MAGIC, zlib.crc32(body), len(key_bytes), len(format_bytes), len(audio_data)
+    ) + body
+
+
+def _append_records(
+    path: Path, items: list[tuple[str, str, bytes]]
+) -> list[tuple[int, int]]:
+    """Append records with a single write and fsync, returning their offsets and lengths."""
+    records = [_encode_record(*item) for item in items]
+    path.parent.mkdir(parents=True, exist_ok=True)
+    with path.open("ab") as file:
+        offset = file.tell()
+        file.write(b"".join(records))
+        file.flush()
+        os.fsync(file.fileno())
+    locations = []
+    for record in records:
+        locations.append((offset, len(record)))
+        offset += len(record)
+    return locations
+
+
+def _read_records(
+    path: Path, offset: int, size: int
+) -> list[tuple[int, str, tuple[str, bytes]]]:
+    """Read and decode the complete records within ``size`` bytes from an offset."""
+    with path.open("rb") as file:
+        file.seek(offset)
+        block = file.read(size)
+
+    records = []
+    position = 0
+    while position + RECORD.size <= len(block):
+        magic, crc, key_size, format_size, data_size = RECORD.unpack_from(block, position)
+        start = position + RECORD.size
+        end = start + key_size + format_size + data_size
+        if magic != RECORD_MAGIC or end > len(block):
+            break
+        body = block[start:end]
+        if zlib.crc32(body) != crc:
+            if not position:
+                raise ValueError(f"Corrupt record at {offset} in {path.name}")
+            break
+        key = body[:key_size].decode()
+        audio_format = body[key_size:key_size + format_size].decode()
+        audio_data = decompress_audio(body[key_size + format_size:])
+        records.append((offset + position, key, (audio_format, audio_data)))
+        position = end
+    return records
+
+
+def _scan_segment(path: Path, number: int, start: int, index: DiskIndex) -> int:
+    """Index the records of a segment from an offset, reading only headers and keys.
+
+    Returns the offset after the last complete record.
+    """
+    size = path.stat().st_size
+    offset = start
+    with path.open("rb") as file:
+        file.seek(offset)
+        while len(header := file.read(RECORD.size)) == RECORD.size:
+            magic, _, key_size, format_size, data_size = RECORD.unpack(header)
+            length = RECORD.size + key_size + format_size + data_size
+            if magic != RECORD_MAGIC or offset + length > size:
+                break
+            index.add(key_digest(file.read(key_size).decode()), number, offset, length)
+            offset += length
+            file.seek(offset)
+    return offset
+
+
+def _load_index(directory: Path) -> tuple[DiskIndex, dict[int, int], bool]:
+    """Load the index from its snapshot and scan what was written after it.
+
+    Returns the index, the segment sizes and whether the snapshot is out of date.
+    """
+    directory.mkdir(parents=True, exist_ok=True)
+    files = {
+        int(match[1]): path
+        for path in directory.iterdir()
+        if (match := SEGMENT_PATTERN.match(path.name)) is not None
+    }
+    index, known = DiskIndex(), {}
+    try:
+        loaded = DiskIndex.from_snapshot((directory / DISK_SNAPSHOT_FILE).read_bytes())
+    except OSError:
+        loaded = None
+    if loaded is not None:
+        index, known = loaded
+
+    dirty = False
+    for number in known.keys() - files.keys():
+        index.remove_segment(number)
+        dirty = True
+    segments = {}
+    for number in sorted(files):
+        size = files[number].stat().st_size
+        start = known.get(number, 0)
+        if start > size:
+            # Shorter than when the snapshot was taken; index it again
+            index.remove_segment(number)
+            start = 0
+        if start != size:
+            _scan_segment(files[number], number, start, index)
+            dirty = True
+        segments[number] = size
+    return index, segments, dirty
+
+
+def _write_snapshot(path: Path, snapshot: bytes) -> None:
+    """Replace a snapshot file atomically."""
+    temporary = path.with_suffix(".tmp")
+    with temporary.open("wb") as file:
+        file.write(snapshot)
+        file.flush()
+        os.fsync(file.fileno())
+    os.replace(temporary, path)
+
+
+@callback
+def async_attach_disk_store(hass: HomeAssistant) -> Callable[[], Awaitable[None]]:
+    """Add the disk tier to the audio cache on behalf of a config entry.
+
+    The store is shared by the entries that enable it and closed when the
+    last of them is unloaded. Returns the function that detaches it again.
+    """
+    if (store := hass.data.get(DATA_DISK_STORE)) is None:
+        store = hass.data[DATA_DISK_STORE] = DiskStore(
+            hass, Path(hass.config.path(DISK_STORE_DIRECTORY))
+        )
+        store.async_start()
+        async_get_cache(hass).disk = store
+    store.users += 1
+
+    async def async_detach() -> None:
+        """Detach and close the store once no entry uses it."""
+        store.users -= 1
+        if store.users:
+            return
+        if hass.data.get(DATA_DISK_STORE) is store:
+            del hass.data[DATA_DISK_STORE]
+        if (cache := async_get_cache(hass)).disk is store:
+            cache.disk = None
+        await store.async_close()
+
+    return async_detach
@@ -0,0 +1,119 @@
+"""Sentence buffering and pipelined synthesis of streamed text."""
+from __future__ import annotations
+
+import asyncio
+from collections.abc import AsyncIterable, AsyncIterator, Callable
+import re
+from typing import Any
+
+from .const import STREAM_MIN_SENTENCE_CHARS
+
+# End of a sentence: closing punctuation (and quotes or brackets) followed by
+# whitespace, or a line break. Requiring the whitespace keeps "3.5" together
+# and waits for the text after a period before deciding.
+SENTENCE_END = re.compile(r"(?<=[.!?…。！？])[\"'”’)\]]*\s+|\n+")
+# Characters at the end of the text that may still become part of a
+# sentence end once the whitespace after them arrives
+PENDING_END = ".!?…。！？\"'”’)]"
+
+_END = object()
+
+
+class SentenceBuffer:
+    """Split text arriving in arbitrary pieces into sentences.
+
+    Sentences shorter than ``min_chars`` are merged with the next one, so
+    short fragments such as "Sure!" or "Dr." do not become requests of
+    their own. Text that was already searched for sentence ends is not
+    searched again when the next piece arrives, so a long sentence
+    arriving a token at a time costs linear, not quadratic, time.
+    """
+
+    def __init__(self, min_chars: int = STREAM_MIN_SENTENCE_CHARS) -> None:
+        """Initialize the buffer."""
+        self._min_chars = min_chars
+        self._text = ""
+        self._scanned = 0
+
+    def feed(self, text: str) -> list[str]:
+        """Add text and return the sentences it completed."""
+        self._text += text
+        sentences = []
+        start = 0
+        for match in SENTENCE_END.finditer(self._text, self._scanned):
+            sentence = self._text[start:match.end()].strip()
+            if len(sentence) >= self._min_chars:
+                sentences.append(sentence)
+                start = match.end()
+        self._text = self._text[start:]
+        self._scanned = len(self._text.rstrip(PENDING_END))
+        return sentences
+
+    def flush(self) -> str:
+        """Return the text left at the end of the stream."""
+        text, self._text, self._scanned = self._text.strip(), "", 0
+        return text
+
+
+async def async_iter_sentences(text: AsyncIterable[str]) -> AsyncIterator[str]:
+    """Yield complete sentences from a stream of text pieces."""
+    buffer = SentenceBuffer()
+    async for piece in text:
+        for sentence in buffer.feed(piece):
+            yield sentence
+    if rest := buffer.flush():
+        yield rest
+
+
+async def async_iter_pipelined(
+    items: AsyncIterable[str],
+    produce: Callable[[str], AsyncIterator[bytes]],
+    max_ahead: int,
+) -> AsyncIterator[bytes]:
+    """Run ``produce`` for every item as it arrives, yielding output in order.
+
+    Up to ``max_ahead`` items are produced ahead of the one being yielded,
+    with their output buffered until it is their turn. The output of the
+    current item is yielded as it is produced. When the consumer stops
+    early, every running producer is cancelled.
+    """
+    order: asyncio.Queue[Any] = asyncio.Queue(maxsize=max_ahead)
+    tasks: set[asyncio.Task[None]] = set()
+
+    async def run(item: str, output: asyncio.Queue[Any]) -> None:
+        """Produce the output of one item into its queue."""
+        try:
+            async for chunk in produce(item):
+                output.put_nowait(chunk)
+        except Exception as err:  # pylint: disable=broad-except
+            output.put_nowait(err)
+        finally:
+            output.put_nowait(_END)
+
+    async def feed() -> None:
+        """Start producing every item, waiting while too many are ahead."""
+        try:
+            async for item in items:
+                output: asyncio.Queue[Any] = asyncio.Queue()
+                await order.put(output)
+                task = asyncio.create_task(run(item, output))
+                tasks.add(task)
+                task.add_done_callback(tasks.discard)
+        except Exception as err:  # pylint: disable=broad-except
+            await order.put(err)
+        else:
+            await order.put(_END)
+
+    feeder = asyncio.create_task(feed())
+    try:
+        while (output := await order.get()) is not _END:
+            if isinstance(output, Exception):
+                raise output
+            while (chunk := await output.get()) is not _END:
+                if isinstance(chunk, Exception):
+                    raise chunk
+                yield chunk
+    finally:
+        feeder.cancel()
+        for task in tasks:
+            task.cancel()
@@ -0,0 +1,97 @@
+"""Adaptive request timeouts for Parasail TTS, based on observed throughput."""
+from __future__ import annotations
+
+import asyncio
+from dataclasses import dataclass
+import logging
+from typing import Any
+
+from homeassistant.core import HomeAssistant
+from homeassistant.helpers.storage import Store
+
+from .const import (
+    DATA_THROUGHPUT,
+    DEFAULT_CHARS_PER_SECOND,
+    MAX_TOTAL_TIMEOUT,
+    THROUGHPUT_EWMA_ALPHA,
+    THROUGHPUT_SAVE_DELAY,
+    THROUGHPUT_STORAGE_KEY,
+    THROUGHPUT_STORAGE_VERSION,
+    TIMEOUT_CONNECT,
+    TIMEOUT_FIRST_BYTE,
+    TIMEOUT_IDLE,
+    TIMEOUT_SAFETY_FACTOR,
+)
+
+_LOGGER = logging.getLogger(__name__)
+
+
+@dataclass(frozen=True, slots=True)
+class RequestTimeouts:
+    """Timeouts of one synthesis request, in seconds.
+
+    ``first_byte`` bounds the wait for the first audio chunk, ``idle`` the
+    wait for every chunk after that, and ``total`` the whole request.
+    """
+
+    total: float
+    connect: float = TIMEOUT_CONNECT
+    first_byte: float = TIMEOUT_FIRST_BYTE
+    idle: float = TIMEOUT_IDLE
+
+
+class ThroughputModel:
+    """Per-voice moving average of synthesis speed in characters per second.
+
+    The deadline of a request is the time the voice is expected to need for
+    the message, with a safety factor, on top of the connect and first-byte
+    budgets. Short messages therefore fail fast, while long ones get the
+    time they need. The averages are stored, so they survive restarts.
+    """
+
+    def __init__(self, hass: HomeAssistant) -> None:
+        """Initialize the model."""
+        self._store: Store[dict[str, Any]] = Store(
+            hass, THROUGHPUT_STORAGE_VERSION, THROUGHPUT_STORAGE_KEY
+        )
+        self._load_lock = asyncio.Lock()
+        self._loaded = False
+        self.rates: dict[str, float] = {}
+
+    async def async_load(self) -> None:
+        """Load the stored averages, once."""
+        async with self._load_lock:
+            if self._loaded:
+                return
+            self._loaded = True
+            if (stored := await self._store.async_load()) is None:
+                return
+            for voice, rate in stored.get("rates", {}).items():
+                # Averages observed before loading are more recent
+                if isinstance(rate, (int, float)) and rate > 0:
+                    self.rates.setdefault(voice, float(rate))
+
+    def timeouts(self, voice: str, characters: int) -> RequestTimeouts:
+        """Return the timeouts for a message spoken by a voice."""
+        rate = self.rates.get(voice, DEFAULT_CHARS_PER_SECOND)
+        expected = characters / rate * TIMEOUT_SAFETY_FACTOR
+        total = TIMEOUT_CONNECT + TIMEOUT_FIRST_BYTE + expected
+        return RequestTimeouts(min(total, MAX_TOTAL_TIMEOUT))
+
+    def observe(self, voice: str, characters: int, seconds: float) -> None:
+        """Update the average of a voice with a completed request."""
+        if characters <= 0 or seconds <= 0:
+            return
+        sample = characters / seconds
+        if (rate := self.rates.get(voice)) is None:
+            self.rates[voice] = sample
+        else:
+            self.rates[voice] = rate + THROUGHPUT_EWMA_ALPHA * (sample - rate)
+        self._store.async_delay_save(lambda: {"rates": self.rates}, THROUGHPUT_SAVE_DELAY)
+
+
+def async_get_throughput(hass: HomeAssistant) -> ThroughputModel:
+    """Return the throughput model shared by all config entries."""
+    if (model := hass.data.get(DATA_THROUGHPUT)) is None:
+        model = hass.data[DATA_THROUGHPUT] = ThroughputModel(hass)
+    return model
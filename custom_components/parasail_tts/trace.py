@@ -0,0 +1,143 @@
+"""Compact traces of the audio chunks of Parasail TTS requests."""
+from __future__ import annotations
+
+import asyncio
+from collections import deque
+from collections.abc import Iterator
+from datetime import datetime
+import logging
+import struct
+import time
+from typing import Any
+
+from homeassistant.core import HomeAssistant
+
+from .const import DATA_TRACER, TRACE_MAX_EVENTS, TRACE_MAX_REQUESTS
+
+_LOGGER = logging.getLogger(__name__)
+
+# Chunk index, size in bytes, arrival since the request started and decode
+# time, both in microseconds
+TRACE_EVENT = struct.Struct("<IIII")
+TRACE_FIELDS = ["chunk", "bytes", "arrival_ms", "decode_ms"]
+_UINT32 = 0xFFFFFFFF
+
+
+class RequestTrace:
+    """Ring buffer of the chunk events of one request.
+
+    Every event is packed into the same ``TRACE_EVENT.size`` bytes of a
+    buffer allocated when the request starts, so recording a chunk neither
+    allocates nor formats anything. Only the last ``max_events`` events of
+    a long stream are kept; ``events`` counts all of them.
+    """
+
+    __slots__ = (
+        "voice",
+        "characters",
+        "started_at",
+        "outcome",
+        "events",
+        "_started",
+        "_buffer",
+        "_max_events",
+    )
+
+    def __init__(self, voice: str, characters: int, max_events: int = TRACE_MAX_EVENTS) -> None:
+        """Initialize the trace."""
+        self.voice = voice
+        self.characters = characters
+        self.started_at = datetime.now()
+        self.outcome: str | None = None
+        self.events = 0
+        self._started = time.perf_counter_ns()
+        self._buffer = bytearray(TRACE_EVENT.size * max_events)
+        self._max_events = max_events
+
+    def add(self, chunk: int, size: int, arrived_ns: int, decoded_ns: int) -> None:
+        """Record a chunk that arrived and was decoded at these ``perf_counter_ns`` times."""
+        TRACE_EVENT.pack_into(
+            self._buffer,
+            self.events % self._max_events * TRACE_EVENT.size,
+            chunk & _UINT32,
+            size & _UINT32,
+            min((arrived_ns - self._started) // 1000, _UINT32),
+            min((decoded_ns - arrived_ns) // 1000, _UINT32),
+        )
+        self.events += 1
+
+    def iter_events(self) -> Iterator[tuple[int, int, int, int]]:
+        """Yield the kept events, oldest first."""
+        for number in range(max(self.events - self._max_events, 0), self.events):
+            yield TRACE_EVENT.unpack_from(
+                self._buffer, number % self._max_events * TRACE_EVENT.size
+            )
+
+    def as_dict(self) -> dict[str, Any]:
+        """Return the trace, with one list of ``TRACE_FIELDS`` per event."""
+        return {
+            "started": self.started_at.isoformat(),
+            "voice": self.voice,
+            "characters": self.characters,
+            "outcome": self.outcome,
+            "chunks": self.events,
+            "dropped": max(self.events - self._max_events, 0),
+            "events": [
+                [chunk, size, arrival / 1000, decode / 1000]
+                for chunk, size, arrival, decode in self.iter_events()
+            ],
+        }
+
+
+class Tracer:
+    """Traces of the last requests, recorded only while debug logging is on.
+
+    With debug logging off ``async_start`` returns None and the client skips
+    tracing altogether, so a chunk costs one ``is None`` check. A request
+    that fails has its trace written to the debug log, and the diagnostics
+    include the traces of the last ``max_requests`` requests.
+    """
+
+    def __init__(self, max_requests: int = TRACE_MAX_REQUESTS) -> None:
+        """Initialize the tracer."""
+        self.traces: deque[RequestTrace] = deque(maxlen=max_requests)
+
+    @property
+    def enabled(self) -> bool:
+        """Return True if requests are traced."""
+        return _LOGGER.isEnabledFor(logging.DEBUG)
+
+    def async_start(self, payload: dict[str, Any]) -> RequestTrace | None:
+        """Return a new trace for a request, or None while tracing is off."""
+        if not self.enabled:
+            return None
+        trace = RequestTrace(str(payload.get("voice")), len(str(payload.get("text", ""))))
+        self.traces.append(trace)
+        return trace
+
+    def async_finish(self, trace: RequestTrace, error: BaseException | None) -> None:
+        """Record how a request ended, logging the trace if it failed."""
+        if error is None:
+            trace.outcome = "ok"
+        elif isinstance(error, GeneratorExit):
+            trace.outcome = "closed"
+        elif isinstance(error, asyncio.CancelledError):
+            trace.outcome = "cancelled"
+        else:
+            trace.outcome = f"error: {error}"
+            _LOGGER.debug("Trace of the failed request (%s): %s", TRACE_FIELDS, trace.as_dict())
+
+    def as_dict(self) -> dict[str, Any]:
+        """Return the traces, most recent last."""
+        return {
+            "enabled": self.enabled,
+            "fields": TRACE_FIELDS,
+            "requests": [trace.as_dict() for trace in self.traces],
+        }
+
+
+def async_get_tracer(hass: HomeAssistant) -> Tracer:
+    """Return the tracer shared by all config entries."""
+    if (tracer := hass.data.get(DATA_TRACER)) is None:
+        tracer = hass.data[DATA_TRACER] = Tracer()
+    return tracer
@@ -1,30 +1,64 @@
 """Support for Parasail text-to-speech service."""
 from __future__ import annotations
 
-import base64
-import json
+import asyncio
+from collections.abc import AsyncIterable, AsyncIterator, Mapping
+from contextlib import aclosing
+from functools import partial
 import logging
-from typing import Any
+import time
+from typing import TYPE_CHECKING, Any
 
-from homeassistant.components.tts import TextToSpeechEntity, TtsAudioType
+from aiohttp import ClientError, ClientSession
+
+from homeassistant.components.tts import (
+    ATTR_VOICE,
+    TextToSpeechEntity,
+    TtsAudioType,
+)
 from homeassistant.config_entries import ConfigEntry
-from homeassistant.core import HomeAssistant
-from homeassistant.helpers.aiohttp_client import async_get_clientsession
+from homeassistant.core import Context, HomeAssistant
+from homeassistant.helpers.aiohttp_client import async_create_clientsession
 from homeassistant.helpers.entity_platform import AddEntitiesCallback
 
+try:
+    from homeassistant.components.tts import TTSAudioRequest, TTSAudioResponse
+except ImportError:  # Home Assistant before 2025.5 has no streaming TTS
+    TTSAudioRequest = TTSAudioResponse = None
+
+from .api import ParasailClient, ParasailError, build_payload, detect_audio_format
+from .cache import async_get_cache, cache_key
+from .catalog import async_get_catalog
 from .const import (
-    CONF_EXAGGERATION,
+    CONF_CACHE_PARTIAL,
+    CONF_JITTER_BUFFER,
     CONF_MODEL,
-    CONF_TEMPERATURE,
-    CONF_VOICE,
-    DEFAULT_CFG_WEIGHT,
-    DEFAULT_EXAGGERATION,
+    CONF_SHARED_CACHE,
+    DATA_CAPTURE,
+    DATA_PROFILER,
+    DEFAULT_CACHE_PARTIAL,
+    DEFAULT_JITTER_BUFFER,
+    DEFAULT_LANGUAGE,
     DEFAULT_MODEL,
-    DEFAULT_TEMPERATURE,
-    DEFAULT_VOICE,
-    DOMAIN,
-    PARASAIL_API_URL,
+    DEFAULT_SHARED_CACHE,
+    FAILURE_FORMAT,
+    PARASAIL_TTS_MODELS,
+    PARTIAL_VARIANT,
+    QUOTA_MODE_REJECT,
+    SHARED_LOCK_WAIT,
+    STREAM_MAX_AHEAD,
 )
+from .jitter import async_get_jitter, async_iter_jitter_buffered
+from .postprocess import async_iter_postprocessed, async_postprocess, processing_variant
+from .routing import LanguageRoute, build_routes, resolve_route
+from .streaming import async_iter_pipelined, async_iter_sentences
+from .timeouts import async_get_throughput
+from .trace import async_get_tracer
+from .usage import UsageTracker, async_get_usage, audio_seconds
+from .wav import WavStreamWriter, join_audio_chunks
+
+if TYPE_CHECKING:
+    from .shared_cache import SharedCacheBackend
 
 _LOGGER = logging.getLogger(__name__)
 
@@ -35,171 +69,416 @@ async def async_setup_entry(
     async_add_entities: AddEntitiesCallback,
 ) -> None:
     """Set up Parasail TTS platform."""
-    async_add_entities([ParasailTTSEntity(config_entry)])
+    catalog = async_get_catalog(hass)
+    await catalog.async_load()
+    async_add_entities([ParasailTTSEntity(config_entry, catalog.models)])
 
 
 class ParasailTTSEntity(TextToSpeechEntity):
     """Parasail text-to-speech entity."""
 
-    def __init__(self, config_entry: ConfigEntry) -> None:
+    def __init__(
+        self,
+        config_entry: ConfigEntry,
+        models: Mapping[str, dict[str, Any]] = PARASAIL_TTS_MODELS,
+    ) -> None:
         """Initialize Parasail TTS entity."""
         self._config_entry = config_entry
         self._attr_name = f"Parasail TTS {config_entry.data.get(CONF_MODEL, DEFAULT_MODEL)}"
         self._attr_unique_id = config_entry.entry_id
 
+        # The routing table only changes with the options, which reload the
+        # entry, so it is built once here instead of on every request.
+        self._routes = build_routes(config_entry.options or config_entry.data, models)
+        self._default_route = self._routes.get(
+            DEFAULT_LANGUAGE, next(iter(self._routes.values()))
+        )
+        self._clients: dict[str, ParasailClient] = {}
+        self._sessions: list[ClientSession] = []
+        self._shared: SharedCacheBackend | None = None
+
     @property
     def supported_languages(self) -> list[str]:
         """Return list of supported languages."""
-        # Parasail TTS models support English
-        # Add more languages as they become available
-        return ["en"]
+        return list(self._routes)
 
     @property
     def default_language(self) -> str:
         """Return the default language."""
-        return "en"
+        return self._default_route.language
+
+    async def async_added_to_hass(self) -> None:
+        """Connect to the shared cache, if configured."""
+        config = self._config_entry.options or self._config_entry.data
+        if location := config.get(CONF_SHARED_CACHE, DEFAULT_SHARED_CACHE):
+            # pylint: disable-next=import-outside-toplevel
+            from .shared_cache import async_get_shared_cache
+
+            self._shared = async_get_shared_cache(self.hass, location)
+
+    async def async_will_remove_from_hass(self) -> None:
+        """Close the per-language connection pools."""
+        self._clients.clear()
+        while self._sessions:
+            await self._sessions.pop().close()
+
+    def _get_client(self, route: LanguageRoute) -> ParasailClient:
+        """Return the client for a route, with its own connection pool per language."""
+        if (client := self._clients.get(route.language)) is None:
+            session = async_create_clientsession(self.hass)
+            self._sessions.append(session)
+            client = self._clients[route.language] = ParasailClient(session, route.url)
+        client.capture = self.hass.data.get(DATA_CAPTURE)
+        client.tracer = async_get_tracer(self.hass)
+        return client
+
+    def _get_usage(self) -> UsageTracker:
+        """Return the usage tracker of the config entry."""
+        return async_get_usage(self.hass, self._config_entry)
 
     @property
     def supported_options(self) -> list[str]:
         """Return list of supported options."""
-        return []
+        return [ATTR_VOICE]
 
     async def async_get_tts_audio(
         self, message: str, language: str, options: dict[str, Any] | None = None
     ) -> TtsAudioType:
         """Load TTS audio from Parasail API."""
-        _LOGGER.debug("Generating TTS audio for message: %s (language: %s)", message, language)
+        # A single lookup is all profiling costs while it is switched off
+        if (profiler := self.hass.data.get(DATA_PROFILER)) is None:
+            return await self._async_get_tts_audio(message, language, options)
+        async with profiler.async_profile(f"{self.entity_id}: {len(message)} chars"):
+            return await self._async_get_tts_audio(message, language, options)
+
+    async def async_stream_tts_audio(self, request: TTSAudioRequest) -> TTSAudioResponse:
+        """Synthesize text streamed from a conversation agent as it arrives."""
+        return TTSAudioResponse(
+            "wav",
+            self._async_stream_audio(request.message_gen, request.language, request.options),
+        )
+
+    async def _async_stream_audio(
+        self,
+        message_gen: AsyncIterable[str],
+        language: str,
+        options: Mapping[str, Any] | None = None,
+    ) -> AsyncIterator[bytes]:
+        """Yield one continuous WAV stream for text arriving in pieces.
+
+        Every sentence is requested as soon as it is complete, while the
+        agent is still writing, with up to ``STREAM_MAX_AHEAD`` sentences
+        synthesized ahead of the one playing. Their WAV segments are joined
+        behind a single streaming header, and a jitter buffer holds back
+        enough audio to bridge the gaps between chunks.
+        """
+        config = self._config_entry.options or self._config_entry.data
+        route = resolve_route(self._routes, language, self._default_route)
+        produce = partial(
+            self._async_iter_sentence_audio,
+            config=config,
+            route=route,
+            options=options,
+            context=self._context,
+        )
+        writer = WavStreamWriter()
+        jitter = async_get_jitter(self.hass, self._config_entry)
+        min_depth = config.get(CONF_JITTER_BUFFER, DEFAULT_JITTER_BUFFER) / 1000
+
+        async def async_iter_framed() -> AsyncIterator[bytes]:
+            """Yield the audio of all sentences as one WAV stream."""
+            async with aclosing(
+                async_iter_pipelined(
+                    async_iter_sentences(message_gen), produce, STREAM_MAX_AHEAD
+                )
+            ) as audio:
+                async for chunk in audio:
+                    if framed := writer.feed(chunk):
+                        yield framed
+            if tail := writer.flush():
+                yield tail
+
+        underruns = jitter.underruns
+        async with aclosing(
+            async_iter_jitter_buffered(async_iter_framed(), writer.seconds, jitter, min_depth)
+        ) as buffered:
+            async for chunk in buffered:
+                yield chunk
+        _LOGGER.debug(
+            "Streamed %d sentences of a reply, started after %.0f ms with %d underruns",
+            writer.segments,
+            jitter.start_latency * 1000,
+            jitter.underruns - underruns,
+        )
+
+    async def _async_iter_sentence_audio(
+        self,
+        sentence: str,
+        config: Mapping[str, Any],
+        route: LanguageRoute,
+        options: Mapping[str, Any] | None,
+        context: Context | None,
+    ) -> AsyncIterator[bytes]:
+        """Yield the audio of one sentence from the cache or the API.
+
+        Sentences are cached under the key of a one-shot request for the
+        same text, processed the same way, so either path reuses the clips
+        of the other. The cached clip is the audio that was played.
+        """
+        payload, key = self._build_request(sentence, route, options, config)
+        cache = async_get_cache(self.hass)
+        usage = self._get_usage()
+        cached = None
+        if (quota_mode := usage.quota_mode()) != QUOTA_MODE_REJECT:
+            cached = await cache.async_get(key)
+        if cached is not None and cached[0] != "wav":
+            # Only WAV segments can be joined into the stream
+            _LOGGER.debug("Requesting %s again, its cached clip is %s", key, cached[0])
+            cached = None
+        if cached is not None:
+            usage.async_record(context, len(sentence), audio_seconds(*cached), cached=True)
+            yield cached[1]
+            return
+        if quota_mode is not None:
+            usage.async_record_rejected(context)
+            return
+
+        throughput = async_get_throughput(self.hass)
+        client = self._get_client(route)
+        chunks: list[bytes] = []
+        played: list[bytes] = []
+        started = time.monotonic()
+
+        async def iter_received() -> AsyncIterator[bytes]:
+            """Yield the audio as it arrives, keeping it for the cache."""
+            async with aclosing(
+                client.async_iter_audio(
+                    payload, throughput.timeouts(payload["voice"], len(sentence))
+                )
+            ) as stream:
+                async for chunk in stream:
+                    chunks.append(chunk)
+                    yield chunk
+
+        try:
+            # Trimmed and normalized like a clip of its own
+            async with aclosing(
+                async_iter_postprocessed(self.hass, config, iter_received())
+            ) as processed:
+                async for chunk in processed:
+                    played.append(chunk)
+                    yield chunk
+        except (ParasailError, ClientError) as err:
+            # Losing one sentence is better than cutting off the whole reply
+            _LOGGER.error("Skipping sentence of a streamed reply: %s", err)
+            return
+
+        throughput.observe(payload["voice"], len(sentence), time.monotonic() - started)
+        received = join_audio_chunks(chunks)
+        usage.async_record(
+            context,
+            len(sentence),
+            audio_seconds(detect_audio_format(received), received),
+        )
+        audio_data = join_audio_chunks(played)
+        cache.put(key, detect_audio_format(audio_data), audio_data, text=sentence)
 
-        # Get configuration
+    async def _async_get_tts_audio(
+        self, message: str, language: str, options: dict[str, Any] | None
+    ) -> TtsAudioType:
+        """Load TTS audio from the cache or the Parasail API."""
+        _LOGGER.debug("Generating TTS audio for message: %s (language: %s)", message, language)
         config = self._config_entry.options or self._config_entry.data
-        voice = config.get(CONF_VOICE, DEFAULT_VOICE)
-        temperature = config.get(CONF_TEMPERATURE, DEFAULT_TEMPERATURE)
-        exaggeration = config.get(CONF_EXAGGERATION, DEFAULT_EXAGGERATION)
+        key, _, audio = await self.async_render(
+            message, language, options, config, self._context
+        )
+        if audio is None:
+            return None
+        route = resolve_route(self._routes, language, self._default_route)
+        async_get_cache(self.hass).pin(route.language, key)
+        return audio
+
+    def _build_request(
+        self,
+        message: str,
+        route: LanguageRoute,
+        options: Mapping[str, Any] | None,
+        config: Mapping[str, Any],
+    ) -> tuple[dict[str, Any], str]:
+        """Return the payload of a message and the cache key of its audio."""
+        payload = build_payload(message, config)
+        payload["voice"] = (options or {}).get(ATTR_VOICE) or route.voice
+        return payload, cache_key(payload, route.model, processing_variant(config))
+
+    async def async_render(
+        self,
+        message: str,
+        language: str,
+        options: Mapping[str, Any] | None,
+        config: Mapping[str, Any],
+        context: Context | None,
+    ) -> tuple[str, str, tuple[str, bytes] | None]:
+        """Return the cache key, the outcome and the audio of a message.
+
+        The outcome is ``cached``, ``ok``, ``quota`` or ``error``. The batch
+        and preview services render their messages here with their own
+        ``config``, so they take the same route, cache key, quota, shared
+        cache and usage accounting as the messages spoken through Home
+        Assistant. Usage is recorded for ``context``, the caller's, not the
+        context last set on the entity.
+        """
+        route = resolve_route(self._routes, language, self._default_route)
+        payload, key = self._build_request(message, route, options, config)
 
         _LOGGER.debug(
             "Requesting TTS: voice=%s, message_length=%d, temperature=%s, exaggeration=%s, cfg_weight=%s",
-            voice,
+            payload["voice"],
             len(message),
-            temperature,
-            exaggeration,
-            DEFAULT_CFG_WEIGHT
+            payload["temperature"],
+            payload["exaggeration"],
+            payload["cfg_weight"]
         )
 
-        # Prepare request payload
-        payload = {
-            "temperature": temperature,
-            "text": message,
-            "voice": voice,
-            "exaggeration": exaggeration,
-            "cfg_weight": DEFAULT_CFG_WEIGHT,
-        }
+        usage = self._get_usage()
+        if (quota_mode := usage.quota_mode()) == QUOTA_MODE_REJECT:
+            usage.async_record_rejected(context)
+            return key, "quota", None
 
-        try:
-            audio_data = b""
-            session = async_get_clientsession(self.hass)
-            headers = {
-                "Content-Type": "application/json",
-            }
-
-            async with session.post(
-                PARASAIL_API_URL,
-                json=payload,
-                headers=headers,
-                timeout=30,
-            ) as response:
-                if response.status != 200:
-                    error_text = await response.text()
-                    _LOGGER.error(
-                        "API request failed with status %d: %s",
-                        response.status,
-                        error_text
-                    )
-                    return None
-
-                # Parse Server-Sent Events (SSE) streaming response
-                audio_chunks = []
-                chunk_count = 0
-
-                # Manually read and buffer the response to handle large SSE data lines
-                # that exceed aiohttp's default line length limit.
-                buffer = b''
-                while not response.content.at_eof():
-                    chunk = await response.content.read(4096)  # Read in chunks
-                    buffer += chunk
-                    while b'\n' in buffer:
-                        line, buffer = buffer.split(b'\n', 1)
-                        line_text = line.decode('utf-8').strip()
-
-                        # SSE events are prefixed with "data: "
-                        if line_text.startswith('data: '):
-                            json_data = line_text[6:]  # Remove "data: " prefix
-
-                            try:
-                                event = json.loads(json_data)
-
-                                # Process audio chunks
-                                if event.get('type') == 'audio' and 'audio_content' in event:
-                                    # Decode base64 audio content
-                                    audio_chunk = base64.b64decode(event['audio_content'])
-                                    audio_chunks.append(audio_chunk)
-                                    chunk_count += 1
-                                    _LOGGER.debug(
-                                        "Received audio chunk %d (%d bytes)",
-                                        event.get('chunk', chunk_count),
-                                        len(audio_chunk)
-                                    )
-
-                                elif event.get('type') == 'error':
-                                    _LOGGER.error("API returned error event: %s", event)
-                                    return None
-
-                            except json.JSONDecodeError as err:
-                                _LOGGER.warning("Failed to parse SSE event JSON: %s", err)
-                                continue
-
-                # Concatenate all audio chunks
-                if not audio_chunks:
-                    _LOGGER.error("No audio chunks received from API")
-                    return None
-
-                audio_data = b''.join(audio_chunks)
-                _LOGGER.info(
-                    "Generated %d bytes of audio from %d chunks",
-                    len(audio_data),
-                    chunk_count
+        cache = async_get_cache(self.hass)
+        if (cached := await cache.async_get(key)) is not None:
+            _LOGGER.debug("Serving %d bytes of cached audio", len(cached[1]))
+            usage.async_record(
+                context, len(message), audio_seconds(*cached), cached=True
+            )
+            return key, "cached", cached
+        if quota_mode is not None:
+            # Cache-only mode: what is not cached is not spoken
+            usage.async_record_rejected(context)
+            return key, "quota", None
+        audio = await self._async_fetch(message, config, route, payload, key, context)
+        return key, "ok" if audio is not None else "error", audio
+
+    async def _async_fetch(
+        self,
+        message: str,
+        config: Mapping[str, Any],
+        route: LanguageRoute,
+        payload: dict[str, Any],
+        key: str,
+        context: Context | None,
+    ) -> tuple[str, bytes] | None:
+        """Return a clip from the shared cache, or synthesize it for all instances.
+
+        While one instance synthesizes a clip it holds the lock of its key,
+        and the other instances wait for the result instead of requesting
+        the same phrase from the API. While the shared cache is unavailable
+        every instance synthesizes on its own.
+        """
+        if (shared := self._shared) is None or not shared.available:
+            return await self._async_synthesize(message, config, route, payload, key, context)
+
+        locked = False
+        if (entry := await shared.async_get(key)) is None and shared.available:
+            if not (locked := await shared.async_lock(key)) and shared.available:
+                _LOGGER.debug("Waiting for another instance to synthesize %s", key)
+                entry = await shared.async_wait(key, SHARED_LOCK_WAIT)
+
+        if entry is not None:
+            if entry[0] == FAILURE_FORMAT:
+                _LOGGER.error(
+                    "Synthesis failed on the instance this one waited for: %s",
+                    entry[1].decode(),
                 )
+                return None
+            _LOGGER.debug("Serving %d bytes of audio from the shared cache", len(entry[1]))
+            self._get_usage().async_record(
+                context, len(message), audio_seconds(*entry), cached=True
+            )
+            async_get_cache(self.hass).put(key, *entry, text=message)
+            return entry
 
-            # Detect audio format from magic bytes
-            if len(audio_data) >= 4:
-                magic_bytes = audio_data[:4]
-                _LOGGER.debug("Audio magic bytes: %s", magic_bytes.hex())
-
-                # Check for WAV format (RIFF header)
-                if magic_bytes == b'RIFF':
-                    _LOGGER.info("Detected WAV format from API")
-                    return ("wav", audio_data)
-
-                # Check for MP3 format (ID3 tag or MPEG sync)
-                elif magic_bytes[:3] == b'ID3' or (magic_bytes[0] == 0xFF and (magic_bytes[1] & 0xE0) == 0xE0):
-                    _LOGGER.info("Detected MP3 format from API")
-                    return ("mp3", audio_data)
-
-                # Unknown format, log warning and assume WAV (since API returns WAV)
-                else:
-                    _LOGGER.warning(
-                        "Unknown audio format, magic bytes: %s. Assuming WAV.",
-                        magic_bytes.hex()
-                    )
-                    return ("wav", audio_data)
-
-            # Fallback to WAV
-            return ("wav", audio_data)
+        try:
+            result = await self._async_synthesize(
+                message, config, route, payload, key, context
+            )
+        except BaseException:
+            if locked:
+                self.hass.async_create_task(shared.async_unlock(key))
+            raise
+        self.hass.async_create_task(self._async_share(shared, key, result, locked))
+        return result
+
+    async def _async_share(
+        self,
+        shared: SharedCacheBackend,
+        key: str,
+        result: tuple[str, bytes] | None,
+        locked: bool,
+    ) -> None:
+        """Store a result in the shared cache and release the lock of its key."""
+        if result is None:
+            await shared.async_put_failure(key, "Synthesis failed")
+        else:
+            await shared.async_put(key, *result)
+        if locked:
+            await shared.async_unlock(key)
+
+    async def _async_synthesize(
+        self,
+        message: str,
+        config: Mapping[str, Any],
+        route: LanguageRoute,
+        payload: dict[str, Any],
+        key: str,
+        context: Context | None,
+    ) -> tuple[str, bytes] | None:
+        """Synthesize and post-process a clip and store it in the cache."""
+        cache = async_get_cache(self.hass)
+        throughput = async_get_throughput(self.hass)
+        audio_chunks: list[bytes] = []
+        started = time.monotonic()
+        try:
+            client = self._get_client(route)
+            audio_format, audio_data = await client.async_synthesize(
+                payload,
+                throughput.timeouts(payload["voice"], len(message)),
+                audio_chunks=audio_chunks,
+            )
+        except asyncio.CancelledError:
+            # The client has already closed the connection; only keep what
+            # arrived if the user asked for partial audio to be cached. It
+            # goes under a key of its own, so a request for the message is
+            # never served the truncated clip.
+            if audio_chunks and config.get(CONF_CACHE_PARTIAL, DEFAULT_CACHE_PARTIAL):
+                partial = join_audio_chunks(audio_chunks)
+                cache.put(
+                    cache_key(payload, route.model, PARTIAL_VARIANT),
+                    detect_audio_format(partial),
+                    partial,
+                    text=message,
+                )
+                _LOGGER.debug("Cached %d bytes of partial audio", len(partial))
+            raise
+        except ParasailError as err:
+            _LOGGER.error("%s", err)
+            return None
         except Exception as err:
             _LOGGER.error(
                 "Error during TTS generation: %s (voice=%s, message_length=%d)",
                 err,
-                voice,
+                payload["voice"],
                 len(message),
                 exc_info=True
             )
             return None
+
+        throughput.observe(payload["voice"], len(message), time.monotonic() - started)
+        self._get_usage().async_record(
+            context, len(message), audio_seconds(audio_format, audio_data)
+        )
+        _LOGGER.info("Detected %s format from API", audio_format.upper())
+        audio_format, audio_data = await async_postprocess(
+            self.hass, config, audio_format, audio_data
+        )
+        cache.put(key, audio_format, audio_data, text=message)
+        return (audio_format, audio_data)
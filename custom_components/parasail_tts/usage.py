@@ -0,0 +1,304 @@
+"""Usage accounting and daily quotas per Parasail TTS config entry."""
+from __future__ import annotations
+
+import asyncio
+from collections import OrderedDict
+from collections.abc import Mapping
+from dataclasses import asdict, dataclass, field, fields
+import logging
+from typing import Any
+
+from homeassistant.config_entries import ConfigEntry
+from homeassistant.const import ATTR_ENTITY_ID
+from homeassistant.core import Context, Event, HomeAssistant, callback
+from homeassistant.helpers.dispatcher import async_dispatcher_send
+from homeassistant.helpers.storage import Store
+from homeassistant.util import dt as dt_util
+
+from .const import (
+    CONF_DAILY_QUOTA,
+    CONF_QUOTA_MODE,
+    DATA_USAGE,
+    DATA_USAGE_ORIGINS,
+    DEFAULT_DAILY_QUOTA,
+    DEFAULT_QUOTA_MODE,
+    SIGNAL_USAGE_UPDATED,
+    USAGE_MAX_CONTEXTS,
+    USAGE_MAX_ORIGINS,
+    USAGE_RETENTION_DAYS,
+    USAGE_SAVE_DELAY,
+    USAGE_STORAGE_KEY,
+    USAGE_STORAGE_VERSION,
+)
+from .wav import parse_wav
+
+_LOGGER = logging.getLogger(__name__)
+
+# Fired when automations and scripts start, with the context their actions use.
+# The names are spelled out so the automation and script components are not
+# imported just for their constants.
+ORIGIN_EVENTS = ("automation_triggered", "script_started")
+
+CONTEXT_UNKNOWN = "unknown"
+CONTEXT_OTHER = "other"
+
+
+@dataclass(slots=True)
+class UsageCounters:
+    """Counters of requests, characters and audio.
+
+    ``requests``, ``characters`` and ``audio_seconds`` count what was
+    synthesized by the API. The ``cached_`` counters count what the caches
+    served instead, which is what they saved.
+    """
+
+    requests: int = 0
+    characters: int = 0
+    audio_seconds: float = 0.0
+    cached_requests: int = 0
+    cached_characters: int = 0
+    cached_audio_seconds: float = 0.0
+    rejected_requests: int = 0
+
+    @classmethod
+    def from_dict(cls, data: Mapping[str, Any]) -> UsageCounters:
+        """Create counters from their stored form, ignoring unknown keys."""
+        return cls(**{item.name: data[item.name] for item in fields(cls) if item.name in data})
+
+    def add(self, other: UsageCounters) -> None:
+        """Add the counts of another set of counters."""
+        for item in fields(self):
+            setattr(self, item.name, getattr(self, item.name) + getattr(other, item.name))
+
+
+@dataclass(slots=True)
+class _Day:
+    """Counters of one day, in total and per calling context."""
+
+    total: UsageCounters = field(default_factory=UsageCounters)
+    contexts: dict[str, UsageCounters] = field(default_factory=dict)
+
+
+def audio_seconds(audio_format: str, audio_data: bytes) -> float:
+    """Return the duration of a WAV clip, or 0 for formats without a header."""
+    if audio_format != "wav" or (info := parse_wav(audio_data)) is None:
+        return 0.0
+    return info.data_size / (info.sample_rate * info.frame_size)
+
+
+class UsageTracker:
+    """Rolling daily usage counters of one config entry.
+
+    One bucket per local day is kept for ``USAGE_RETENTION_DAYS`` days, so
+    recording is a few additions and sums over the window stay cheap. Every
+    change is saved with a delay and announced to the usage sensors.
+    """
+
+    def __init__(self, hass: HomeAssistant, entry: ConfigEntry) -> None:
+        """Initialize the tracker."""
+        self._hass = hass
+        self._entry = entry
+        self._store: Store[dict[str, Any]] = Store(
+            hass, USAGE_STORAGE_VERSION, f"{USAGE_STORAGE_KEY}.{entry.entry_id}"
+        )
+        self._origins = async_get_origins(hass)
+        self._load_lock = asyncio.Lock()
+        self._loaded = False
+        self._days: OrderedDict[str, _Day] = OrderedDict()
+        self._warned_day: str | None = None
+
+    async def async_load(self) -> None:
+        """Load the stored counters, once."""
+        async with self._load_lock:
+            if self._loaded:
+                return
+            self._loaded = True
+            if (stored := await self._store.async_load()) is None:
+                return
+            days = OrderedDict()
+            for date, day in sorted(stored.get("days", {}).items()):
+                days[date] = _Day(
+                    UsageCounters.from_dict(day.get("total", {})),
+                    {
+                        context: UsageCounters.from_dict(counters)
+                        for context, counters in day.get("contexts", {}).items()
+                    },
+                )
+            # Counts recorded before loading belong to the most recent days
+            for date, day in self._days.items():
+                if (existing := days.get(date)) is None:
+                    days[date] = day
+                    continue
+                existing.total.add(day.total)
+                for context, counters in day.contexts.items():
+                    existing.contexts.setdefault(context, UsageCounters()).add(counters)
+            self._days = days
+            self._prune()
+
+    async def async_remove(self) -> None:
+        """Remove the stored counters."""
+        await self._store.async_remove()
+
+    @property
+    def today(self) -> UsageCounters:
+        """Return the counters of the current day."""
+        return self._today().total
+
+    def contexts_today(self) -> dict[str, UsageCounters]:
+        """Return the counters of the current day per calling context."""
+        return dict(self._today().contexts)
+
+    def window(self, days: int = USAGE_RETENTION_DAYS) -> UsageCounters:
+        """Return the sum of the counters of the last ``days`` days."""
+        total = UsageCounters()
+        for day in list(self._days.values())[-days:]:
+            total.add(day.total)
+        return total
+
+    @property
+    def quota_exceeded(self) -> bool:
+        """Return True if today's character quota is used up."""
+        config = self._entry.options or self._entry.data
+        quota = config.get(CONF_DAILY_QUOTA, DEFAULT_DAILY_QUOTA)
+        return bool(quota) and self._today().total.characters >= quota
+
+    def quota_mode(self) -> str | None:
+        """Return the quota mode if today's quota is used up, otherwise None."""
+        if not self.quota_exceeded:
+            return None
+        config = self._entry.options or self._entry.data
+        quota = config[CONF_DAILY_QUOTA]
+        mode = config.get(CONF_QUOTA_MODE, DEFAULT_QUOTA_MODE)
+        if (today := self._today_key()) != self._warned_day:
+            self._warned_day = today
+            _LOGGER.warning(
+                "Daily quota of %d characters for %s is used up, switching to %s mode",
+                quota,
+                self._entry.title,
+                mode,
+            )
+        return mode
+
+    @callback
+    def async_record(
+        self,
+        context: Context | None,
+        characters: int,
+        seconds: float,
+        cached: bool = False,
+    ) -> None:
+        """Record a request synthesized by the API or served from a cache."""
+        if cached:
+            usage = UsageCounters(
+                cached_requests=1, cached_characters=characters, cached_audio_seconds=seconds
+            )
+        else:
+            usage = UsageCounters(requests=1, characters=characters, audio_seconds=seconds)
+        self._async_add(context, usage)
+
+    @callback
+    def async_record_rejected(self, context: Context | None) -> None:
+        """Record a request refused because of the quota."""
+        self._async_add(context, UsageCounters(rejected_requests=1))
+
+    def _async_add(self, context: Context | None, usage: UsageCounters) -> None:
+        """Add counters to today's totals and to those of the calling context."""
+        day = self._today()
+        day.total.add(usage)
+        label = self._origins.label(context)
+        if label not in day.contexts and len(day.contexts) >= USAGE_MAX_CONTEXTS:
+            label = CONTEXT_OTHER
+        day.contexts.setdefault(label, UsageCounters()).add(usage)
+        self._store.async_delay_save(self._as_document, USAGE_SAVE_DELAY)
+        async_dispatcher_send(self._hass, SIGNAL_USAGE_UPDATED.format(self._entry.entry_id))
+
+    def _today(self) -> _Day:
+        """Return the bucket of the current day, starting it if needed."""
+        today = self._today_key()
+        if (day := self._days.get(today)) is None:
+            day = self._days[today] = _Day()
+            self._prune()
+        return day
+
+    @staticmethod
+    def _today_key() -> str:
+        """Return the key of the current local day."""
+        return dt_util.now().date().isoformat()
+
+    def _prune(self) -> None:
+        """Drop the days that fell out of the retention window."""
+        while len(self._days) > USAGE_RETENTION_DAYS:
+            self._days.popitem(last=False)
+
+    def _as_document(self) -> dict[str, Any]:
+        """Return the counters in their stored form."""
+        return {
+            "days": {
+                date: {
+                    "total": asdict(day.total),
+                    "contexts": {
+                        context: asdict(counters) for context, counters in day.contexts.items()
+                    },
+                }
+                for date, day in self._days.items()
+            }
+        }
+
+
+class ContextOrigins:
+    """Map contexts to the automations and scripts that created them.
+
+    Service calls made by an automation or script carry the context fired
+    with its start event, so remembering the most recent ones is enough to
+    attribute a request to its caller.
+    """
+
+    def __init__(self) -> None:
+        """Initialize the mapping."""
+        self._origins: OrderedDict[str, str] = OrderedDict()
+
+    @callback
+    def async_setup(self, hass: HomeAssistant) -> None:
+        """Start following automations and scripts."""
+        for event_type in ORIGIN_EVENTS:
+            hass.bus.async_listen(event_type, self._async_started)
+
+    @callback
+    def _async_started(self, event: Event) -> None:
+        """Remember the context of a started automation or script."""
+        if (entity_id := event.data.get(ATTR_ENTITY_ID)) is None:
+            return
+        self._origins[event.context.id] = entity_id
+        if len(self._origins) > USAGE_MAX_ORIGINS:
+            self._origins.popitem(last=False)
+
+    def label(self, context: Context | None) -> str:
+        """Return a label for the caller of a request."""
+        if context is None:
+            return CONTEXT_UNKNOWN
+        for context_id in (context.id, context.parent_id):
+            if context_id is not None and (origin := self._origins.get(context_id)):
+                return origin
+        if context.user_id is not None:
+            return f"user:{context.user_id}"
+        return CONTEXT_OTHER
+
+
+def async_get_origins(hass: HomeAssistant) -> ContextOrigins:
+    """Return the context origins shared by all config entries."""
+    if (origins := hass.data.get(DATA_USAGE_ORIGINS)) is None:
+        origins = hass.data[DATA_USAGE_ORIGINS] = ContextOrigins()
+        origins.async_setup(hass)
+    return origins
+
+
+def async_get_usage(hass: HomeAssistant, entry: ConfigEntry) -> UsageTracker:
+    """Return the usage tracker of a config entry.
+
+    Trackers outlive reloads of their entry, so counts waiting to be saved
+    are not lost.
+    """
+    trackers: dict[str, UsageTracker] = hass.data.setdefault(DATA_USAGE, {})
+    if (tracker := trackers.get(entry.entry_id)) is None:
+        tracker = trackers[entry.entry_id] = UsageTracker(hass, entry)
+    return tracker
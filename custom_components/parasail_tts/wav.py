@@ -0,0 +1,197 @@
+"""WAV framing for Parasail TTS audio."""
+from __future__ import annotations
+
+from collections.abc import Iterable
+from dataclasses import dataclass
+import logging
+import struct
+
+_LOGGER = logging.getLogger(__name__)
+
+# Placeholder size for streamed WAV files whose length is not known yet
+UNKNOWN_SIZE = 0xFFFFFFFF
+
+# Longest header accepted before data is no longer treated as a header
+MAX_HEADER_SIZE = 4096
+
+# Size of the canonical header written by build_wav_header
+WAV_HEADER_SIZE = 44
+
+
+@dataclass(slots=True)
+class WavInfo:
+    """Format and data location of a PCM WAV file."""
+
+    channels: int
+    sample_rate: int
+    bits_per_sample: int
+    data_offset: int
+    data_size: int
+
+    @property
+    def frame_size(self) -> int:
+        """Return the size of one frame (one sample for every channel) in bytes."""
+        return self.channels * self.bits_per_sample // 8
+
+
+def parse_wav(data: bytes) -> WavInfo | None:
+    """Parse the RIFF chunks of a WAV file.
+
+    Returns ``None`` if the data is not a PCM WAV file. The data size is
+    clamped to the bytes actually present, since streamed files often carry
+    placeholder sizes.
+    """
+    if len(data) < 12 or data[:4] != b'RIFF' or data[8:12] != b'WAVE':
+        return None
+
+    fmt: tuple[int, int, int, int] | None = None
+    offset = 12
+    while offset + 8 <= len(data):
+        chunk_id = data[offset:offset + 4]
+        (chunk_size,) = struct.unpack_from("<I", data, offset + 4)
+        body = offset + 8
+        if chunk_id == b'fmt ' and chunk_size >= 16 and body + 16 <= len(data):
+            audio_format, channels, sample_rate = struct.unpack_from("<HHI", data, body)
+            (bits_per_sample,) = struct.unpack_from("<H", data, body + 14)
+            fmt = (audio_format, channels, sample_rate, bits_per_sample)
+        elif chunk_id == b'data':
+            if fmt is None or fmt[0] != 1 or not fmt[1]:
+                return None
+            size = min(chunk_size, len(data) - body)
+            return WavInfo(fmt[1], fmt[2], fmt[3], body, size)
+        offset = body + chunk_size + (chunk_size & 1)
+    return None
+
+
+def build_wav_header(
+    channels: int, sample_rate: int, bits_per_sample: int, data_size: int
+) -> bytes:
+    """Build a canonical 44-byte PCM WAV header.
+
+    Pass ``UNKNOWN_SIZE`` as the data size for a stream of unknown length.
+    """
+    block_align = channels * bits_per_sample // 8
+    return struct.pack(
+        "<4sI4s4sIHHIIHH4sI",
+        b'RIFF',
+        min(36 + data_size, UNKNOWN_SIZE),
+        b'WAVE',
+        b'fmt ',
+        16,
+        1,
+        channels,
+        sample_rate,
+        sample_rate * block_align,
+        block_align,
+        bits_per_sample,
+        b'data',
+        data_size,
+    )
+
+
+def _is_header_prefix(data: bytes) -> bool:
+    """Return whether the data could be the start of an incomplete WAV header."""
+    return (
+        len(data) < MAX_HEADER_SIZE
+        and b'RIFF'.startswith(data[:4])
+        and b'WAVE'.startswith(data[8:12])
+    )
+
+
+class WavStreamWriter:
+    """Frame streamed WAV segments as one continuous WAV stream.
+
+    The server sends a header with every segment, often with placeholder
+    sizes. The first header is replaced with a streaming header carrying
+    ``UNKNOWN_SIZE``, so playback can start before the length is known.
+    Headers at the start of later chunks are stripped, leaving one run of
+    PCM. ``finalize`` returns the same audio with the real sizes, ready to
+    be cached as a seekable file.
+
+    Audio that does not start with a WAV header, such as MP3, is passed
+    through unchanged.
+    """
+
+    def __init__(self) -> None:
+        """Initialize the writer."""
+        self.info: WavInfo | None = None
+        self.segments = 0
+        self._passthrough = False
+        self._pending = b''
+        self._chunks: list[bytes] = []
+        self._data_size = 0
+
+    def feed(self, chunk: bytes) -> bytes:
+        """Frame a chunk and return the bytes that can be played now."""
+        data = self._pending + chunk
+        self._pending = b''
+        if self._passthrough:
+            self._chunks.append(data)
+            return data
+
+        prefix = b''
+        if (info := parse_wav(data)) is not None:
+            if self.info is None:
+                self.info = info
+                prefix = build_wav_header(
+                    info.channels, info.sample_rate, info.bits_per_sample, UNKNOWN_SIZE
+                )
+            elif (info.channels, info.sample_rate, info.bits_per_sample) != (
+                self.info.channels,
+                self.info.sample_rate,
+                self.info.bits_per_sample,
+            ):
+                _LOGGER.warning(
+                    "WAV segment %d has a different format than the first one",
+                    self.segments + 1,
+                )
+            self.segments += 1
+            data = data[info.data_offset:]
+        elif _is_header_prefix(data):
+            # Wait for the rest of a header split across chunks
+            self._pending = data
+            return b''
+        elif self.info is None:
+            self._passthrough = True
+            self._chunks.append(data)
+            return data
+
+        self._chunks.append(data)
+        self._data_size += len(data)
+        return prefix + data
+
+    def seconds(self, data: bytes) -> float | None:
+        """Return the playing time of framed bytes, or None if it is unknown."""
+        if self.info is None or self._passthrough:
+            return None
+        return len(data) / (self.info.sample_rate * self.info.frame_size)
+
+    def flush(self) -> bytes:
+        """Return any bytes held back while waiting for a header."""
+        pending, self._pending = self._pending, b''
+        if not pending:
+            return b''
+        self._chunks.append(pending)
+        if self.info is None:
+            self._passthrough = True
+            return pending
+        self._data_size += len(pending)
+        return pending
+
+    def finalize(self) -> bytes:
+        """Return the whole stream as a seekable file with its final sizes."""
+        self.flush()
+        if self.info is None:
+            return b''.join(self._chunks)
+        info = self.info
+        return build_wav_header(
+            info.channels, info.sample_rate, info.bits_per_sample, self._data_size
+        ) + b''.join(self._chunks)
+
+
+def join_audio_chunks(chunks: Iterable[bytes]) -> bytes:
+    """Join received audio chunks into one file, merging WAV segments."""
+    writer = WavStreamWriter()
+    for chunk in chunks:
+        writer.feed(chunk)
+    return writer.finalize()
@@ -0,0 +1,80 @@
+"""Helpers shared by the tests of the entity and of the mock Parasail API."""
+import base64
+import json
+from collections.abc import AsyncIterator, Awaitable, Callable
+from contextlib import asynccontextmanager
+from pathlib import Path
+from unittest.mock import MagicMock
+
+from aiohttp import web
+from aiohttp.test_utils import TestServer
+
+from custom_components.parasail_tts.const import (
+    CATALOG_FILE,
+    CONF_VOICE,
+    DEFAULT_MODEL,
+    PARASAIL_TTS_MODELS,
+    VOICE_NAMES,
+)
+from custom_components.parasail_tts.tts import ParasailTTSEntity
+
+DONE_EVENT = b'data: {"type":"done"}\n\n'
+
+
+def audio_event(audio, **fields):
+    """Return an SSE line carrying one audio chunk, with any extra event fields."""
+    event = {"type": "audio", **fields, "audio_content": base64.b64encode(audio).decode()}
+    return b"data: " + json.dumps(event).encode() + b"\n\n"
+
+
+@asynccontextmanager
+async def serve(app: web.Application) -> AsyncIterator[TestServer]:
+    """Run an application on a local server while the context is open."""
+    server = TestServer(app)
+    await server.start_server()
+    try:
+        yield server
+    finally:
+        await server.close()
+
+
+@asynccontextmanager
+async def mock_api(
+    handle_tts: Callable[[web.Request], Awaitable[web.StreamResponse]],
+) -> AsyncIterator[str]:
+    """Serve a mock Parasail API answering with handle_tts and yield its URL."""
+    app = web.Application()
+    app.router.add_post("/tts", handle_tts)
+    async with serve(app) as server:
+        yield str(server.make_url("/tts"))
+
+
+def write_catalog(config_dir: Path, url: str) -> None:
+    """Write a local catalog with the known voices and the default model at a URL."""
+    (config_dir / CATALOG_FILE).write_text(
+        json.dumps(
+            {
+                "voices": [{"id": voice, "name": name} for voice, name in VOICE_NAMES.items()],
+                "models": [{"id": DEFAULT_MODEL, "url": url, "languages": ["en"]}],
+            }
+        )
+    )
+
+
+def make_config_entry(**options):
+    """Return a config entry mock for the default voice with the given options."""
+    config_entry = MagicMock()
+    config_entry.data = {CONF_VOICE: "oai_nova"}
+    config_entry.options = {CONF_VOICE: "oai_nova", **options}
+    config_entry.entry_id = "test_entry"
+    config_entry.title = "Parasail TTS"
+    return config_entry
+
+
+def make_entity(hass, client=None, models=PARASAIL_TTS_MODELS, **options):
+    """Create an entity of a config entry mock, sending its requests to a client if given."""
+    entity = ParasailTTSEntity(make_config_entry(**options), models)
+    entity.hass = hass
+    if client is not None:
+        entity._get_client = MagicMock(return_value=client)
+    return entity
@@ -0,0 +1,167 @@
+"""Test the frequency-based admission of clips to the audio cache."""
+import os
+import random
+import sys
+from pathlib import Path
+
+import pytest
+
+# Add custom_components to path
+repo_path = Path(__file__).parent.parent
+sys.path.insert(0, str(repo_path))
+
+try:
+    from custom_components.parasail_tts.admission import FrequencySketch, volatile_spans
+    from custom_components.parasail_tts.cache import AudioCache
+    from custom_components.parasail_tts.const import SKETCH_MAX_COUNT
+except ImportError as e:
+    pytest.skip(f"Could not import integration: {e}", allow_module_level=True)
+
+PHRASES = [
+    "Good morning",
+    "The garage door is open",
+    "The washing machine is done",
+    "Someone is at the front door",
+    "Time to take out the trash",
+    "The back door is unlocked",
+    "Dinner is ready",
+    "The dishwasher has finished",
+]
+
+ROOMS = [
+    "kitchen", "hallway", "office", "garden", "attic", "basement", "porch",
+    "bathroom", "bedroom", "nursery", "study", "garage", "cellar", "pantry",
+    "laundry", "den", "loft", "lounge", "library", "gym",
+]
+
+
+def synthetic_log(requests, seed=1):
+    """Return a message log of recurring phrases and one-off notifications.
+
+    Half of the messages are one-off notifications with times and numbers;
+    the other half are 400 recurring phrases whose popularity follows a
+    Zipf distribution, like the announcements of a real home.
+    """
+    rng = random.Random(seed)
+    rooms = [f"{first} {second}" for first in ROOMS for second in ROOMS]
+    phrases = [
+        f"{PHRASES[index % len(PHRASES)]}, {rooms[index % len(rooms)]}" for index in range(400)
+    ]
+    weights = [1 / (rank + 1) ** 0.8 for rank in range(len(phrases))]
+    log = []
+    for _ in range(requests):
+        if rng.random() < 0.5:
+            log.append(
+                f"Package from Amazon arrived at {rng.randrange(24)}:{rng.randrange(60):02d}, "
+                f"order {rng.randrange(10**6)}"
+            )
+        else:
+            log.append(rng.choices(phrases, weights)[0])
+    return log
+
+
+async def replay(log, admission, max_bytes=400_000):
+    """Replay a message log through a cache and return its hit ratio."""
+    cache = AudioCache(max_bytes=max_bytes, hot_max_bytes=max_bytes // 10, admission=admission)
+    hits = 0
+    for message in log:
+        if await cache.async_get(message) is not None:
+            hits += 1
+        else:
+            # Roughly 150 bytes of compressed audio per character
+            cache.put(message, "mp3", bytes(150 * len(message)), text=message)
+    return hits / len(log)
+
+
+def test_sketch_counts_saturate_and_age():
+    """Test that the sketch estimates counts, caps them and halves them over time."""
+    sketch = FrequencySketch(width=64)
+    for _ in range(5):
+        sketch.increment("phrase")
+    sketch.increment("other")
+    assert sketch.estimate("phrase") >= 5
+    assert sketch.estimate("unseen") <= 1
+
+    for _ in range(100):
+        sketch.increment("phrase")
+
+    # The width is 64, so 640 increments halve every counter
+    assert sketch.estimate("phrase") == SKETCH_MAX_COUNT
+    for index in range(640 - sketch.additions):
+        sketch.increment(f"filler{index}")
+    assert sketch.estimate("phrase") == SKETCH_MAX_COUNT // 2
+    assert sketch.additions == 320
+
+    # A cache of more clips than counters per row widens the sketch, which starts over
+    sketch.ensure_capacity(1000)
+    assert sketch.nbytes == 4 * 1024 // 2
+    assert sketch.estimate("phrase") == 0
+
+
+def test_sketch_counters_sharing_a_byte_are_independent():
+    """Test that the two 4-bit counters of a byte neither carry nor halve into each other."""
+    sketch = FrequencySketch(width=2)
+    assert sketch.nbytes == 4
+    indexes = sketch._indexes("phrase")
+    # A key counted in the other half of every byte
+    other = next(
+        key
+        for key in (f"key{index}" for index in range(1000))
+        if all(mine != theirs for mine, theirs in zip(indexes, sketch._indexes(key)))
+    )
+
+    for _ in range(15):
+        sketch.increment("phrase")
+    for _ in range(4):
+        sketch.increment(other)
+    assert sketch.estimate("phrase") == SKETCH_MAX_COUNT
+    assert sketch.estimate(other) == 4
+
+    # The 20th increment of a sketch this narrow halves the counters
+    sketch.increment(other)
+    assert sketch.estimate("phrase") == SKETCH_MAX_COUNT // 2
+    assert sketch.estimate(other) == 2
+
+
+def test_volatile_spans():
+    """Test that numbers, times and dates count as volatile spans."""
+    assert volatile_spans("Good morning") == 0
+    assert volatile_spans("Package arrived at 3:42") == 1
+    assert volatile_spans("Order 1234 ships on 2024-05-01 at 10.30") == 3
+
+
+async def test_one_off_messages_do_not_evict_recurring_phrases():
+    """Test that a burst of unique messages leaves the popular clips cached."""
+    cache = AudioCache(max_bytes=100_000, hot_max_bytes=20_000)
+    for _ in range(3):
+        for phrase in PHRASES:
+            if await cache.async_get(phrase) is None:
+                cache.put(phrase, "mp3", bytes(10_000), text=phrase)
+
+    for minute in range(200):
+        message = f"Package arrived at 3:{minute:02d}"
+        assert await cache.async_get(message) is None
+        cache.put(message, "mp3", bytes(10_000), text=message)
+
+    assert cache.rejected > 0
+    kept = [phrase for phrase in PHRASES if phrase in cache]
+    assert len(kept) == len(PHRASES)
+    assert cache.footprint()["admission"]["rejected"] == cache.rejected
+
+
+async def test_hit_ratio_against_lru():
+    """Benchmark the hit ratio of admission against plain LRU on a message log.
+
+    Set ``PARASAIL_MESSAGE_LOG`` to a file with one message per line to
+    replay your own log instead of the synthetic one.
+    """
+    if path := os.environ.get("PARASAIL_MESSAGE_LOG"):
+        log = Path(path).read_text(encoding="utf-8").splitlines()
+    else:
+        log = synthetic_log(int(os.environ.get("PARASAIL_LOG_REQUESTS", "20000")))
+
+    tinylfu = await replay(log, admission=True)
+    lru = await replay(log, admission=False)
+    print(f"\n{len(log)} messages: hit ratio {tinylfu:.1%} with admission, {lru:.1%} LRU")
+    if not os.environ.get("PARASAIL_MESSAGE_LOG"):
+        assert tinylfu > lru * 1.2
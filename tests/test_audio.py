@@ -0,0 +1,117 @@
+"""Test silence trimming and loudness normalization."""
+import math
+import struct
+import sys
+from pathlib import Path
+
+import pytest
+
+# Add custom_components to path
+repo_path = Path(__file__).parent.parent
+sys.path.insert(0, str(repo_path))
+
+try:
+    import numpy as np
+
+    from custom_components.parasail_tts.audio import (
+        PcmProcessor,
+        build_wav_header,
+        parse_wav,
+        process_wav,
+    )
+except ImportError as e:
+    pytest.skip(f"Could not import integration: {e}", allow_module_level=True)
+
+SAMPLE_RATE = 16000
+
+
+def make_pcm(silence_before=0.5, tone=1.0, silence_after=0.5, amplitude=2000):
+    """Create 16-bit mono PCM of silence, a sine tone and silence."""
+    samples = [0] * int(SAMPLE_RATE * silence_before)
+    samples += [
+        int(amplitude * math.sin(2 * math.pi * 440 * n / SAMPLE_RATE))
+        for n in range(int(SAMPLE_RATE * tone))
+    ]
+    samples += [0] * int(SAMPLE_RATE * silence_after)
+    return struct.pack(f"<{len(samples)}h", *samples)
+
+
+def make_wav(pcm):
+    """Wrap PCM in a WAV header."""
+    return build_wav_header(1, SAMPLE_RATE, 16, len(pcm)) + pcm
+
+
+def rms_db(pcm):
+    """Return the RMS level of 16-bit PCM in dBFS."""
+    samples = np.frombuffer(pcm, dtype="<i2").astype(np.float64)
+    return 20 * math.log10(math.sqrt(np.mean(samples ** 2)) / 32767)
+
+
+def test_parse_wav():
+    """Test parsing of a canonical WAV header."""
+    info = parse_wav(make_wav(b"\x00\x00" * 10))
+
+    assert info.channels == 1
+    assert info.sample_rate == SAMPLE_RATE
+    assert info.data_offset == 44
+    assert info.data_size == 20
+    assert parse_wav(b"ID3\x03") is None
+
+
+def test_trim_silence():
+    """Test that leading and trailing silence is removed."""
+    processed = process_wav(make_wav(make_pcm()), True, False, -20.0)
+    info = parse_wav(processed)
+
+    duration = info.data_size / 2 / SAMPLE_RATE
+    assert 1.0 <= duration < 1.1
+
+
+def test_normalize_loudness():
+    """Test that quiet audio is brought to the target level."""
+    processed = process_wav(make_wav(make_pcm(0, 1.0, 0)), False, True, -20.0)
+    info = parse_wav(processed)
+
+    level = rms_db(processed[info.data_offset:])
+    assert abs(level + 20.0) < 0.5
+
+
+def test_non_wav_unchanged():
+    """Test that other formats pass through untouched."""
+    assert process_wav(b"ID3\x03mp3data", True, True, -20.0) == b"ID3\x03mp3data"
+
+
+def test_streaming_processor_matches_batch():
+    """Test that chunk-wise trimming produces the same audio as whole-clip trimming."""
+    pcm = make_pcm()
+    processor = PcmProcessor(1, SAMPLE_RATE, True, False, -20.0)
+    output = b""
+    # Odd chunk size splits samples across chunks
+    for index in range(0, len(pcm), 3001):
+        output += processor.feed(pcm[index:index + 3001])
+    output += processor.flush()
+
+    whole = process_wav(make_wav(pcm), True, False, -20.0)[44:]
+    # The streamed output only loses the leading padding that fell in an
+    # earlier chunk, so it is never longer and at most 30 ms shorter.
+    assert len(output) <= len(whole)
+    assert len(whole) - len(output) <= 2 * SAMPLE_RATE * 30 // 1000
+    assert whole.endswith(output[-1000:])
+
+
+@pytest.mark.parametrize("trim_silence", [False, True])
+def test_streaming_normalization_does_not_clip(trim_silence):
+    """Test that a quiet start does not set the gain for the louder speech after it."""
+    pcm = make_pcm(0.1, 0.3, 0, amplitude=150) + make_pcm(0, 1.0, 0.2, amplitude=8000)
+    processor = PcmProcessor(1, SAMPLE_RATE, trim_silence, True, -20.0)
+    output = b""
+    for index in range(0, len(pcm), 3001):
+        output += processor.feed(pcm[index:index + 3001])
+    output += processor.flush()
+
+    whole = process_wav(make_wav(pcm), trim_silence, True, -20.0)[44:]
+    samples = np.frombuffer(output, dtype="<i2").astype(np.int32)
+    assert not np.count_nonzero(np.abs(samples) >= 32767)
+    # The gain comes from the start of the clip, so the level is close to the
+    # whole-clip level rather than equal to it
+    assert abs(rms_db(output) - rms_db(whole)) < 2.0
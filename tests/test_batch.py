@@ -0,0 +1,133 @@
+"""Test the batch synthesis pipeline."""
+import asyncio
+import sys
+from pathlib import Path
+import pytest
+
+# Add custom_components to path
+repo_path = Path(__file__).parent.parent
+sys.path.insert(0, str(repo_path))
+
+try:
+    from homeassistant.core import Context
+
+    from custom_components.parasail_tts.api import ParasailError
+    from custom_components.parasail_tts.batch import async_synthesize_batch
+    from custom_components.parasail_tts.cache import async_get_cache
+    from custom_components.parasail_tts.const import (
+        CONF_DAILY_QUOTA,
+        CONF_LANGUAGE_VOICES,
+    )
+    from custom_components.parasail_tts.usage import async_get_usage
+    from tests.common import make_entity
+except ImportError as e:
+    pytest.skip(f"Could not import integration: {e}", allow_module_level=True)
+
+
+class FakeClient:
+    """Fake Parasail client that records concurrency."""
+
+    def __init__(self, fail_on=()):
+        """Initialize the fake client."""
+        self.in_flight = 0
+        self.max_in_flight = 0
+        self.voices = []
+        self._fail_on = fail_on
+
+    @property
+    def calls(self):
+        """Return the number of requests."""
+        return len(self.voices)
+
+    async def async_synthesize(self, payload, timeouts=None, audio_chunks=None):
+        """Return fake WAV audio after a short delay."""
+        self.voices.append(payload["voice"])
+        self.in_flight += 1
+        self.max_in_flight = max(self.max_in_flight, self.in_flight)
+        try:
+            await asyncio.sleep(0.01)
+            if payload["text"] in self._fail_on:
+                raise ParasailError("boom")
+            return "wav", b"RIFF" + payload["text"].encode()
+        finally:
+            self.in_flight -= 1
+
+
+async def make_loaded_entity(hass, client, **options):
+    """Create an entity whose requests go to a fake client, as added to Home Assistant."""
+    entity = make_entity(hass, client, **options)
+    await entity.async_added_to_hass()
+    await async_get_usage(hass, entity._config_entry).async_load()
+    return entity
+
+
+async def test_batch_bounded_concurrency_and_status(hass):
+    """Test that the batch respects concurrency and reports per-item status."""
+    client = FakeClient(fail_on={"bad"})
+    entity = await make_loaded_entity(hass, client)
+    messages = [f"message {index}" for index in range(20)] + ["bad"]
+    events = []
+    hass.bus.async_listen("parasail_tts_batch_progress", events.append)
+
+    result = await async_synthesize_batch(hass, entity, messages, "en", {}, {}, None, 3)
+    await hass.async_block_till_done()
+
+    assert client.max_in_flight == 3
+    assert result["total"] == 21
+    assert result["succeeded"] == 20
+    assert result["failed"] == 1
+    assert [item["message"] for item in result["items"]] == messages
+    assert result["items"][-1]["status"] == "error"
+    assert all("duration_ms" in item for item in result["items"])
+    assert len(async_get_cache(hass)) == 20
+    assert events
+
+
+async def test_batch_uses_cache_and_writes_files(hass, tmp_path):
+    """Test that cached messages skip the API and files are written."""
+    client = FakeClient()
+    entity = await make_loaded_entity(hass, client)
+
+    await async_synthesize_batch(hass, entity, ["hello"], "en", {}, {}, None, 2)
+    result = await async_synthesize_batch(
+        hass, entity, ["hello", "world"], "en", {}, {}, None, 2, tmp_path
+    )
+
+    assert client.calls == 2
+    assert [item["status"] for item in result["items"]] == ["cached", "ok"]
+    for item in result["items"]:
+        assert Path(item["path"]).read_bytes().startswith(b"RIFF")
+
+
+async def test_batch_takes_the_path_of_a_tts_request(hass):
+    """Test that batch items are routed, keyed and counted like spoken messages."""
+    client = FakeClient()
+    entity = await make_loaded_entity(
+        hass, client, **{CONF_LANGUAGE_VOICES: "de=oai_echo", CONF_DAILY_QUOTA: 10}
+    )
+    config = entity._config_entry.options
+    usage = async_get_usage(hass, entity._config_entry)
+
+    result = await async_synthesize_batch(
+        hass, entity, ["Guten Morgen", "Gute Nacht"], "de", {}, config, Context(user_id="batch"), 1
+    )
+
+    # The German voice is used, and the second message is over the quota
+    assert client.voices == ["oai_echo"]
+    assert [item["status"] for item in result["items"]] == ["ok", "error"]
+    assert result["items"][1]["error"] == "Daily quota exceeded"
+
+    # A TTS request for the same message is served from what the batch cached
+    assert await entity.async_get_tts_audio("Guten Morgen", "de", {}) == (
+        "wav",
+        b"RIFFGuten Morgen",
+    )
+    assert client.calls == 1
+
+    # The batch is charged to its caller, without changing the entity's context
+    contexts = usage.contexts_today()
+    assert contexts["user:batch"].characters == len("Guten Morgen")
+    assert contexts["user:batch"].rejected_requests == 1
+    assert entity._context is None
+    assert sum(counters.cached_requests for counters in contexts.values()) == 1
+    assert contexts["user:batch"].cached_requests == 0
@@ -0,0 +1,124 @@
+"""Test compressed cache storage and the hot and cold cache tiers."""
+import asyncio
+import sys
+from pathlib import Path
+from unittest.mock import MagicMock
+
+import pytest
+
+# Add custom_components to path
+repo_path = Path(__file__).parent.parent
+sys.path.insert(0, str(repo_path))
+
+try:
+    import numpy as np
+
+    from custom_components.parasail_tts.cache import AudioCache, async_get_cache
+    from custom_components.parasail_tts.codec import (
+        compress_audio,
+        decompress_audio,
+        is_compressed,
+    )
+    from custom_components.parasail_tts.const import CONF_SHARED_CACHE
+    from custom_components.parasail_tts.diagnostics import (
+        async_get_config_entry_diagnostics,
+    )
+    from custom_components.parasail_tts.shared_cache import FileCacheBackend
+    from custom_components.parasail_tts.wav import build_wav_header
+except ImportError as e:
+    pytest.skip(f"Could not import integration: {e}", allow_module_level=True)
+
+
+def make_clip(seconds=1.0, channels=1, seed=0):
+    """Create a speech-like 24 kHz WAV clip."""
+    rng = np.random.default_rng(seed)
+    time = np.arange(int(24000 * seconds)) / 24000
+    voice = 6000 * np.sin(2 * np.pi * 180 * time) * np.sin(2 * np.pi * 3 * time)
+    pcm = (voice + rng.normal(0, 50, time.size)).astype("<i2")
+    pcm = np.repeat(pcm[:, None], channels, axis=1)
+    return build_wav_header(channels, 24000, 16, pcm.nbytes) + pcm.tobytes()
+
+
+async def wait_for_compression(cache, timeout=5.0):
+    """Wait until the executor compressed every cold clip."""
+    async with asyncio.timeout(timeout):
+        while any(not is_compressed(entry.data) for entry in cache._cold.values()):
+            await asyncio.sleep(0.01)
+
+
+@pytest.mark.parametrize("channels", [1, 2])
+def test_codec_round_trip_is_lossless(channels):
+    """Test that compressed clips decode to the identical bytes."""
+    clip = make_clip(channels=channels) + b"LIST\x02\x00\x00\x00ab"
+    compressed = compress_audio(clip)
+
+    assert is_compressed(compressed)
+    assert len(compressed) < len(clip) * 0.7
+    assert decompress_audio(compressed) == clip
+
+
+def test_codec_passes_through_other_formats():
+    """Test that MP3 and odd-sized data are not touched."""
+    mp3 = b"ID3\x03" + bytes(100)
+    assert compress_audio(mp3) is mp3
+    assert decompress_audio(mp3) is mp3
+
+
+async def test_cold_tier_is_compressed_and_promoted_on_hit(hass):
+    """Test that clips beyond the hot tier are compressed and decoded on a hit."""
+    clips = {f"clip-{index}": make_clip(seed=index) for index in range(4)}
+    cache = AudioCache(max_bytes=10 * 1024 * 1024, hot_max_bytes=60_000)
+    for key, clip in clips.items():
+        cache.put(key, "wav", clip)
+    await wait_for_compression(cache)
+
+    footprint = cache.footprint()
+    assert footprint["hot"]["entries"] == 1
+    assert footprint["cold"]["entries"] == 3
+    assert footprint["cold"]["bytes"] < footprint["cold"]["uncompressed_bytes"] * 0.7
+    assert cache.size == footprint["hot"]["bytes"] + footprint["cold"]["bytes"]
+
+    assert await cache.async_get("clip-0") == ("wav", clips["clip-0"])
+    assert cache.footprint()["hot"]["entries"] == 1
+    assert await cache.async_get("clip-0") == ("wav", clips["clip-0"])
+
+
+async def test_compression_makes_room_for_more_clips(hass):
+    """Test that the same budget holds more clips than uncompressed storage."""
+    clip_size = len(make_clip())
+    cache = AudioCache(max_bytes=clip_size * 4, hot_max_bytes=clip_size)
+    for index in range(5):
+        cache.put(f"clip-{index}", "wav", make_clip(seed=index))
+        await wait_for_compression(cache)
+
+    assert len(cache) == 5
+    assert cache.size <= clip_size * 4
+
+
+async def test_shared_directory_is_compressed(hass, tmp_path):
+    """Test that the shared directory stores compressed clips."""
+    clip = make_clip()
+    backend = FileCacheBackend(hass, tmp_path)
+    await backend.async_put("ab" + "0" * 62, "wav", clip)
+
+    assert await backend.async_get("ab" + "0" * 62) == ("wav", clip)
+    footprint = await backend.async_footprint()
+    assert footprint["entries"] == 1
+    assert footprint["bytes"] < len(clip) * 0.7
+
+
+async def test_diagnostics_report_every_tier(hass, tmp_path):
+    """Test that diagnostics report the memory tiers and the shared directory."""
+    entry = MagicMock()
+    entry.options = {CONF_SHARED_CACHE: str(tmp_path)}
+    async_get_cache(hass).put("clip", "wav", make_clip())
+
+    diagnostics = await async_get_config_entry_diagnostics(hass, entry)
+
+    assert diagnostics["cache"]["hot"]["entries"] == 1
+    assert diagnostics["cache"]["cold"]["entries"] == 0
+    assert diagnostics["shared_cache"] == {
+        "directory": str(tmp_path),
+        "entries": 0,
+        "bytes": 0,
+    }
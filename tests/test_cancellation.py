@@ -0,0 +1,128 @@
+"""Test that cancelled requests abort the stream against a local mock server."""
+import asyncio
+import base64
+import sys
+from pathlib import Path
+from unittest.mock import patch
+
+import pytest
+
+# Add custom_components to path
+repo_path = Path(__file__).parent.parent
+sys.path.insert(0, str(repo_path))
+
+try:
+    from aiohttp import ClientSession, web
+
+    from custom_components.parasail_tts.api import ParasailClient, build_payload
+    from custom_components.parasail_tts.cache import async_get_cache, cache_key
+    from custom_components.parasail_tts.const import (
+        CONF_CACHE_PARTIAL,
+        DEFAULT_MODEL,
+        PARTIAL_VARIANT,
+    )
+    from tests.common import audio_event, make_entity, mock_api
+except ImportError as e:
+    pytest.skip(f"Could not import integration: {e}", allow_module_level=True)
+
+EVENT_COUNT = 200
+CHUNK_SIZE = 4096
+
+
+class SlowSSEServer:
+    """Local SSE server that records how much it sent and when."""
+
+    def __init__(self):
+        """Initialize the server state."""
+        self.bytes_sent = 0
+        self.bytes_at_cancel = None
+        self.finished = asyncio.Event()
+
+    async def handle(self, request):
+        """Stream audio events slowly until done or disconnected."""
+        response = web.StreamResponse(headers={"Content-Type": "text/event-stream"})
+        await response.prepare(request)
+        try:
+            for index in range(EVENT_COUNT):
+                audio = bytes([index % 256]) * CHUNK_SIZE
+                if index == 0:
+                    audio = b"RIFF" + audio[4:]
+                line = audio_event(audio, chunk=index + 1)
+                await response.write(line)
+                self.bytes_sent += len(line)
+                await asyncio.sleep(0.005)
+        except (ConnectionResetError, asyncio.CancelledError):
+            pass
+        finally:
+            self.finished.set()
+        return response
+
+    def mark_cancelled(self):
+        """Remember how much had been sent when the client cancelled."""
+        self.bytes_at_cancel = self.bytes_sent
+
+
+@pytest.fixture
+async def sse_server(socket_enabled):
+    """Run the slow SSE server for the duration of a test."""
+    state = SlowSSEServer()
+    async with mock_api(state.handle) as url:
+        state.url = url
+        yield state
+
+
+async def test_cancel_aborts_stream(sse_server):
+    """Test that cancelling stops the transfer almost immediately."""
+    async with ClientSession() as session:
+        client = ParasailClient(session, sse_server.url)
+        first_chunk = asyncio.Event()
+        chunks = []
+
+        async def consume():
+            async for chunk in client.async_iter_audio(build_payload("Hello", {})):
+                chunks.append(chunk)
+                first_chunk.set()
+
+        task = asyncio.create_task(consume())
+        await first_chunk.wait()
+        task.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await task
+        sse_server.mark_cancelled()
+
+        await asyncio.wait_for(sse_server.finished.wait(), 2)
+
+    wasted = sse_server.bytes_sent - sse_server.bytes_at_cancel
+    total = EVENT_COUNT * len(base64.b64encode(bytes(CHUNK_SIZE)))
+    print(f"Wasted {wasted} bytes after cancel ({wasted / total:.1%} of the full response)")
+    assert sse_server.bytes_sent < total / 4
+    assert wasted < total / 20
+
+
+async def test_entity_cancel_skips_partial_cache(hass, sse_server):
+    """Test that partial audio is only cached when the option is on, and never served."""
+    for cache_partial in (False, True):
+        entity = make_entity(
+            hass,
+            models={DEFAULT_MODEL: {"url": sse_server.url, "languages": ["en"]}},
+            **{CONF_CACHE_PARTIAL: cache_partial},
+        )
+        message = f"partial {cache_partial}"
+
+        async with ClientSession() as session:
+            with patch(
+                "custom_components.parasail_tts.tts.async_create_clientsession",
+                return_value=session,
+            ):
+                task = asyncio.create_task(
+                    entity.async_get_tts_audio(message, "en", {})
+                )
+                await asyncio.sleep(0.1)
+                task.cancel()
+                with pytest.raises(asyncio.CancelledError):
+                    await task
+
+        payload = build_payload(message, entity._config_entry.options)
+        cache = async_get_cache(hass)
+        assert cache_key(payload, DEFAULT_MODEL) not in cache
+        assert (cache_key(payload, DEFAULT_MODEL, PARTIAL_VARIANT) in cache) is cache_partial
@@ -0,0 +1,113 @@
+"""Test the voice and model catalog."""
+import asyncio
+import json
+import sys
+from pathlib import Path
+
+import pytest
+
+# Add custom_components to path
+repo_path = Path(__file__).parent.parent
+sys.path.insert(0, str(repo_path))
+
+try:
+    from pytest_homeassistant_custom_component.test_util.aiohttp import (
+        AiohttpClientMockResponse,
+    )
+
+    from custom_components.parasail_tts.catalog import (
+        ParasailCatalog,
+        parse_catalog,
+    )
+    from custom_components.parasail_tts.const import (
+        CATALOG_FILE,
+        DOMAIN,
+        PARASAIL_CATALOG_URL,
+        VOICE_NAMES,
+    )
+except ImportError as e:
+    pytest.skip(f"Could not import integration: {e}", allow_module_level=True)
+
+CATALOG = {
+    "voices": ["oai_nova", {"id": "new_voice", "name": "New Voice"}],
+    "models": [{"id": "parasail-tts-de", "url": "https://example.com/de", "languages": ["de"]}],
+}
+
+
+def test_parse_catalog():
+    """Test parsing voices given as ids and as objects."""
+    voices, models = parse_catalog(CATALOG)
+
+    assert voices == {"oai_nova": "Nova", "new_voice": "New Voice"}
+    assert models["parasail-tts-de"]["languages"] == ["de"]
+
+    with pytest.raises(ValueError):
+        parse_catalog({"voices": []})
+
+
+async def test_catalog_defaults_without_network(hass, aioclient_mock):
+    """Test that the built-in catalog is used when the API is unreachable."""
+    aioclient_mock.get(PARASAIL_CATALOG_URL, exc=OSError("offline"))
+    catalog = ParasailCatalog(hass)
+
+    await catalog.async_refresh()
+
+    assert catalog.voices == VOICE_NAMES
+    assert catalog.stale
+
+
+async def test_catalog_fetch_and_revalidate(hass, aioclient_mock):
+    """Test that the catalog is fetched once and then revalidated with its ETag."""
+    aioclient_mock.get(PARASAIL_CATALOG_URL, json=CATALOG, headers={"ETag": '"v1"'})
+    catalog = ParasailCatalog(hass)
+
+    await catalog.async_refresh()
+    assert "new_voice" in catalog.voices
+    assert not catalog.stale
+
+    # Within the TTL no request is made
+    await catalog.async_refresh()
+    assert aioclient_mock.call_count == 1
+
+    aioclient_mock.clear_requests()
+    aioclient_mock.get(PARASAIL_CATALOG_URL, status=304)
+    await catalog.async_refresh(force=True)
+    assert aioclient_mock.mock_calls[0][3]["If-None-Match"] == '"v1"'
+    assert "new_voice" in catalog.voices
+
+
+async def test_catalog_local_file(hass, aioclient_mock, tmp_path):
+    """Test that a local catalog file is used instead of the API."""
+    hass.config.config_dir = str(tmp_path)
+    (tmp_path / CATALOG_FILE).write_text(json.dumps(CATALOG))
+    catalog = ParasailCatalog(hass)
+
+    await catalog.async_refresh()
+
+    assert "new_voice" in catalog.voices
+    assert aioclient_mock.call_count == 0
+
+
+async def test_flow_does_not_wait_for_the_catalog(
+    hass, enable_custom_integrations, aioclient_mock
+):
+    """Test that the setup form uses the catalog at hand and refreshes it in the background."""
+    release = asyncio.Event()
+
+    async def slow_catalog(method, url, data):
+        await release.wait()
+        return AiohttpClientMockResponse(method, url, json=CATALOG)
+
+    aioclient_mock.get(PARASAIL_CATALOG_URL, side_effect=slow_catalog)
+
+    result = await asyncio.wait_for(
+        hass.config_entries.flow.async_init(DOMAIN, context={"source": "user"}), 1
+    )
+    assert result["type"] == "form"
+    assert "new_voice" not in result["data_schema"].schema["voice"].container
+
+    release.set()
+    await hass.async_block_till_done()
+    result = await hass.config_entries.flow.async_init(DOMAIN, context={"source": "user"})
+    assert "new_voice" in result["data_schema"].schema["voice"].container
+    assert aioclient_mock.call_count == 1
@@ -0,0 +1,154 @@
+"""Test the compact index of the disk cache."""
+import asyncio
+import os
+import sys
+import time
+from pathlib import Path
+from unittest.mock import patch
+
+import pytest
+
+# Add custom_components to path
+repo_path = Path(__file__).parent.parent
+sys.path.insert(0, str(repo_path))
+
+try:
+    from custom_components.parasail_tts import storage
+    from custom_components.parasail_tts.const import DISK_SNAPSHOT_FILE
+    from custom_components.parasail_tts.index import DiskIndex, Location, key_digest
+    from custom_components.parasail_tts.storage import DiskStore
+except ImportError as e:
+    pytest.skip(f"Could not import integration: {e}", allow_module_level=True)
+
+
+def digests(count, prefix="key"):
+    """Return the digests of some keys."""
+    return [key_digest(f"{prefix}{index}") for index in range(count)]
+
+
+def build_index(count):
+    """Return an index of keys spread over segments of 1000 records."""
+    index = DiskIndex()
+    for number, digest in enumerate(digests(count)):
+        index.add(digest, number // 1000 + 1, number % 1000 * 4096, 4096)
+    return index
+
+
+def lookup_time(index, probes):
+    """Return the best time of a few rounds of lookups, per lookup."""
+    best = float("inf")
+    for _ in range(3):
+        started = time.perf_counter()
+        for digest in probes:
+            index.get(digest)
+        best = min(best, time.perf_counter() - started)
+    return best / len(probes)
+
+
+async def start(hass, directory):
+    """Start a store and wait until it loaded its index."""
+    store = DiskStore(hass, directory, commit_interval=0)
+    store.async_start()
+    async with asyncio.timeout(5):
+        while not store.loaded:
+            await asyncio.sleep(0.01)
+    return store
+
+
+def test_lookups_find_stored_keys_and_nothing_else():
+    """Test that every stored digest is found at its location, and no other."""
+    index = build_index(10_000)
+    for number, digest in enumerate(digests(10_000)):
+        assert digest in index
+        assert index.get(digest) == Location(number // 1000 + 1, number % 1000 * 4096, 4096)
+
+    for digest in digests(10_000, "other"):
+        assert digest not in index
+        assert index.get(digest) is None
+
+
+def test_index_reuses_slots_and_survives_a_snapshot():
+    """Test adding, replacing and removing records, and the snapshot round trip."""
+    index = build_index(3000)
+    first, last = key_digest("key0"), key_digest("key2999")
+    assert index.get(first) == Location(1, 0, 4096)
+    index.add(first, 4, 100, 200)
+    assert index.get(first) == Location(4, 100, 200)
+    assert len(index) == 3000
+
+    assert index.remove_segment(2) == 1000
+    assert index.get(key_digest("key1500")) is None
+    assert key_digest("key1500") not in index
+    size = index.nbytes
+    for digest in digests(500, "new"):
+        index.add(digest, 5, 0, 10)
+    # Removed slots were reused
+    assert index.nbytes == size
+
+    snapshot = index.to_snapshot({1: 10, 3: 20, 4: 30, 5: 40})
+    restored, segments = DiskIndex.from_snapshot(snapshot)
+    assert segments == {1: 10, 3: 20, 4: 30, 5: 40}
+    assert len(restored) == len(index) == 2500
+    assert restored.get(first) == Location(4, 100, 200)
+    assert restored.get(last) == Location(3, 999 * 4096, 4096)
+    assert restored.get(key_digest("new7")) == Location(5, 0, 10)
+    assert restored.get(key_digest("key1500")) is None
+
+    assert DiskIndex.from_snapshot(snapshot[:100] + b"x" + snapshot[101:]) is None
+    assert DiskIndex.from_snapshot(snapshot[:-1]) is None
+    assert DiskIndex.from_snapshot(b"") is None
+
+
+def test_lookup_cost_stays_flat():
+    """Test that hits and misses cost the same in a large index as in a small one."""
+    small, large = build_index(1_000), build_index(200_000)
+    hits = digests(1_000)
+    misses = digests(20_000, "missing")
+
+    # 200 times the keys; a large dict only adds CPU cache misses, not work
+    assert lookup_time(large, hits) < lookup_time(small, hits) * 10
+    assert lookup_time(large, misses) < lookup_time(small, misses) * 10
+    # The arrays stay within 48 bytes per key
+    assert large.nbytes < 200_000 * 48
+
+
+async def test_store_loads_the_snapshot_and_scans_only_newer_records(hass, tmp_path):
+    """Test that a restart only reads the records written after the snapshot."""
+    store = await start(hass, tmp_path)
+    for index in range(50):
+        store.put(f"key{index}", "mp3", os.urandom(1000))
+    async with asyncio.timeout(5):
+        while store.footprint()["queued"]:
+            await asyncio.sleep(0.01)
+    await store.async_close()
+    assert (tmp_path / DISK_SNAPSHOT_FILE).exists()
+
+    # Records written by a run that stopped before saving its snapshot
+    await hass.async_add_executor_job(
+        storage._append_records,
+        tmp_path / "segment-000009.log",
+        [("late", "mp3", b"late audio")],
+    )
+    scanned = []
+    real_scan = storage._scan_segment
+
+    def scan_segment(path, number, start, index):
+        scanned.append((number, start))
+        return real_scan(path, number, start, index)
+
+    with patch.object(storage, "_scan_segment", scan_segment):
+        reopened = await start(hass, tmp_path)
+    assert scanned == [(9, 0)]
+    assert reopened.footprint()["entries"] == 51
+    assert await reopened.async_get("late") == ("mp3", b"late audio")
+    assert "key49" in reopened
+    await reopened.async_close()
+
+    # A damaged snapshot falls back to scanning everything
+    (tmp_path / DISK_SNAPSHOT_FILE).write_bytes(b"garbage")
+    scanned.clear()
+    with patch.object(storage, "_scan_segment", scan_segment):
+        rescanned = await start(hass, tmp_path)
+    assert len(scanned) == 2
+    assert rescanned.footprint()["entries"] == 51
+    await rescanned.async_close()
@@ -0,0 +1,104 @@
+"""Test the jitter buffer of streamed replies."""
+import asyncio
+import sys
+import time
+from pathlib import Path
+
+import pytest
+
+# Add custom_components to path
+repo_path = Path(__file__).parent.parent
+sys.path.insert(0, str(repo_path))
+
+try:
+    from custom_components.parasail_tts.const import JITTER_MAX_DEPTH
+    from custom_components.parasail_tts.jitter import JitterStats, async_iter_jitter_buffered
+except ImportError as e:
+    pytest.skip(f"Could not import integration: {e}", allow_module_level=True)
+
+# Chunks of 50 ms of audio at one byte per millisecond
+CHUNK = bytes(50)
+
+
+def seconds(chunk):
+    """Return the playing time of a test chunk."""
+    return len(chunk) / 1000
+
+
+async def source(pattern):
+    """Yield a chunk after each delay of the pattern."""
+    for delay in pattern:
+        await asyncio.sleep(delay)
+        yield CHUNK
+
+
+async def play(pattern, stats, min_depth):
+    """Buffer a stream and return when each chunk was handed out."""
+    started = time.monotonic()
+    return [
+        time.monotonic() - started
+        async for _ in async_iter_jitter_buffered(source(pattern), seconds, stats, min_depth)
+    ]
+
+
+def test_depth_follows_lateness():
+    """Test that steady arrivals keep the minimum and bursty ones deepen the buffer."""
+    steady = JitterStats()
+    for _ in range(50):
+        steady.observe(-0.04)
+    assert steady.depth(0.1) == 0.1
+
+    bursty = JitterStats()
+    for index in range(50):
+        bursty.observe(0.4 if index % 4 == 3 else -0.05)
+    assert 0.3 < bursty.depth(0.1) < JITTER_MAX_DEPTH
+
+    for _ in range(50):
+        bursty.observe(30.0)
+    assert bursty.depth(0.1) == JITTER_MAX_DEPTH
+
+
+async def test_holds_back_the_minimum_depth():
+    """Test that playback starts once the depth is buffered, without underruns."""
+    stats = JitterStats()
+    # 50 ms of audio every 10 ms, well ahead of playback
+    times = await play([0.01] * 10, stats, 0.15)
+
+    assert len(times) == 10
+    # Three chunks make up the 150 ms, and come out together
+    assert 0.025 < times[0] < 0.1
+    assert times[2] - times[0] < 0.01
+    assert stats.start_latency == pytest.approx(times[0], abs=0.01)
+    assert stats.underruns == 0
+
+
+async def test_underruns_are_counted_and_learned_from():
+    """Test that gaps longer than the buffer are underruns, and the depth adapts."""
+    # Bursts of 150 ms of audio, then a gap of 300 ms
+    pattern = [0, 0, 0, 0.3, 0, 0, 0.3, 0, 0, 0.3, 0, 0]
+    stats = JitterStats()
+
+    await play(pattern, stats, 0.05)
+    assert stats.underruns >= 1
+    assert stats.underrun_seconds > 0.1
+    learned = stats.depth(0.05)
+    assert learned > 0.15
+
+    underruns = stats.underruns
+    times = await play(pattern, stats, 0.05)
+    assert stats.underruns == underruns
+    assert len(times) == len(pattern)
+    assert stats.streams == 2
+
+
+async def test_unknown_lengths_and_disabled_buffer_pass_through():
+    """Test that audio of unknown length and a depth of 0 are not held back."""
+    stats = JitterStats()
+    started = time.monotonic()
+    stream = async_iter_jitter_buffered(source([0, 1]), lambda chunk: None, stats, 0.5)
+    assert await anext(stream) == CHUNK
+    assert time.monotonic() - started < 0.1
+    await stream.aclose()
+
+    times = await play([0, 0.05], JitterStats(), 0)
+    assert times[0] < 0.01
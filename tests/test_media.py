@@ -0,0 +1,123 @@
+"""Test serving cached clips to media players through the media source."""
+import sys
+from pathlib import Path
+
+import pytest
+
+# Add custom_components to path
+repo_path = Path(__file__).parent.parent
+sys.path.insert(0, str(repo_path))
+
+try:
+    from aiohttp import web
+    from aiohttp.test_utils import TestClient, TestServer
+
+    from homeassistant.components import media_source
+    from homeassistant.setup import async_setup_component
+
+    from custom_components.parasail_tts.cache import async_get_cache
+    from custom_components.parasail_tts.const import DOMAIN, MEDIA_SPOOL_DIRECTORY
+    from custom_components.parasail_tts.media import (
+        MediaSpool,
+        ParasailMediaView,
+        async_get_media_spool,
+    )
+except ImportError as e:
+    pytest.skip(f"Could not import integration: {e}", allow_module_level=True)
+
+CLIP = bytes(range(256)) * 64
+KEY = "a" * 64
+
+
+@pytest.fixture
+async def cached(hass, tmp_path, enable_custom_integrations):
+    """Set up the integration and the media source with two cached clips."""
+    hass.config.config_dir = str(tmp_path)
+    assert await async_setup_component(hass, DOMAIN, {})
+    assert await async_setup_component(hass, "media_source", {})
+    await hass.async_block_till_done()
+
+    cache = async_get_cache(hass)
+    cache.put("b" * 64, "mp3", b"older", text="The garage door is open")
+    cache.put(KEY, "wav", CLIP, text="Welcome home!")
+    return tmp_path / MEDIA_SPOOL_DIRECTORY
+
+
+async def test_browse_and_resolve(hass, cached):
+    """Test that cached clips are listed with their messages and resolve to a file."""
+    browsed = await media_source.async_browse_media(hass, f"media-source://{DOMAIN}")
+    assert [child.title for child in browsed.children] == [
+        "Welcome home!",
+        "The garage door is open",
+    ]
+    assert browsed.children[0].media_content_id == f"media-source://{DOMAIN}/{KEY}"
+
+    resolved = await media_source.async_resolve_media(
+        hass, browsed.children[0].media_content_id, None
+    )
+    assert resolved.url == f"/api/parasail_tts/media/{KEY}.wav"
+    assert resolved.mime_type == "audio/wav"
+    assert (cached / f"{KEY}.wav").read_bytes() == CLIP
+
+    with pytest.raises(media_source.Unresolvable):
+        await media_source.async_resolve_media(hass, f"media-source://{DOMAIN}/{'c' * 64}", None)
+    with pytest.raises(media_source.Unresolvable):
+        await media_source.async_resolve_media(hass, f"media-source://{DOMAIN}/../secrets", None)
+
+
+async def test_range_and_conditional_requests(hass, cached, socket_enabled):
+    """Test that clips are served with range requests and ETags."""
+    view = ParasailMediaView(hass)
+
+    async def handle(request):
+        """Call the view without the authentication of the Home Assistant server."""
+        return await view.get(request, request.match_info["filename"])
+
+    app = web.Application()
+    app.router.add_get(view.url, handle)
+    client = TestClient(TestServer(app))
+    await client.start_server()
+    url = f"/api/parasail_tts/media/{KEY}.wav"
+
+    response = await client.get(url)
+    assert response.status == 200
+    assert response.headers["Content-Type"] == "audio/wav"
+    assert response.headers["Accept-Ranges"] == "bytes"
+    assert await response.read() == CLIP
+    etag = response.headers["ETag"]
+
+    response = await client.get(url, headers={"Range": "bytes=1000-1999"})
+    assert response.status == 206
+    assert response.headers["Content-Range"] == f"bytes 1000-1999/{len(CLIP)}"
+    assert await response.read() == CLIP[1000:2000]
+
+    response = await client.get(url, headers={"If-None-Match": etag})
+    assert response.status == 304
+
+    for missing in (f"{'c' * 64}.wav", f"{KEY}.mp3", "secrets.yaml"):
+        response = await client.get(f"/api/parasail_tts/media/{missing}")
+        assert response.status == 404
+
+    await client.close()
+    assert view.requires_auth
+
+
+async def test_spool_is_bounded_and_reused(hass, cached):
+    """Test that the least recently requested files go first and survive a restart."""
+    spool = async_get_media_spool(hass)
+    spool._max_bytes = len(CLIP) + 24
+    assert await spool.async_path(KEY) is not None
+    assert await spool.async_path("b" * 64) is not None
+    assert await spool.async_path(KEY) is not None
+
+    cache = async_get_cache(hass)
+    cache.put("d" * 64, "mp3", bytes(20), text="Dinner is ready")
+    assert await spool.async_path("d" * 64) is not None
+    assert sorted(path.name for path in cached.iterdir()) == [f"{KEY}.wav", f"{'d' * 64}.mp3"]
+
+    # Files are reused after a restart, without the clips being in the cache
+    restarted = MediaSpool(hass, cached)
+    cache._discard(KEY)
+    path = await restarted.async_path(KEY)
+    assert path.read_bytes() == CLIP
+    assert restarted.size == len(CLIP) + 20
@@ -0,0 +1,124 @@
+"""Test rendering a sample message in several voices at once."""
+import asyncio
+import sys
+import time
+from pathlib import Path
+
+import pytest
+
+# Add custom_components to path
+repo_path = Path(__file__).parent.parent
+sys.path.insert(0, str(repo_path))
+
+try:
+    from aiohttp import web
+
+    from homeassistant.core import Context
+    from pytest_homeassistant_custom_component.common import MockConfigEntry
+
+    from custom_components.parasail_tts.const import (
+        CONF_VOICE,
+        DOMAIN,
+        SERVICE_PREVIEW_VOICES,
+        VOICE_NAMES,
+    )
+    from custom_components.parasail_tts.usage import async_get_usage
+    from custom_components.parasail_tts.wav import build_wav_header
+    from tests.common import DONE_EVENT, audio_event, mock_api, write_catalog
+except ImportError as e:
+    pytest.skip(f"Could not import integration: {e}", allow_module_level=True)
+
+# Every request takes this long, so rendering one voice after the other would
+# take eight times as long as rendering them side by side
+RENDER_SECONDS = 0.3
+PCM = bytes(3200)
+
+
+@pytest.fixture
+async def parasail(hass, socket_enabled, tmp_path, enable_custom_integrations):
+    """Set up an entry against a slow mock API and return the voices it was asked for."""
+    requested = []
+
+    async def handle_tts(request):
+        """Mock Parasail API that takes a while and fails for one voice."""
+        payload = await request.json()
+        requested.append(payload["voice"])
+        await asyncio.sleep(RENDER_SECONDS)
+        if payload["voice"] == "broken":
+            return web.Response(status=500, text="Internal error")
+        audio = build_wav_header(1, 16000, 16, len(PCM)) + PCM
+        return web.Response(
+            body=audio_event(audio) + DONE_EVENT, content_type="text/event-stream"
+        )
+
+    async with mock_api(handle_tts) as url:
+        hass.config.config_dir = str(tmp_path)
+        write_catalog(tmp_path, url)
+        entry = MockConfigEntry(domain=DOMAIN, data={CONF_VOICE: "oai_nova"})
+        entry.add_to_hass(hass)
+        assert await hass.config_entries.async_setup(entry.entry_id)
+        await hass.async_block_till_done()
+
+        yield requested
+
+        assert await hass.config_entries.async_unload(entry.entry_id)
+        await hass.async_block_till_done()
+
+
+async def preview(hass, context=None, **data):
+    """Call the preview service and return its response and duration."""
+    started = time.monotonic()
+    response = await hass.services.async_call(
+        DOMAIN,
+        SERVICE_PREVIEW_VOICES,
+        data,
+        blocking=True,
+        context=context,
+        return_response=True,
+    )
+    return response, time.monotonic() - started
+
+
+async def test_all_voices_render_in_the_time_of_one(hass, parasail):
+    """Test that all voices are rendered side by side and then served from the cache."""
+    response, elapsed = await preview(hass, message="Welcome home!")
+
+    assert sorted(parasail) == sorted(VOICE_NAMES)
+    assert elapsed < RENDER_SECONDS * 2
+    assert response["succeeded"] == len(VOICE_NAMES)
+    items = {item["voice"]: item for item in response["items"]}
+    assert items["oai_echo"]["name"] == "Echo"
+    assert items["oai_echo"]["format"] == "wav"
+    assert items["oai_echo"]["media_content_id"].startswith(
+        "media-source://tts/tts.parasail_tts_parasail_resemble_tts_en?message=Welcome+home!"
+    )
+    assert "voice=oai_echo" in items["oai_echo"]["media_content_id"]
+
+    # Speaking with a previewed voice is served from the cache
+    response, elapsed = await preview(hass, message="Welcome home!", voices=["oai_echo"])
+    assert response["items"][0]["status"] == "ok"
+    assert elapsed < RENDER_SECONDS / 2
+    assert len(parasail) == len(VOICE_NAMES)
+
+
+async def test_concurrency_is_bounded_and_failures_reported(hass, parasail):
+    """Test that at most max_concurrency voices render at once, and failures are listed."""
+    voices = ["oai_nova", "oai_echo", "broken", "oai_sage"]
+    response, elapsed = await preview(hass, voices=voices, max_concurrency=2)
+
+    assert elapsed > RENDER_SECONDS * 2
+    assert [item["voice"] for item in response["items"]] == voices
+    assert response["items"][2]["status"] == "error"
+    assert "media_content_id" not in response["items"][2]
+    assert response["succeeded"] == 3
+    assert response["failed"] == 1
+
+
+async def test_usage_is_charged_to_the_caller(hass, parasail):
+    """Test that the renders are counted for the user who called the service."""
+    await preview(hass, Context(user_id="previewer"), voices=["oai_nova", "oai_echo"])
+
+    (entry,) = hass.config_entries.async_entries(DOMAIN)
+    contexts = async_get_usage(hass, entry).contexts_today()
+    assert list(contexts) == ["user:previewer"]
+    assert contexts["user:previewer"].requests == 2
@@ -0,0 +1,108 @@
+"""Test the opt-in profiling session."""
+import asyncio
+import json
+import sys
+import time
+from pathlib import Path
+import pytest
+
+# Add custom_components to path
+repo_path = Path(__file__).parent.parent
+sys.path.insert(0, str(repo_path))
+
+try:
+    from pytest_homeassistant_custom_component.common import MockConfigEntry
+
+    from custom_components.parasail_tts.const import (
+        CONF_VOICE,
+        DATA_PROFILER,
+        DOMAIN,
+        PARASAIL_CATALOG_URL,
+        PROFILE_DIRECTORY,
+    )
+    from custom_components.parasail_tts.profiling import ProfileSession
+    from tests.common import make_entity
+except ImportError as e:
+    pytest.skip(f"Could not import integration: {e}", allow_module_level=True)
+
+
+class BlockingClient:
+    """Fake client that blocks the event loop while synthesizing."""
+
+    async def async_synthesize(self, payload, timeouts=None, audio_chunks=None):
+        """Block the loop for 200 ms, then return audio."""
+        await asyncio.sleep(0.05)
+        time.sleep(0.2)
+        await asyncio.sleep(0.05)
+        return "wav", b"RIFF" + payload["text"].encode()
+
+
+def make_blocking_entity(hass):
+    """Create an entity using the blocking client."""
+    entity = make_entity(hass, BlockingClient())
+    entity.entity_id = "tts.parasail_test"
+    return entity
+
+
+async def test_profile_session_writes_profiles_and_spans(hass, tmp_path):
+    """Test that profiles and blocking spans are written for N requests."""
+    hass.config.config_dir = str(tmp_path)
+    entity = make_blocking_entity(hass)
+
+    ProfileSession(hass, 2, 30).async_start()
+    await entity.async_get_tts_audio("first", "en", {})
+    await entity.async_get_tts_audio("second", "en", {})
+    await hass.async_block_till_done()
+
+    assert DATA_PROFILER not in hass.data
+    directory = tmp_path / PROFILE_DIRECTORY
+    assert len(list(directory.glob("*.prof"))) == 2
+
+    (blocking_file,) = directory.glob("*_blocking.json")
+    spans = json.loads(blocking_file.read_text())["spans"]
+    assert all(span["blocked_ms"] > 30 for span in spans)
+    assert any("async_synthesize" in "".join(span["stack"]) for span in spans)
+
+
+async def test_no_session_means_no_profiling(hass, tmp_path):
+    """Test that nothing is written when profiling is disabled."""
+    hass.config.config_dir = str(tmp_path)
+    entity = make_blocking_entity(hass)
+
+    result = await entity.async_get_tts_audio("hello", "en", {})
+
+    assert result[0] == "wav"
+    assert not (tmp_path / PROFILE_DIRECTORY).exists()
+
+
+async def test_session_stops_after_its_maximum_duration(hass, tmp_path):
+    """Test that a session with requests left stops when its time is up."""
+    hass.config.config_dir = str(tmp_path)
+    session = ProfileSession(hass, 5, 30, max_duration=0.1)
+    session.async_start()
+
+    await asyncio.sleep(0.2)
+    await hass.async_block_till_done()
+
+    assert DATA_PROFILER not in hass.data
+    assert session.remaining == 0
+    assert len(list((tmp_path / PROFILE_DIRECTORY).glob("*_blocking.json"))) == 1
+
+
+async def test_unloading_an_entry_stops_the_session(
+    hass, tmp_path, enable_custom_integrations, aioclient_mock
+):
+    """Test that the session ends with the entities it profiles."""
+    aioclient_mock.get(PARASAIL_CATALOG_URL, json={"voices": ["oai_nova"], "models": []})
+    hass.config.config_dir = str(tmp_path)
+    entry = MockConfigEntry(domain=DOMAIN, data={CONF_VOICE: "oai_nova"})
+    entry.add_to_hass(hass)
+    assert await hass.config_entries.async_setup(entry.entry_id)
+    await hass.async_block_till_done()
+    ProfileSession(hass, 5, 30).async_start()
+
+    assert await hass.config_entries.async_unload(entry.entry_id)
+    await hass.async_block_till_done()
+
+    assert DATA_PROFILER not in hass.data
+    assert len(list((tmp_path / PROFILE_DIRECTORY).glob("*_blocking.json"))) == 1
@@ -0,0 +1,170 @@
+"""Test capturing raw streams and replaying them under load."""
+import asyncio
+import json
+import os
+import statistics
+import sys
+import time
+from pathlib import Path
+import pytest
+
+# Add custom_components to path
+repo_path = Path(__file__).parent.parent
+sys.path.insert(0, str(repo_path))
+
+try:
+    from aiohttp import ClientSession, web
+
+    from custom_components.parasail_tts.api import ParasailClient, ParasailError
+    from custom_components.parasail_tts.capture import CaptureSession
+    from custom_components.parasail_tts.const import CAPTURE_DIRECTORY, DATA_CAPTURE
+    from custom_components.parasail_tts.wav import build_wav_header
+    from tests.common import DONE_EVENT, audio_event, make_entity, mock_api, serve
+    from tools.replay_server import create_app, load_captures
+except ImportError as e:
+    pytest.skip(f"Could not import integration: {e}", allow_module_level=True)
+
+# Point these at real captures and raise the numbers for a proper load test
+REPLAY_DIR = os.environ.get("PARASAIL_REPLAY_DIR")
+LOAD_REQUESTS = int(os.environ.get("PARASAIL_LOAD_REQUESTS", "300"))
+LOAD_CONCURRENCY = int(os.environ.get("PARASAIL_LOAD_CONCURRENCY", "100"))
+
+CHUNK_DELAY = 0.05
+
+
+def audio_events(text):
+    """Return the SSE events of a short WAV clip for a text."""
+    pcm = text.encode() * 200
+    chunks = [build_wav_header(1, 16000, 16, len(pcm)) + pcm[:1000], pcm[1000:]]
+    return [audio_event(chunk) for chunk in chunks] + [DONE_EVENT]
+
+
+async def handle_upstream(request):
+    """Stand in for the Parasail API, sending events with a delay between them."""
+    payload = await request.json()
+    if payload["text"] == "fail":
+        return web.Response(status=503, text="Overloaded")
+    response = web.StreamResponse(headers={"Content-Type": "text/event-stream"})
+    await response.prepare(request)
+    for event in audio_events(payload["text"]):
+        await asyncio.sleep(CHUNK_DELAY)
+        await response.write(event)
+    return response
+
+
+def make_server_entity(hass, session, url):
+    """Create an entity whose client talks to a local server."""
+    entity = make_entity(hass)
+    entity._clients[entity.default_language] = ParasailClient(session, url)
+    return entity
+
+
+async def async_run_load(entity, messages, concurrency):
+    """Speak the messages with bounded concurrency and report throughput and latency."""
+    semaphore = asyncio.Semaphore(concurrency)
+    latencies = []
+    failures = 0
+
+    async def speak(message):
+        nonlocal failures
+        async with semaphore:
+            started = time.monotonic()
+            try:
+                result = await entity.async_get_tts_audio(message, "en", {})
+            except Exception:  # noqa: BLE001
+                result = None
+            if result is None or result[1] is None:
+                failures += 1
+            else:
+                latencies.append(time.monotonic() - started)
+
+    started = time.monotonic()
+    await asyncio.gather(*(speak(message) for message in messages))
+    elapsed = time.monotonic() - started
+    cuts = statistics.quantiles(latencies, n=100) if len(latencies) > 1 else [0.0] * 99
+    return {
+        "requests": len(messages),
+        "failures": failures,
+        "seconds": elapsed,
+        "throughput": len(messages) / elapsed,
+        "p50": cuts[49],
+        "p95": cuts[94],
+        "p99": cuts[98],
+    }
+
+
+async def record_captures(hass, redact_text):
+    """Capture two streams and a failed request from the stand-in API."""
+    async with mock_api(handle_upstream) as url, ClientSession() as session:
+        entity = make_server_entity(hass, session, url)
+        CaptureSession(hass, 3, redact_text).async_start()
+        for message in ("Hello there", "Good night", "fail"):
+            try:
+                await entity.async_get_tts_audio(message, "en", {})
+            except Exception:  # noqa: BLE001
+                pass
+        await hass.async_block_till_done()
+    return Path(hass.config.path(CAPTURE_DIRECTORY))
+
+
+@pytest.mark.parametrize("redact_text", [False, True])
+async def test_capture_writes_raw_streams(hass, socket_enabled, tmp_path, redact_text):
+    """Test that captures hold the exact bytes, the timing and the request."""
+    hass.config.config_dir = str(tmp_path)
+    directory = await record_captures(hass, redact_text)
+
+    assert DATA_CAPTURE not in hass.data
+    metadata = [json.loads(path.read_text()) for path in sorted(directory.glob("*.json"))]
+    assert [item["status"] for item in metadata] == [200, 200, 503]
+    first = metadata[0]
+    first_stream = sorted(directory.glob("*.sse"))[0].read_bytes()
+    assert first_stream == b"".join(audio_events("Hello there"))
+    assert first["request"]["text"] == (None if redact_text else "Hello there")
+    # Nothing derived from a redacted message is stored
+    assert set(first) == {"version", "url", "request", "status", "reads", "duration"}
+    # The reads are spread over the time the server took to send them
+    assert first["duration"] >= 3 * CHUNK_DELAY
+    assert first["reads"][-1][0] >= 2 * CHUNK_DELAY
+
+
+async def test_replay_matches_capture(hass, socket_enabled, tmp_path):
+    """Test that the replay server sends the captured bytes at the captured pace."""
+    hass.config.config_dir = str(tmp_path)
+    captures = load_captures(await record_captures(hass, redact_text=False))
+
+    for speed, at_least, at_most in ((1, 3 * CHUNK_DELAY, 1.0), (0, 0, 2 * CHUNK_DELAY)):
+        async with serve(create_app(captures, speed)) as server, ClientSession() as session:
+            client = ParasailClient(session, str(server.make_url("/tts")))
+            started = time.monotonic()
+            audio_format, audio = await client.async_synthesize({"text": "Good night"})
+            assert at_least <= time.monotonic() - started < at_most
+            assert audio_format == "wav"
+            assert audio.endswith(b"Good night" * 10)
+
+            with pytest.raises(ParasailError, match="503"):
+                await client.async_synthesize({"text": "fail"})
+
+
+async def test_load_against_replay_server(hass, socket_enabled, tmp_path):
+    """Test hundreds of concurrent requests against replayed streams."""
+    hass.config.config_dir = str(tmp_path)
+    if REPLAY_DIR:
+        captures = load_captures(REPLAY_DIR)
+    else:
+        captures = load_captures(await record_captures(hass, redact_text=True))
+    # Only replay successful streams; the failed capture would be served in turn
+    captures = [capture for capture in captures if capture.status == 200]
+
+    app = create_app(captures, speed=0)
+    async with serve(app) as server, ClientSession() as session:
+        entity = make_server_entity(hass, session, str(server.make_url("/tts")))
+        messages = [f"Load test message {index}" for index in range(LOAD_REQUESTS)]
+        report = await async_run_load(entity, messages, LOAD_CONCURRENCY)
+
+    print(
+        "\n{requests} requests, {failures} failed, {throughput:.0f} req/s, "
+        "p50 {p50:.3f} s, p95 {p95:.3f} s, p99 {p99:.3f} s".format(**report)
+    )
+    assert report["failures"] == 0
+    assert app["stats"]["served"] == LOAD_REQUESTS
+    assert report["p50"] <= report["p95"] <= report["p99"]
@@ -0,0 +1,70 @@
+"""Test per-language routing and warm cache pinning."""
+import sys
+from pathlib import Path
+
+import pytest
+
+# Add custom_components to path
+repo_path = Path(__file__).parent.parent
+sys.path.insert(0, str(repo_path))
+
+try:
+    from custom_components.parasail_tts.cache import AudioCache
+    from custom_components.parasail_tts.const import (
+        CONF_LANGUAGE_VOICES,
+        CONF_VOICE,
+        DEFAULT_MODEL,
+    )
+    from custom_components.parasail_tts.routing import (
+        build_routes,
+        parse_language_voices,
+        resolve_route,
+    )
+except ImportError as e:
+    pytest.skip(f"Could not import integration: {e}", allow_module_level=True)
+
+
+def test_parse_language_voices():
+    """Test parsing of language=voice pairs."""
+    assert parse_language_voices("") == {}
+    assert parse_language_voices("en=oai_nova, de = oai_echo,") == {
+        "en": "oai_nova",
+        "de": "oai_echo",
+    }
+    with pytest.raises(ValueError):
+        parse_language_voices("en")
+
+
+def test_build_routes_defaults_to_model_languages():
+    """Test that the model's languages use the configured voice."""
+    routes = build_routes({CONF_VOICE: "oai_onyx"})
+
+    assert list(routes) == ["en"]
+    assert routes["en"].voice == "oai_onyx"
+    assert routes["en"].model == DEFAULT_MODEL
+
+
+def test_build_routes_with_language_voices():
+    """Test that configured languages are routed to their own voice."""
+    routes = build_routes(
+        {CONF_VOICE: "oai_nova", CONF_LANGUAGE_VOICES: "de=oai_echo, en=oai_sage"}
+    )
+
+    assert set(routes) == {"en", "de"}
+    assert routes["de"].voice == "oai_echo"
+    assert routes["en"].voice == "oai_sage"
+    assert resolve_route(routes, "de-AT", routes["en"]) is routes["de"]
+    assert resolve_route(routes, "fr", routes["en"]) is routes["en"]
+
+
+def test_cache_keeps_pinned_clip_warm():
+    """Test that a pinned clip survives eviction pressure."""
+    cache = AudioCache(max_bytes=10)
+    cache.put("en-latest", "wav", b"12345")
+    cache.pin("en", "en-latest")
+
+    for index in range(5):
+        cache.put(f"other-{index}", "wav", b"12345")
+
+    assert "en-latest" in cache
+    assert cache.size <= 10
@@ -0,0 +1,264 @@
+"""Test the cache shared between Home Assistant instances."""
+import asyncio
+import os
+import sys
+import time
+from pathlib import Path
+from unittest.mock import MagicMock, patch
+
+import pytest
+
+# Add custom_components to path
+repo_path = Path(__file__).parent.parent
+sys.path.insert(0, str(repo_path))
+
+try:
+    from aiohttp import ClientConnectionError, ClientSession
+    from aiohttp.test_utils import TestServer
+
+    from custom_components.parasail_tts.api import ParasailError
+    from custom_components.parasail_tts.const import (
+        CONF_SHARED_CACHE,
+        DATA_CACHE,
+        SHARED_CACHE_RETRY_INTERVAL,
+        SHARED_LOCK_TTL,
+    )
+    from custom_components.parasail_tts.shared_cache import (
+        FAILURE_FORMAT,
+        FAILURE_SUFFIX,
+        LOCK_SUFFIX,
+        FileCacheBackend,
+        HttpCacheBackend,
+    )
+    from tests.common import make_entity
+    from tools.cache_server import create_app
+except ImportError as e:
+    pytest.skip(f"Could not import integration: {e}", allow_module_level=True)
+
+KEY = "ab" + "0" * 62
+
+
+class SlowClient:
+    """Fake client that takes a while and counts its calls."""
+
+    def __init__(self, error=None):
+        """Initialize the client."""
+        self.calls = 0
+        self._error = error
+
+    async def async_synthesize(self, payload, timeouts=None, audio_chunks=None):
+        """Return audio for the payload after a delay."""
+        self.calls += 1
+        await asyncio.sleep(0.3)
+        if self._error:
+            raise self._error
+        return "wav", b"RIFF" + payload["text"].encode()
+
+
+async def make_node(hass, client, location):
+    """Create an entity standing in for one Home Assistant instance."""
+    entity = make_entity(hass, client, **{CONF_SHARED_CACHE: str(location)})
+    await entity.async_added_to_hass()
+    return entity
+
+
+async def test_file_backend_round_trip_and_expiry(hass, tmp_path):
+    """Test storing clips and failures in a directory."""
+    backend = FileCacheBackend(hass, tmp_path)
+
+    assert await backend.async_get(KEY) is None
+    await backend.async_put(KEY, "wav", b"RIFFdata")
+    assert await backend.async_get(KEY) == ("wav", b"RIFFdata")
+    assert (tmp_path / "ab" / KEY).exists()
+    assert not list((tmp_path / "ab").glob(".tmp-*"))
+
+    await backend.async_put(KEY, "wav", b"RIFFgone", ttl=-1)
+    assert await backend.async_get(KEY) is None
+    assert not (tmp_path / "ab" / KEY).exists()
+
+
+async def test_file_backend_prunes_the_directory(hass, tmp_path):
+    """Test that expired markers, stale locks and the oldest clips beyond the size go."""
+    writer = FileCacheBackend(hass, tmp_path)
+    await writer.async_put(KEY + FAILURE_SUFFIX, FAILURE_FORMAT, b"boom", ttl=-1)
+    await writer.async_lock(KEY)
+    stale = time.time() - SHARED_LOCK_TTL - 1
+    os.utime(tmp_path / "ab" / (KEY + LOCK_SUFFIX), (stale, stale))
+    (tmp_path / "ab" / ".tmp-abandoned").write_bytes(b"RIFF")
+    os.utime(tmp_path / "ab" / ".tmp-abandoned", (stale, stale))
+
+    # A backend sweeps the directory after its first write
+    backend = FileCacheBackend(hass, tmp_path, max_bytes=4096)
+    keys = [f"{index:02d}" + "0" * 62 for index in range(4)]
+    for index, key in enumerate(keys):
+        await backend.async_put(key, "wav", b"RIFF" + os.urandom(1500))
+        written = time.time() - 10 + index
+        os.utime(tmp_path / key[:2] / key, (written, written))
+
+    remaining = sorted(path.name for path in tmp_path.glob("*/*"))
+    assert remaining == keys[2:]
+    assert sum(path.stat().st_size for path in tmp_path.glob("*/*")) <= 4096
+
+
+async def test_file_backend_lock_is_exclusive_and_breaks_when_stale(hass, tmp_path):
+    """Test that only one instance holds a lock until it goes stale."""
+    first = FileCacheBackend(hass, tmp_path)
+    second = FileCacheBackend(hass, tmp_path)
+
+    assert await first.async_lock(KEY)
+    assert not await second.async_lock(KEY)
+    assert await second.async_is_locked(KEY)
+
+    stale = time.time() - SHARED_LOCK_TTL - 1
+    os.utime(tmp_path / "ab" / (KEY + LOCK_SUFFIX), (stale, stale))
+    assert await second.async_lock(KEY)
+
+    await second.async_unlock(KEY)
+    assert not await first.async_is_locked(KEY)
+
+
+async def test_http_backend_against_cache_server(hass, socket_enabled):
+    """Test the HTTP backend with the stand-in server."""
+    server = TestServer(create_app(1024 * 1024))
+    await server.start_server()
+    try:
+        async with ClientSession() as session:
+            backend = HttpCacheBackend(session, str(server.make_url("/")))
+
+            await backend.async_put(KEY, "mp3", b"ID3audio")
+            assert await backend.async_get(KEY) == ("mp3", b"ID3audio")
+
+            assert await backend.async_lock(KEY)
+            assert not await backend.async_lock(KEY)
+            await backend.async_unlock(KEY)
+            assert not await backend.async_is_locked(KEY)
+    finally:
+        await server.close()
+
+
+async def test_cache_server_grants_a_lock_once(hass, socket_enabled):
+    """Test that of two lock writes racing while their bodies arrive, one wins."""
+
+    async def slow_body():
+        """Send the body in two parts with a pause between them."""
+        yield b"lo"
+        await asyncio.sleep(0.1)
+        yield b"ck"
+
+    async def take_lock(session, url):
+        """Try to create the lock key and return the response status."""
+        async with session.put(
+            url, data=slow_body(), headers={"If-None-Match": "*", "X-TTL": "30"}
+        ) as response:
+            return response.status
+
+    server = TestServer(create_app(1024 * 1024))
+    await server.start_server()
+    try:
+        async with ClientSession() as session:
+            url = str(server.make_url(f"/cache/{KEY}{LOCK_SUFFIX}"))
+            statuses = await asyncio.gather(take_lock(session, url), take_lock(session, url))
+    finally:
+        await server.close()
+
+    assert sorted(statuses) == [201, 412]
+
+
+async def test_unreachable_server_is_a_miss(hass, socket_enabled):
+    """Test that a server that is down behaves like an empty cache."""
+    async with ClientSession() as session:
+        backend = HttpCacheBackend(session, "http://127.0.0.1:9")
+        assert await backend.async_get(KEY) is None
+        assert not await backend.async_lock(KEY)
+
+
+async def test_unreachable_server_is_skipped_for_a_while(hass):
+    """Test that a server that failed is not asked again until the backoff passes."""
+    session = MagicMock()
+    session.get.side_effect = ClientConnectionError("Connection refused")
+    session.put.side_effect = ClientConnectionError("Connection refused")
+    backend = HttpCacheBackend(session, "http://cache.local:8765")
+
+    assert await backend.async_get(KEY) is None
+    assert not backend.available
+    assert not await backend.async_lock(KEY)
+    await backend.async_put(KEY, "wav", b"RIFFdata")
+    await backend.async_unlock(KEY)
+    assert await backend.async_wait(KEY, 10) is None
+    assert session.get.call_count == 1
+    assert session.put.call_count == 0
+    assert session.delete.call_count == 0
+
+    # Once the backoff has passed the server is tried again, and skipped for longer
+    later = time.monotonic() + SHARED_CACHE_RETRY_INTERVAL
+    with patch("custom_components.parasail_tts.shared_cache.time.monotonic", return_value=later):
+        assert backend.available
+        assert await backend.async_get(KEY) is None
+        assert not backend.available
+    assert session.get.call_count == 2
+    assert backend._retry_interval == 2 * SHARED_CACHE_RETRY_INTERVAL
+
+
+async def test_node_synthesizes_alone_while_server_is_down(hass, socket_enabled):
+    """Test that an unreachable server costs one failed connection, not a timeout per call."""
+    client = SlowClient()
+    node = await make_node(hass, client, "http://127.0.0.1:9")
+
+    started = time.monotonic()
+    assert await node.async_get_tts_audio("Hello", "en", {}) == ("wav", b"RIFFHello")
+    assert await node.async_get_tts_audio("Goodbye", "en", {}) == ("wav", b"RIFFGoodbye")
+    await hass.async_block_till_done()
+
+    assert time.monotonic() - started < 2
+    assert client.calls == 2
+    assert not node._shared.available
+
+
+async def test_second_node_reuses_audio(hass, tmp_path):
+    """Test that another instance serves the clip without calling the API."""
+    client = SlowClient()
+    first = await make_node(hass, client, tmp_path)
+    await first.async_get_tts_audio("Hello", "en", {})
+    await hass.async_block_till_done()
+
+    hass.data.pop(DATA_CACHE)
+    second = await make_node(hass, client, tmp_path)
+    result = await second.async_get_tts_audio("Hello", "en", {})
+
+    assert result == ("wav", b"RIFFHello")
+    assert client.calls == 1
+
+
+async def test_concurrent_nodes_synthesize_once(hass, tmp_path):
+    """Test that instances asking at the same time share one API call."""
+    client = SlowClient()
+    nodes = [await make_node(hass, client, tmp_path) for _ in range(3)]
+
+    results = await asyncio.gather(
+        *(node.async_get_tts_audio("Good night", "en", {}) for node in nodes)
+    )
+    await hass.async_block_till_done()
+
+    assert all(result == ("wav", b"RIFFGood night") for result in results)
+    assert client.calls == 1
+
+
+async def test_failures_reach_waiting_nodes_only(hass, tmp_path):
+    """Test that nodes waiting for a failed request give up, and later requests retry."""
+    client = SlowClient(ParasailError("API request failed with status 500"))
+    nodes = [await make_node(hass, client, tmp_path) for _ in range(3)]
+
+    results = await asyncio.gather(
+        *(node.async_get_tts_audio("Broken", "en", {}) for node in nodes)
+    )
+    await hass.async_block_till_done()
+
+    assert results == [None, None, None]
+    assert client.calls == 1
+    (entry,) = tmp_path.glob("*/*")
+    assert entry.name.endswith(FAILURE_SUFFIX)
+    assert entry.read_bytes().startswith(FAILURE_FORMAT.encode())
+
+    # The clip itself was never stored, so the next request tries again
+    assert await nodes[0].async_get_tts_audio("Broken", "en", {}) is None
+    assert client.calls == 2
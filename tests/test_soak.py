@@ -0,0 +1,204 @@
+"""Soak test: thousands of requests must not leak memory, sockets or tasks."""
+import asyncio
+import contextlib
+import gc
+import logging
+import os
+import sys
+import tracemalloc
+from pathlib import Path
+
+import pytest
+
+# Add custom_components to path
+repo_path = Path(__file__).parent.parent
+sys.path.insert(0, str(repo_path))
+
+try:
+    from aiohttp import web
+
+    from homeassistant.components.tts import DOMAIN as TTS_DOMAIN
+    from pytest_homeassistant_custom_component.common import MockConfigEntry
+
+    from custom_components.parasail_tts.cache import AudioCache
+    from custom_components.parasail_tts.const import (
+        CONF_TEMPERATURE,
+        CONF_VOICE,
+        DATA_CACHE,
+        DOMAIN,
+    )
+    from custom_components.parasail_tts.wav import build_wav_header
+    from tests.common import DONE_EVENT, audio_event, mock_api, write_catalog
+except ImportError as e:
+    pytest.skip(f"Could not import integration: {e}", allow_module_level=True)
+
+# Raise these for a longer soak, e.g. PARASAIL_SOAK_REQUESTS=100000
+SOAK_REQUESTS = int(os.environ.get("PARASAIL_SOAK_REQUESTS", "2000"))
+ROUND_SIZE = 40
+RELOAD_EVERY = 10
+SAMPLE_EVERY = 5
+# The first part of the run fills the caches and pools; growth is measured after it
+WARM_UP_FRACTION = 0.25
+
+# Allowed growth between the end of the warm-up and the end of the run. Traced
+# memory scales with the requests made, so a small leak fails a longer soak too.
+MAX_TRACED_PER_REQUEST = int(os.environ.get("PARASAIL_SOAK_MAX_BYTES_PER_REQUEST", "256"))
+MAX_RSS_GROWTH = int(os.environ.get("PARASAIL_SOAK_MAX_RSS_MB", "32")) * 1024 * 1024
+MAX_SOCKET_GROWTH = 2
+MAX_TASK_GROWTH = 2
+
+CLIP_PCM = bytes(range(256)) * 32
+SLOW_EVENTS = 20
+
+
+async def handle_tts(request):
+    """Mock Parasail API: fast streams, slow streams and failures by message."""
+    text = (await request.json())["text"]
+    if text.startswith("fail"):
+        return web.Response(status=500, text="Internal error")
+
+    response = web.StreamResponse(headers={"Content-Type": "text/event-stream"})
+    await response.prepare(request)
+    header = build_wav_header(1, 16000, 16, len(CLIP_PCM) * 2)
+    await response.write(audio_event(header + text.encode() + CLIP_PCM))
+    if text.startswith("slow"):
+        for _ in range(SLOW_EVENTS):
+            await asyncio.sleep(0.005)
+            await response.write(audio_event(CLIP_PCM))
+    else:
+        await response.write(audio_event(CLIP_PCM))
+    await response.write(DONE_EVENT)
+    return response
+
+
+def open_sockets():
+    """Return the number of sockets this process has open, where /proc exists."""
+    try:
+        links = [os.readlink(f"/proc/self/fd/{fd}") for fd in os.listdir("/proc/self/fd")]
+    except OSError:
+        return 0
+    return sum(link.startswith("socket:") for link in links)
+
+
+def resident_bytes():
+    """Return the resident set size of this process, where /proc exists."""
+    try:
+        with open("/proc/self/statm", encoding="ascii") as statm:
+            return int(statm.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except OSError:
+        return 0
+
+
+class LeakMonitor:
+    """Sample memory, sockets and tasks over a run and compare two points of it."""
+
+    def __init__(self):
+        """Initialize the monitor."""
+        self.samples = []
+        self._baseline = None
+
+    def sample(self, requests):
+        """Record the current usage after collecting garbage."""
+        gc.collect()
+        self.samples.append(
+            {
+                "requests": requests,
+                "rss": resident_bytes(),
+                "traced": tracemalloc.get_traced_memory()[0],
+                "sockets": open_sockets(),
+                "tasks": len(asyncio.all_tasks()),
+            }
+        )
+
+    def mark_baseline(self, requests):
+        """Take the sample and allocation snapshot growth is measured from."""
+        self.sample(requests)
+        self._baseline = (self.samples[-1], tracemalloc.take_snapshot())
+
+    def report(self):
+        """Return the growth since the baseline and the top growing allocators."""
+        baseline, snapshot = self._baseline
+        last = self.samples[-1]
+        growth = {key: last[key] - baseline[key] for key in ("rss", "traced", "sockets", "tasks")}
+        top = [
+            str(stat)
+            for stat in tracemalloc.take_snapshot().compare_to(snapshot, "lineno")[:10]
+        ]
+        return growth, top
+
+
+def round_messages(index):
+    """Return the messages of a round: new ones, repeats, failures and slow ones."""
+    messages = [f"Soak message {index} {item}" for item in range(ROUND_SIZE - 8)]
+    messages += [f"Repeated message {item}" for item in range(4)]
+    messages += [f"fail {index} {item}" for item in range(2)]
+    messages += [f"slow {index} {item}" for item in range(2)]
+    return messages
+
+
+async def speak(hass, message):
+    """Speak a message with the current entity, cancelling slow ones midway."""
+    entity = hass.data[TTS_DOMAIN].get_entity("tts.parasail_tts_parasail_resemble_tts_en")
+    task = asyncio.create_task(entity.async_get_tts_audio(message, "en", {}))
+    if message.startswith("slow"):
+        await asyncio.sleep(0.02)
+        task.cancel()
+    with contextlib.suppress(Exception, asyncio.CancelledError):
+        await task
+
+
+async def test_soak_does_not_leak(hass, socket_enabled, tmp_path, enable_custom_integrations):
+    """Test that requests, errors, cancellations and reloads leave nothing behind."""
+    async with mock_api(handle_tts) as url:
+        hass.config.config_dir = str(tmp_path)
+        write_catalog(tmp_path, url)
+        # A small cache fills up during the warm-up, so its growth is not a leak
+        hass.data[DATA_CACHE] = AudioCache(max_bytes=512 * 1024, hot_max_bytes=128 * 1024)
+        entry = MockConfigEntry(
+            domain=DOMAIN,
+            data={CONF_VOICE: "oai_nova"},
+            options={CONF_VOICE: "oai_nova", CONF_TEMPERATURE: 0.5},
+        )
+        entry.add_to_hass(hass)
+        assert await hass.config_entries.async_setup(entry.entry_id)
+        await hass.async_block_till_done()
+
+        rounds = max(SOAK_REQUESTS // ROUND_SIZE, 8)
+        warm_up = int(rounds * WARM_UP_FRACTION)
+        monitor = LeakMonitor()
+        # The log capture of the test run keeps every record, which would look like a leak
+        logging.disable(logging.CRITICAL)
+        # Traced from the start, so clips and connections replaced in the steady
+        # state are not mistaken for growth
+        tracemalloc.start()
+        try:
+            for index in range(rounds):
+                await asyncio.gather(*(speak(hass, message) for message in round_messages(index)))
+                if index % RELOAD_EVERY == RELOAD_EVERY - 1:
+                    # Options changes reload the entry through the update listener
+                    temperature = 0.4 if entry.options[CONF_TEMPERATURE] == 0.5 else 0.5
+                    hass.config_entries.async_update_entry(
+                        entry, options={**entry.options, CONF_TEMPERATURE: temperature}
+                    )
+                await hass.async_block_till_done()
+                requests = (index + 1) * ROUND_SIZE
+                if index == warm_up:
+                    monitor.mark_baseline(requests)
+                elif index % SAMPLE_EVERY == 0:
+                    monitor.sample(requests)
+            monitor.sample(rounds * ROUND_SIZE)
+            growth, top = monitor.report()
+        finally:
+            tracemalloc.stop()
+            logging.disable(logging.NOTSET)
+            assert await hass.config_entries.async_unload(entry.entry_id)
+            await hass.async_block_till_done()
+
+    print(f"\n{rounds * ROUND_SIZE} requests, growth after warm-up: {growth}")
+    print("\n".join(["Top growing allocators:", *top]))
+    measured = (rounds - warm_up - 1) * ROUND_SIZE
+    assert growth["traced"] < MAX_TRACED_PER_REQUEST * measured, "\n".join(top)
+    assert growth["sockets"] <= MAX_SOCKET_GROWTH, monitor.samples
+    assert growth["tasks"] <= MAX_TASK_GROWTH, monitor.samples
+    if growth["rss"]:
+        assert growth["rss"] < MAX_RSS_GROWTH, monitor.samples
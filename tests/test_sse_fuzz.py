@@ -0,0 +1,207 @@
+"""Fuzz the shipped SSE parser against a reference decoder, and budget its CPU time."""
+import base64
+import json
+import random
+import sys
+import time
+from pathlib import Path
+
+import pytest
+
+# Add custom_components to path
+repo_path = Path(__file__).parent.parent
+sys.path.insert(0, str(repo_path))
+
+try:
+    from hypothesis import HealthCheck, given, settings
+    from hypothesis import strategies as st
+
+    from custom_components.parasail_tts.sse import SSEParser, async_iter_events
+except ImportError as e:
+    pytest.skip(f"Could not import integration: {e}", allow_module_level=True)
+
+FUZZ_SETTINGS = settings(
+    max_examples=200,
+    deadline=None,
+    suppress_health_check=[HealthCheck.too_slow, HealthCheck.data_too_large],
+)
+
+# CPU seconds allowed per MB of stream, about ten times what the parser
+# needs today. A quadratic rescan of long lines blows through these by
+# orders of magnitude.
+CPU_BUDGETS = {
+    "small_events": 0.2,
+    "large_events": 0.1,
+    "giant_line": 0.1,
+}
+
+
+def reference_decode(body):
+    """Decode a whole SSE body the simple way: split lines, parse, decode."""
+    audio = []
+    for line in body.split(b"\n"):
+        line = line.strip()
+        if not line.startswith(b"data:"):
+            continue
+        try:
+            event = json.loads(line[5:])
+        except ValueError:
+            continue
+        if isinstance(event, dict) and event.get("type") == "audio":
+            audio.append(base64.b64decode(event["audio_content"]))
+    return audio
+
+
+def parser_decode(body, cuts):
+    """Feed the body to the shipped parser in pieces split at the cuts."""
+    parser = SSEParser()
+    events = []
+    start = 0
+    for cut in sorted(cuts) + [len(body)]:
+        events += parser.feed(body[start:cut])
+        start = cut
+    events += parser.flush()
+    return [
+        base64.b64decode(event["audio_content"])
+        for event in events
+        if event.get("type") == "audio"
+    ]
+
+
+class ChunkedContent:
+    """Mock aiohttp StreamReader returning the body in fixed pieces."""
+
+    def __init__(self, body, cuts):
+        """Initialize with the body and where to split it."""
+        bounds = [0] + sorted(cuts) + [len(body)]
+        self._pieces = [body[a:b] for a, b in zip(bounds, bounds[1:]) if b > a]
+
+    async def read(self, n=-1):
+        """Return the next piece, ignoring the requested size."""
+        return self._pieces.pop(0) if self._pieces else b""
+
+
+# Text fields with multi-byte characters, so splits land inside UTF-8 sequences
+texts = st.text(
+    alphabet=st.characters(blacklist_categories=("Cs",)), max_size=40
+)
+
+
+@st.composite
+def audio_events(draw):
+    """Draw one audio event line with its decoded audio."""
+    audio = draw(st.binary(max_size=3000))
+    event = {
+        "type": "audio",
+        "chunk": draw(st.integers(min_value=0, max_value=10_000)),
+        "audio_content": base64.b64encode(audio).decode(),
+        "text": draw(texts),
+    }
+    space = draw(st.sampled_from(["", " "]))
+    payload = json.dumps(event, ensure_ascii=draw(st.booleans()))
+    return f"data:{space}{payload}".encode()
+
+
+noise_lines = st.sampled_from(
+    [b"", b": keep-alive", b"event: audio", b"id: 7", b"retry: 1000", b'data: {"type":"done"}']
+)
+
+
+@st.composite
+def sse_bodies(draw):
+    """Draw an SSE body mixing audio events, noise, LF and CRLF line endings."""
+    lines = draw(st.lists(st.one_of(audio_events(), noise_lines), max_size=12))
+    endings = [draw(st.sampled_from([b"\n", b"\r\n"])) for _ in lines]
+    body = b"".join(line + ending for line, ending in zip(lines, endings))
+    if draw(st.booleans()) and lines:
+        # Streams may end without a final line break
+        body = body.rstrip(b"\r\n")
+    return body
+
+
+@st.composite
+def bodies_and_cuts(draw):
+    """Draw a body and arbitrary positions to split it at."""
+    body = draw(sse_bodies())
+    cuts = draw(
+        st.lists(st.integers(min_value=0, max_value=len(body)), max_size=30, unique=True)
+    )
+    return body, cuts
+
+
+@FUZZ_SETTINGS
+@given(bodies_and_cuts())
+def test_parser_matches_reference_for_any_split(case):
+    """Test that the parser output does not depend on how the stream is split."""
+    body, cuts = case
+    assert parser_decode(body, cuts) == reference_decode(body)
+
+
+@settings(FUZZ_SETTINGS, max_examples=50)
+@given(bodies_and_cuts())
+def test_every_byte_boundary_of_an_event(case):
+    """Test splitting at every single byte, the worst case for the buffering."""
+    body, _ = case
+    assert parser_decode(body, list(range(1, len(body)))) == reference_decode(body)
+
+
+@FUZZ_SETTINGS
+@given(bodies_and_cuts())
+async def test_reader_matches_reference(case):
+    """Test the async reader used by the client with the same inputs."""
+    body, cuts = case
+    audio = [
+        base64.b64decode(event["audio_content"])
+        async for event in async_iter_events(ChunkedContent(body, cuts))
+        if event.get("type") == "audio"
+    ]
+    assert audio == reference_decode(body)
+
+
+@settings(FUZZ_SETTINGS, max_examples=20)
+@given(
+    st.integers(min_value=256 * 1024, max_value=1024 * 1024),
+    st.integers(min_value=0),
+    st.integers(min_value=1, max_value=8192),
+)
+def test_giant_lines(size, seed, read_size):
+    """Test events far larger than any read, arriving in small pieces."""
+    audio = random.Random(seed).randbytes(size)
+    body = b'data: {"type":"audio","audio_content":"' + base64.b64encode(audio) + b'"}\r\n'
+    cuts = list(range(read_size, len(body), read_size))
+    assert parser_decode(body, cuts) == [audio]
+
+
+def make_body(events, audio_size):
+    """Create a stream of audio events of a fixed size."""
+    audio = bytes(range(256)) * (audio_size // 256 + 1)
+    line = json.dumps(
+        {"type": "audio", "chunk": 1, "audio_content": base64.b64encode(audio[:audio_size]).decode()}
+    ).encode()
+    return b"".join(b"data: " + line + b"\n\n" for _ in range(events))
+
+
+@pytest.mark.parametrize(
+    ("name", "events", "audio_size", "read_size"),
+    [
+        ("small_events", 2000, 512, 65536),
+        ("large_events", 200, 16384, 4096),
+        ("giant_line", 1, 4 * 1024 * 1024, 1024),
+    ],
+)
+def test_cpu_budget_per_mb(name, events, audio_size, read_size):
+    """Test that parsing and decoding stay within their CPU budget per MB."""
+    body = make_body(events, audio_size)
+    megabytes = len(body) / (1024 * 1024)
+
+    started = time.process_time()
+    parser = SSEParser()
+    decoded = 0
+    for start in range(0, len(body), read_size):
+        for event in parser.feed(body[start:start + read_size]):
+            decoded += len(base64.b64decode(event["audio_content"]))
+    parser.flush()
+    seconds_per_mb = (time.process_time() - started) / megabytes
+
+    assert decoded == events * audio_size
+    assert seconds_per_mb < CPU_BUDGETS[name], f"{seconds_per_mb * 1000:.1f} ms/MB"
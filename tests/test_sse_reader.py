@@ -0,0 +1,150 @@
+"""Test and benchmark the adaptive SSE reader against the old fixed read loop."""
+import base64
+import json
+import sys
+import time
+from pathlib import Path
+
+import pytest
+
+# Add custom_components to path
+repo_path = Path(__file__).parent.parent
+sys.path.insert(0, str(repo_path))
+
+try:
+    from custom_components.parasail_tts.sse import (
+        MAX_READ_SIZE,
+        AdaptiveReadSize,
+        SSEParser,
+        async_iter_events,
+    )
+except ImportError as e:
+    pytest.skip(f"Could not import integration: {e}", allow_module_level=True)
+
+
+class CountingContent:
+    """Mock aiohttp StreamReader that counts awaited reads."""
+
+    def __init__(self, data):
+        """Initialize with the full response body."""
+        self._data = data
+        self._pos = 0
+        self.reads = 0
+
+    def at_eof(self):
+        """Return True once all data has been read."""
+        return self._pos >= len(self._data)
+
+    async def read(self, n=-1):
+        """Return up to n bytes, like StreamReader.read."""
+        self.reads += 1
+        if n < 0:
+            n = len(self._data)
+        chunk = self._data[self._pos:self._pos + n]
+        self._pos += len(chunk)
+        return chunk
+
+
+def build_stream(event_count, audio_bytes):
+    """Build an SSE body with event_count audio events of audio_bytes each."""
+    lines = [b'data: {"type":"start","priority":"normal"}\n\n']
+    for index in range(event_count):
+        content = base64.b64encode(bytes([index % 256]) * audio_bytes).decode()
+        event = {"type": "audio", "chunk": index + 1, "audio_content": content}
+        lines.append(b"data: " + json.dumps(event).encode() + b"\n\n")
+    return b"".join(lines)
+
+
+async def fixed_read_loop(content):
+    """Reproduce the previous fixed 4096-byte read loop."""
+    events = []
+    buffer = b''
+    while not content.at_eof():
+        buffer += await content.read(4096)
+        while b'\n' in buffer:
+            line, buffer = buffer.split(b'\n', 1)
+            line_text = line.decode('utf-8').strip()
+            if line_text.startswith('data: '):
+                events.append(json.loads(line_text[6:]))
+    return events
+
+
+async def adaptive_read_loop(content):
+    """Collect all events using the adaptive reader."""
+    return [event async for event in async_iter_events(content)]
+
+
+def test_parser_handles_split_lines():
+    """Test that events split across feeds are reassembled."""
+    body = build_stream(3, 100)
+    parser = SSEParser()
+    events = []
+    for index in range(0, len(body), 7):
+        events.extend(parser.feed(body[index:index + 7]))
+    events.extend(parser.flush())
+
+    assert [event["type"] for event in events] == ["start", "audio", "audio", "audio"]
+    assert parser.pending == 0
+
+
+def test_parser_skips_invalid_json():
+    """Test that a malformed event is skipped without losing later ones."""
+    parser = SSEParser()
+    events = parser.feed(b'data: {not json}\n\ndata: {"type":"audio"}\n')
+
+    assert events == [{"type": "audio"}]
+
+
+def test_parser_flushes_unterminated_line():
+    """Test that a final event without trailing newline is still returned."""
+    parser = SSEParser()
+    assert parser.feed(b'data: {"type":"audio"}') == []
+    assert parser.flush() == [{"type": "audio"}]
+
+
+def test_read_size_grows_and_caps():
+    """Test that the read size grows with large events but stays bounded."""
+    read_size = AdaptiveReadSize()
+    read_size.observe(4096, 0)
+    assert read_size.size == 8192
+
+    read_size.observe(100, 5 * MAX_READ_SIZE)
+    assert read_size.size == MAX_READ_SIZE
+
+
+async def test_adaptive_matches_fixed_loop():
+    """Test that both loops produce identical events."""
+    body = build_stream(20, 50_000)
+
+    fixed = await fixed_read_loop(CountingContent(body))
+    adaptive = await adaptive_read_loop(CountingContent(body))
+
+    assert adaptive == fixed
+
+
+async def test_benchmark_awaits_and_cpu_per_mb():
+    """Benchmark awaits per MB and CPU per MB for both read loops."""
+    body = build_stream(8, 2_000_000)
+    megabytes = len(body) / (1 << 20)
+
+    fixed_content = CountingContent(body)
+    start = time.process_time()
+    await fixed_read_loop(fixed_content)
+    fixed_cpu = time.process_time() - start
+
+    adaptive_content = CountingContent(body)
+    start = time.process_time()
+    await adaptive_read_loop(adaptive_content)
+    adaptive_cpu = time.process_time() - start
+
+    print(
+        f"fixed: {fixed_content.reads / megabytes:.1f} awaits/MB, "
+        f"{fixed_cpu * 1000 / megabytes:.2f} ms CPU/MB"
+    )
+    print(
+        f"adaptive: {adaptive_content.reads / megabytes:.1f} awaits/MB, "
+        f"{adaptive_cpu * 1000 / megabytes:.2f} ms CPU/MB"
+    )
+
+    assert adaptive_content.reads * 20 < fixed_content.reads
+    assert adaptive_cpu < fixed_cpu
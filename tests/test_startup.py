@@ -0,0 +1,97 @@
+"""Benchmark the import and setup time of the integration."""
+import json
+import subprocess
+import sys
+import time
+from pathlib import Path
+
+import pytest
+
+# Add custom_components to path
+repo_path = Path(__file__).parent.parent
+sys.path.insert(0, str(repo_path))
+
+try:
+    from homeassistant.config_entries import ConfigEntryState
+    from homeassistant.const import EVENT_HOMEASSISTANT_STARTED
+    from homeassistant.core import CoreState
+    from homeassistant.setup import async_setup_component
+    from pytest_homeassistant_custom_component.common import MockConfigEntry
+
+    from custom_components.parasail_tts.const import (
+        CONF_VOICE,
+        DOMAIN,
+        PARASAIL_CATALOG_URL,
+    )
+except ImportError as e:
+    pytest.skip(f"Could not import integration: {e}", allow_module_level=True)
+
+# Generous budgets, far above the measured times, so only a regression
+# such as an eager NumPy import (about 75 ms on its own) trips them
+IMPORT_BUDGET = 0.25
+SETUP_BUDGET = 1.0
+ENTRIES = 10
+
+# Modules only loaded once a service that needs them is called
+DEFERRED_MODULES = ["batch", "capture", "media", "preview", "profiling", "shared_cache", "storage"]
+
+IMPORT_SCRIPT = """
+import json, sys, time
+import homeassistant.components.tts, homeassistant.helpers.config_validation
+started = time.perf_counter()
+import custom_components.parasail_tts
+import custom_components.parasail_tts.config_flow
+import custom_components.parasail_tts.diagnostics
+import custom_components.parasail_tts.tts
+print(json.dumps({
+    "seconds": time.perf_counter() - started,
+    "numpy": "numpy" in sys.modules,
+    "modules": [name.rpartition(".")[2] for name in sys.modules if name.startswith("custom_")],
+}))
+"""
+
+
+def test_import_time():
+    """Test that importing the integration is cheap and leaves NumPy alone."""
+    result = subprocess.run(
+        [sys.executable, "-c", IMPORT_SCRIPT],
+        capture_output=True,
+        check=True,
+        cwd=repo_path,
+        text=True,
+    )
+    measured = json.loads(result.stdout.strip().splitlines()[-1])
+
+    assert not measured["numpy"]
+    assert not set(DEFERRED_MODULES) & set(measured["modules"])
+    assert measured["seconds"] < IMPORT_BUDGET
+
+
+async def test_setup_defers_work_until_started(
+    hass, enable_custom_integrations, aioclient_mock
+):
+    """Test that setup makes no requests and warms up once Home Assistant started."""
+    aioclient_mock.get(PARASAIL_CATALOG_URL, json={"voices": ["oai_nova"], "models": []})
+    hass.state = CoreState.starting
+    entries = [
+        MockConfigEntry(domain=DOMAIN, data={CONF_VOICE: "oai_nova"}, entry_id=f"entry_{index}")
+        for index in range(ENTRIES)
+    ]
+    for entry in entries:
+        entry.add_to_hass(hass)
+
+    started = time.perf_counter()
+    assert await async_setup_component(hass, DOMAIN, {})
+    await hass.async_block_till_done()
+    elapsed = time.perf_counter() - started
+
+    assert elapsed < SETUP_BUDGET
+    assert all(entry.state is ConfigEntryState.LOADED for entry in entries)
+    assert len(hass.states.async_entity_ids("tts")) == ENTRIES
+    assert aioclient_mock.call_count == 0
+
+    hass.state = CoreState.running
+    hass.bus.async_fire(EVENT_HOMEASSISTANT_STARTED)
+    await hass.async_block_till_done()
+
+    assert aioclient_mock.call_count == 1
@@ -0,0 +1,259 @@
+"""Test the disk tier of the audio cache."""
+import asyncio
+import os
+import statistics
+import sys
+import time
+from pathlib import Path
+from unittest.mock import patch
+
+import pytest
+
+# Add custom_components to path
+repo_path = Path(__file__).parent.parent
+sys.path.insert(0, str(repo_path))
+
+try:
+    import numpy as np
+
+    from custom_components.parasail_tts.cache import async_get_cache
+    from custom_components.parasail_tts.storage import DiskStore, async_attach_disk_store
+    from custom_components.parasail_tts.wav import build_wav_header
+except ImportError as e:
+    pytest.skip(f"Could not import integration: {e}", allow_module_level=True)
+
+
+def make_clip(seed, seconds=0.1):
+    """Create a short speech-like 24 kHz WAV clip."""
+    rng = np.random.default_rng(seed)
+    time_axis = np.arange(int(24000 * seconds)) / 24000
+    voice = 6000 * np.sin(2 * np.pi * (150 + seed % 100) * time_axis)
+    pcm = (voice + rng.normal(0, 50, time_axis.size)).astype("<i2")
+    return build_wav_header(1, 24000, 16, pcm.nbytes) + pcm.tobytes()
+
+
+async def start(hass, directory, **kwargs):
+    """Start a store and wait until it indexed the directory."""
+    store = DiskStore(hass, directory, **kwargs)
+    store.async_start()
+    async with asyncio.timeout(5):
+        while not store.loaded:
+            await asyncio.sleep(0.01)
+    return store
+
+
+async def wait_written(store, timeout=10.0):
+    """Wait until the store wrote everything queued."""
+    async with asyncio.timeout(timeout):
+        while store.footprint()["queued"]:
+            await asyncio.sleep(0.01)
+
+
+async def monitor_lag(lags, interval=0.005):
+    """Record how late the event loop wakes up a sleeping task."""
+    while True:
+        started = time.monotonic()
+        await asyncio.sleep(interval)
+        lags.append(time.monotonic() - started - interval)
+
+
+def slow_fsync(delay):
+    """Return an fsync that takes as long as on a slow SD card."""
+    real_fsync = os.fsync
+
+    def fsync(fd):
+        time.sleep(delay)
+        real_fsync(fd)
+
+    return fsync
+
+
+async def test_clips_survive_a_restart_with_batched_fsyncs(hass, tmp_path):
+    """Test that a burst of clips is written with few fsyncs and read back later."""
+    clips = {f"key{index}": make_clip(index) for index in range(100)}
+    fsyncs = []
+    real_fsync = os.fsync
+
+    def counting_fsync(fd):
+        fsyncs.append(fd)
+        real_fsync(fd)
+
+    store = await start(hass, tmp_path, commit_interval=0.05)
+    with patch.object(os, "fsync", counting_fsync):
+        for key, clip in clips.items():
+            store.put(key, "wav", clip)
+        # Queued clips are served before they are written
+        assert await store.async_get("key0") == ("wav", clips["key0"])
+        await wait_written(store)
+        await store.async_close()
+
+    assert store.stats["writes"] == 100
+    assert store.stats["batches"] <= 4
+    # One fsync per batch, and one for the index snapshot saved on close
+    assert len(fsyncs) == store.stats["batches"] + 1
+    # Speech compresses, and the records are stored that way
+    assert store.footprint()["bytes"] < sum(map(len, clips.values())) * 0.8
+
+    reopened = await start(hass, tmp_path)
+    assert reopened.footprint()["entries"] == 100
+    for key, clip in clips.items():
+        assert await reopened.async_get(key) == ("wav", clip)
+    # Neighbouring clips came along with the reads before them
+    assert reopened.stats["read_ahead_hits"] > reopened.stats["reads"]
+    assert await reopened.async_get("missing") is None
+    await reopened.async_close()
+
+
+async def test_torn_record_and_corruption_are_skipped(hass, tmp_path):
+    """Test that a record cut short by a crash is ignored and corrupt data is not served."""
+    store = await start(hass, tmp_path, commit_interval=0)
+    store.put("first", "wav", make_clip(1))
+    store.put("second", "wav", make_clip(2))
+    await wait_written(store)
+    await store.async_close()
+
+    segment = next(tmp_path.glob("segment-*.log"))
+    data = segment.read_bytes()
+    segment.write_bytes(data[:-10])
+
+    reopened = await start(hass, tmp_path)
+    assert "first" in reopened
+    assert "second" not in reopened
+    # New records go to a new segment instead of after the torn one
+    reopened.put("third", "wav", make_clip(3))
+    await wait_written(reopened)
+    assert len(list(tmp_path.glob("segment-*.log"))) == 2
+
+    segment.write_bytes(data[:40] + b"x" + data[41:-10])
+    reopened._read_ahead.clear()
+    assert await reopened.async_get("first") is None
+    await reopened.async_close()
+
+
+async def test_oldest_segments_are_evicted(hass, tmp_path):
+    """Test that the store deletes its oldest segments beyond its size."""
+    clip = bytes(range(256)) * 200
+    store = await start(hass, tmp_path, max_bytes=200_000, commit_interval=0)
+    with patch("custom_components.parasail_tts.storage.DISK_SEGMENT_BYTES", 60_000):
+        for index in range(20):
+            store.put(f"key{index}", "mp3", clip)
+            await wait_written(store)
+
+    footprint = store.footprint()
+    assert footprint["bytes"] <= 200_000
+    assert "key0" not in store
+    assert await store.async_get("key19") == ("mp3", clip)
+    assert len(list(tmp_path.glob("segment-*.log"))) == footprint["segments"]
+    await store.async_close()
+
+
+async def test_slow_disk_falls_back_to_memory(hass, tmp_path):
+    """Test that a disk that cannot keep up drops clips instead of blocking."""
+    store = await start(hass, tmp_path, queue_size=8, commit_interval=0.01)
+    lags: list[float] = []
+    monitor = asyncio.create_task(monitor_lag(lags))
+    try:
+        with patch.object(os, "fsync", slow_fsync(0.2)):
+            for index in range(40):
+                store.put(f"key{index}", "wav", make_clip(index))
+                await asyncio.sleep(0)
+            assert store.memory_only
+            assert store.stats["dropped"] > 0
+            await wait_written(store)
+    finally:
+        monitor.cancel()
+
+    # The event loop kept running while the disk was busy
+    assert max(lags) < 0.1
+    # Once caught up, clips are written again
+    assert not store.memory_only
+    store.put("later", "wav", make_clip(99))
+    await wait_written(store)
+    assert "later" in store
+    await store.async_close()
+
+
+async def test_write_errors_switch_to_memory_only(hass, tmp_path):
+    """Test that a failing disk is left alone until the retry interval passed."""
+    store = await start(hass, tmp_path, commit_interval=0)
+
+    def broken_fsync(fd):
+        raise OSError(5, "Input/output error")
+
+    with patch.object(os, "fsync", broken_fsync):
+        store.put("key", "wav", make_clip(1))
+        async with asyncio.timeout(5):
+            while not store.stats["errors"]:
+                await asyncio.sleep(0.01)
+    assert store.memory_only
+    store.put("other", "wav", make_clip(2))
+    assert "other" not in store
+
+    with patch("custom_components.parasail_tts.storage.time.monotonic", return_value=1e12):
+        store.put("other", "wav", make_clip(2))
+    await wait_written(store)
+    assert "other" in store
+    await store.async_close()
+
+
+async def test_cache_reads_through_to_disk(hass, tmp_path):
+    """Test that the audio cache writes to the disk tier and promotes clips from it."""
+    hass.config.config_dir = str(tmp_path)
+    cache = async_get_cache(hass)
+    detach = async_attach_disk_store(hass)
+    detach_other = async_attach_disk_store(hass)
+    store = cache.disk
+    assert store is not None
+
+    cache.put("key", "wav", make_clip(1))
+    await wait_written(store)
+    cache._discard("key")
+    assert "key" in cache
+    assert await cache.async_get("key") == ("wav", make_clip(1))
+    assert cache.footprint()["hot"]["entries"] == 1
+    assert cache.footprint()["disk"]["entries"] == 1
+
+    await detach()
+    assert cache.disk is store
+    await detach_other()
+    assert cache.disk is None
+    assert (tmp_path / "parasail_tts_cache").is_dir()
+
+
+async def test_loop_lag_at_a_thousand_writes_per_minute(hass, tmp_path):
+    """Benchmark the event loop lag while writing to emulated slow SD storage.
+
+    The clips arrive 20 times faster than 1000 per minute, on a disk where
+    every fsync takes 30 ms. Set ``PARASAIL_DISK_WRITES`` for a longer run.
+    """
+    clips = [make_clip(index) for index in range(50)]
+    writes = int(os.environ.get("PARASAIL_DISK_WRITES", "1000"))
+    interval = 60 / 1000 / 20
+    lags: list[float] = []
+
+    store = await start(hass, tmp_path)
+    monitor = asyncio.create_task(monitor_lag(lags))
+    started = time.monotonic()
+    try:
+        with patch.object(os, "fsync", slow_fsync(0.03)):
+            for index in range(writes):
+                store.put(f"key{index}", "wav", clips[index % len(clips)])
+                await asyncio.sleep(interval)
+            await wait_written(store, timeout=30)
+    finally:
+        monitor.cancel()
+    elapsed = time.monotonic() - started
+    await store.async_close()
+
+    lags.sort()
+    p99 = lags[int(len(lags) * 0.99)]
+    print(
+        f"\n{writes} writes in {elapsed:.1f} s, {store.stats['batches']} batches, "
+        f"{store.stats['dropped']} dropped, loop lag "
+        f"median {statistics.median(lags) * 1000:.1f} ms, "
+        f"p99 {p99 * 1000:.1f} ms, max {lags[-1] * 1000:.1f} ms"
+    )
+    assert store.stats["dropped"] == 0
+    assert store.stats["batches"] < writes / 10
+    assert p99 < 0.02
+    assert lags[-1] < 0.1
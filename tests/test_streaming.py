@@ -0,0 +1,274 @@
+"""Test synthesizing text streamed from a conversation agent."""
+import asyncio
+import math
+import struct
+import sys
+import time
+from pathlib import Path
+import pytest
+
+# Add custom_components to path
+repo_path = Path(__file__).parent.parent
+sys.path.insert(0, str(repo_path))
+
+try:
+    from homeassistant.components.tts import ATTR_VOICE
+
+    from custom_components.parasail_tts.cache import async_get_cache
+    from custom_components.parasail_tts.const import (
+        CONF_NORMALIZE_LOUDNESS,
+        CONF_TRIM_SILENCE,
+    )
+    from custom_components.parasail_tts.streaming import (
+        SentenceBuffer,
+        async_iter_pipelined,
+    )
+    from custom_components.parasail_tts.wav import build_wav_header, parse_wav
+    from tests.common import make_entity
+except ImportError as e:
+    pytest.skip(f"Could not import integration: {e}", allow_module_level=True)
+
+
+def test_sentence_buffer_splits_on_boundaries():
+    """Test that pieces are split into sentences, merging short ones."""
+    buffer = SentenceBuffer(min_chars=10)
+    sentences = []
+    for piece in ("Sure! The kitchen light", " is on now. It uses 3.5", " watts.\nAnything else"):
+        sentences += buffer.feed(piece)
+
+    assert sentences == [
+        "Sure! The kitchen light is on now.",
+        "It uses 3.5 watts.",
+    ]
+    assert buffer.flush() == "Anything else"
+
+
+def test_sentence_buffer_splits_the_same_however_text_arrives():
+    """Test that pieces of any size give the same sentences, without rescanning."""
+    text = 'He said "Stop." Then he left!\nIt was 3.5 km. Ok. Fine then… See you (later.) Bye'
+    whole = SentenceBuffer(min_chars=10)
+    expected = whole.feed(text) + [whole.flush()]
+
+    for size in (1, 2, 3, 7):
+        buffer = SentenceBuffer(min_chars=10)
+        sentences = []
+        for start in range(0, len(text), size):
+            sentences += buffer.feed(text[start:start + size])
+            # Only a possible sentence end at the end of the text is searched again
+            assert buffer._scanned == len(buffer._text.rstrip('.!?…"\')'))
+        assert sentences + [buffer.flush()] == expected
+
+    assert expected == [
+        'He said "Stop."',
+        "Then he left!",
+        "It was 3.5 km.",
+        "Ok. Fine then…",
+        "See you (later.)",
+        "Bye",
+    ]
+
+
+async def test_pipelined_output_is_ordered_and_overlapping():
+    """Test that later items run while earlier ones are still producing."""
+    started = {}
+
+    async def items():
+        for item in ("slow", "fast", "last"):
+            yield item
+
+    async def produce(item):
+        started[item] = time.monotonic()
+        await asyncio.sleep(0.2 if item == "slow" else 0.01)
+        yield item.encode()
+        yield b"|"
+
+    begin = time.monotonic()
+    output = [chunk async for chunk in async_iter_pipelined(items(), produce, 2)]
+
+    assert b"".join(output) == b"slow|fast|last|"
+    assert started["fast"] - begin < 0.1
+    assert time.monotonic() - begin < 0.35
+
+
+async def test_pipelined_limits_items_ahead():
+    """Test that no more than max_ahead items run ahead of the current one."""
+    running = 0
+    peak = 0
+
+    async def items():
+        for index in range(10):
+            yield str(index)
+
+    async def produce(item):
+        nonlocal running, peak
+        running += 1
+        peak = max(peak, running)
+        await asyncio.sleep(0.01)
+        running -= 1
+        yield item.encode()
+
+    output = [chunk async for chunk in async_iter_pipelined(items(), produce, 2)]
+
+    assert len(output) == 10
+    assert peak <= 3
+
+
+class StreamingClient:
+    """Fake client streaming one WAV segment per request."""
+
+    def __init__(self):
+        """Initialize the client."""
+        self.requests = []
+        self.voices = []
+
+    async def async_iter_audio(self, payload, timeouts=None):
+        """Yield a header and two PCM chunks for the payload."""
+        self.requests.append((payload["text"], time.monotonic()))
+        self.voices.append(payload["voice"])
+        pcm = payload["text"].encode().ljust(8, b"\0")[:8]
+        yield build_wav_header(1, 24000, 16, 0) + pcm[:4]
+        await asyncio.sleep(0.05)
+        yield pcm[4:]
+
+
+async def test_entity_streams_reply_while_agent_writes(hass):
+    """Test that sentences are synthesized while the text is still arriving."""
+    client = StreamingClient()
+    entity = make_entity(hass, client)
+
+    finished_writing = None
+
+    async def agent_reply():
+        nonlocal finished_writing
+        for piece in ("The front door ", "is locked now. ", "All windows are ", "closed as well."):
+            yield piece
+            await asyncio.sleep(0.1)
+        finished_writing = time.monotonic()
+
+    chunks = [chunk async for chunk in entity._async_stream_audio(agent_reply(), "en")]
+    data = b"".join(chunks)
+    info = parse_wav(data)
+
+    assert [text for text, _ in client.requests] == [
+        "The front door is locked now.",
+        "All windows are closed as well.",
+    ]
+    assert client.requests[0][1] < finished_writing
+    assert data.count(b"RIFF") == 1
+    assert data[info.data_offset:] == b"The fron" + b"All wind"
+
+
+async def test_streamed_sentences_share_the_cache_of_one_shot_requests(hass):
+    """Test that the voice option is used and sentences are cached under the one-shot key."""
+    client = StreamingClient()
+    entity = make_entity(hass, client)
+
+    async def agent_reply():
+        yield "The front door is locked now."
+
+    options = {ATTR_VOICE: "oai_echo"}
+    data = b"".join(
+        [chunk async for chunk in entity._async_stream_audio(agent_reply(), "en", options)]
+    )
+    await hass.async_block_till_done()
+
+    assert client.voices == ["oai_echo"]
+    assert data.endswith(b"The fron")
+    # The one-shot request finds the sentence in the cache; the client cannot synthesize
+    audio = await entity.async_get_tts_audio("The front door is locked now.", "en", options)
+    assert audio[0] == "wav"
+    assert audio[1].endswith(b"The fron")
+    assert await entity.async_get_tts_audio("The front door is locked now.", "en", {}) is None
+
+
+async def test_non_wav_cached_sentence_is_requested_again(hass):
+    """Test that an MP3 cached by a one-shot request is not joined into the WAV stream."""
+    client = StreamingClient()
+    entity = make_entity(hass, client)
+    route = entity._default_route
+    _, key = entity._build_request("The front door is locked now.", route, None, {})
+    async_get_cache(hass).put(key, "mp3", b"ID3\x03mp3 audio")
+
+    async def agent_reply():
+        yield "The front door is locked now."
+
+    data = b"".join([chunk async for chunk in entity._async_stream_audio(agent_reply(), "en")])
+    await hass.async_block_till_done()
+
+    assert b"ID3" not in data
+    assert data[parse_wav(data).data_offset:] == b"The fron"
+    assert [text for text, _ in client.requests] == ["The front door is locked now."]
+    assert (await async_get_cache(hass).async_get(key))[0] == "wav"
+
+
+class PaddedClient:
+    """Fake client streaming a tone between half a second of silence on each side."""
+
+    sample_rate = 16000
+
+    async def async_iter_audio(self, payload, timeouts=None):
+        """Yield the header, then the PCM in chunks of 0.1 seconds."""
+        samples = [0] * (self.sample_rate // 2)
+        samples += [
+            int(2000 * math.sin(2 * math.pi * 440 * n / self.sample_rate))
+            for n in range(self.sample_rate // 2)
+        ]
+        samples += [0] * (self.sample_rate // 2)
+        pcm = struct.pack(f"<{len(samples)}h", *samples)
+        yield build_wav_header(1, self.sample_rate, 16, 0)
+        step = self.sample_rate // 10 * 2
+        for start in range(0, len(pcm), step):
+            yield pcm[start:start + step]
+
+
+async def test_entity_trims_streamed_sentences(hass):
+    """Test that every sentence of a streamed reply is processed, and cached as played."""
+    entity = make_entity(
+        hass, PaddedClient(), **{CONF_TRIM_SILENCE: True, CONF_NORMALIZE_LOUDNESS: True}
+    )
+
+    async def agent_reply():
+        yield "The front door is locked now. All windows are closed as well."
+
+    data = b"".join([chunk async for chunk in entity._async_stream_audio(agent_reply(), "en")])
+    info = parse_wav(data)
+    samples = struct.unpack(f"<{(len(data) - info.data_offset) // 2}h", data[info.data_offset:])
+
+    # Two sentences of 0.5 s of tone, each with at most 30 ms of padding per side
+    assert 2 * 0.5 <= len(samples) / info.sample_rate <= 2 * 0.56
+    assert any(samples[:info.sample_rate // 20])
+
+    # Replaying the sentences from the cache sounds exactly like the stream
+    cached = b""
+    for sentence in ("The front door is locked now.", "All windows are closed as well."):
+        _, key = entity._build_request(
+            sentence, entity._default_route, None, entity._config_entry.options
+        )
+        _, clip = await async_get_cache(hass).async_get(key)
+        cached += clip[parse_wav(clip).data_offset:]
+    assert cached == data[info.data_offset:]
+
+
+async def test_pipelined_cancels_producers_when_closed():
+    """Test that stopping early cancels the items running ahead."""
+    cancelled = []
+
+    async def items():
+        for item in ("first", "second", "third"):
+            yield item
+
+    async def produce(item):
+        try:
+            yield item.encode()
+            await asyncio.sleep(10)
+        except asyncio.CancelledError:
+            cancelled.append(item)
+            raise
+
+    stream = async_iter_pipelined(items(), produce, 2)
+    assert await anext(stream) == b"first"
+    await asyncio.sleep(0.01)
+    await stream.aclose()
+    await asyncio.sleep(0.01)
+
+    assert sorted(cancelled) == ["first", "second", "third"]
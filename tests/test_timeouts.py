@@ -0,0 +1,82 @@
+"""Test the adaptive request timeouts."""
+import asyncio
+import sys
+import time
+from pathlib import Path
+
+import pytest
+
+# Add custom_components to path
+repo_path = Path(__file__).parent.parent
+sys.path.insert(0, str(repo_path))
+
+try:
+    from aiohttp import ClientSession, web
+
+    from homeassistant.const import EVENT_HOMEASSISTANT_FINAL_WRITE
+
+    from custom_components.parasail_tts.api import ParasailClient, ParasailError
+    from custom_components.parasail_tts.const import (
+        MAX_TOTAL_TIMEOUT,
+        THROUGHPUT_STORAGE_KEY,
+    )
+    from custom_components.parasail_tts.timeouts import RequestTimeouts, ThroughputModel
+    from tests.common import audio_event, mock_api
+except ImportError as e:
+    pytest.skip(f"Could not import integration: {e}", allow_module_level=True)
+
+
+async def test_deadline_scales_with_length_and_speed(hass):
+    """Test that the deadline follows message length and observed speed."""
+    model = ThroughputModel(hass)
+
+    assert model.timeouts("oai_nova", 20).total < 20
+    assert model.timeouts("oai_nova", 100_000).total == MAX_TOTAL_TIMEOUT
+    slow = model.timeouts("oai_nova", 2000).total
+
+    for _ in range(20):
+        model.observe("oai_nova", 2000, 20.0)
+    assert model.rates["oai_nova"] == pytest.approx(100.0)
+    assert model.timeouts("oai_nova", 2000).total < slow
+    assert model.timeouts("oai_echo", 2000).total == slow
+
+
+async def test_rates_survive_restart(hass, hass_storage):
+    """Test that the averages are stored and loaded again."""
+    model = ThroughputModel(hass)
+    await model.async_load()
+    model.observe("oai_nova", 300, 3.0)
+    hass.bus.async_fire(EVENT_HOMEASSISTANT_FINAL_WRITE)
+    await hass.async_block_till_done()
+
+    assert hass_storage[THROUGHPUT_STORAGE_KEY]["data"]["rates"] == {"oai_nova": 100.0}
+
+    restarted = ThroughputModel(hass)
+    await restarted.async_load()
+    assert restarted.rates == {"oai_nova": 100.0}
+
+
+@pytest.mark.parametrize("chunks_before_stall", [0, 2])
+async def test_stalled_stream_fails_fast(hass, socket_enabled, chunks_before_stall):
+    """Test that a stalled stream fails on the chunk timeouts, not the total."""
+
+    async def handle(request):
+        response = web.StreamResponse(headers={"Content-Type": "text/event-stream"})
+        await response.prepare(request)
+        for index in range(chunks_before_stall):
+            await response.write(audio_event(bytes([index]) * 64))
+        await asyncio.sleep(10)
+        return response
+
+    async with mock_api(handle) as url, ClientSession() as session:
+        client = ParasailClient(session, url)
+        chunks = []
+        started = time.monotonic()
+        with pytest.raises(ParasailError, match=f"after {chunks_before_stall} chunks"):
+            await client.async_synthesize(
+                {"text": "Hello"},
+                RequestTimeouts(total=30, first_byte=0.3, idle=0.2),
+                audio_chunks=chunks,
+            )
+        assert time.monotonic() - started < 2
+        assert len(chunks) == chunks_before_stall
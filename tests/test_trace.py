@@ -0,0 +1,90 @@
+"""Test the tracing of the audio chunks of requests."""
+import logging
+import sys
+from pathlib import Path
+
+import pytest
+
+# Add custom_components to path
+repo_path = Path(__file__).parent.parent
+sys.path.insert(0, str(repo_path))
+
+try:
+    from aiohttp import ClientSession, web
+
+    from custom_components.parasail_tts.api import ParasailClient, ParasailError
+    from custom_components.parasail_tts.trace import RequestTrace, Tracer
+    from tests.common import audio_event, mock_api
+except ImportError as e:
+    pytest.skip(f"Could not import integration: {e}", allow_module_level=True)
+
+CHUNKS = 50
+LOGGER = "custom_components.parasail_tts"
+
+
+@pytest.fixture
+async def client(socket_enabled):
+    """Return a traced client of a mock API that fails for the voice "broken"."""
+
+    async def handle_tts(request):
+        """Stream a few audio events, then an error event for the broken voice."""
+        payload = await request.json()
+        lines = [
+            audio_event((b"RIFF" if index == 0 else b"") + bytes(100 + index))
+            for index in range(CHUNKS)
+        ]
+        if payload["voice"] == "broken":
+            lines.append(b'data: {"type": "error", "message": "model crashed"}\n\n')
+        return web.Response(body=b"".join(lines), content_type="text/event-stream")
+
+    async with mock_api(handle_tts) as url, ClientSession() as session:
+        client = ParasailClient(session, url)
+        client.tracer = Tracer()
+        yield client
+
+
+def test_ring_buffer_keeps_the_last_events():
+    """Test that a trace keeps the last events of a long stream in fixed-size records."""
+    trace = RequestTrace("oai_nova", 12, max_events=4)
+    for chunk in range(1, 11):
+        arrived = trace._started + chunk * 1_000_000
+        trace.add(chunk, chunk * 100, arrived, arrived + 2_500_000)
+
+    assert len(trace._buffer) == 4 * 16
+    assert [event[0] for event in trace.iter_events()] == [7, 8, 9, 10]
+    described = trace.as_dict()
+    assert described["chunks"] == 10
+    assert described["dropped"] == 6
+    assert described["events"][0] == [7, 700, 7.0, 2.5]
+
+
+async def test_chunks_are_traced_while_debug_logging_is_on(client, caplog):
+    """Test that every chunk is traced, and a failed request is logged with its trace."""
+    caplog.set_level(logging.DEBUG, logger=LOGGER)
+    await client.async_synthesize({"voice": "oai_nova", "text": "Welcome home!"})
+    with pytest.raises(ParasailError):
+        await client.async_synthesize({"voice": "broken", "text": "Welcome home!"})
+
+    ok, failed = (trace.as_dict() for trace in client.tracer.traces)
+    assert ok["outcome"] == "ok"
+    assert ok["characters"] == len("Welcome home!")
+    assert ok["chunks"] == CHUNKS
+    assert [event[0] for event in ok["events"]] == list(range(1, CHUNKS + 1))
+    assert [event[1] for event in ok["events"]][1:] == [100 + index for index in range(1, CHUNKS)]
+    arrivals = [event[2] for event in ok["events"]]
+    assert arrivals == sorted(arrivals)
+    assert failed["outcome"].startswith("error: API returned error event")
+
+    # One log record for the failed request instead of one per chunk
+    assert "Trace of the failed request" in caplog.text
+    assert "Received audio chunk" not in caplog.text
+
+
+async def test_nothing_is_traced_while_debug_logging_is_off(client, caplog):
+    """Test that tracing is off without debug logging."""
+    caplog.set_level(logging.INFO, logger=LOGGER)
+    await client.async_synthesize({"voice": "oai_nova", "text": "Welcome home!"})
+
+    assert not client.tracer.enabled
+    assert not client.tracer.traces
+    assert client.tracer.as_dict()["requests"] == []
@@ -0,0 +1,135 @@
+"""Test usage accounting, quotas and the usage sensors."""
+import sys
+from datetime import timedelta
+from pathlib import Path
+from unittest.mock import AsyncMock, MagicMock, patch
+
+import pytest
+
+# Add custom_components to path
+repo_path = Path(__file__).parent.parent
+sys.path.insert(0, str(repo_path))
+
+try:
+    from homeassistant.const import ATTR_ENTITY_ID, EVENT_HOMEASSISTANT_FINAL_WRITE
+    from homeassistant.core import Context
+    from homeassistant.util import dt as dt_util
+    from pytest_homeassistant_custom_component.common import MockConfigEntry
+
+    from custom_components.parasail_tts.const import (
+        CONF_DAILY_QUOTA,
+        CONF_QUOTA_MODE,
+        CONF_VOICE,
+        DATA_USAGE,
+        DOMAIN,
+        USAGE_RETENTION_DAYS,
+    )
+    from custom_components.parasail_tts.usage import (
+        UsageTracker,
+        async_get_usage,
+        audio_seconds,
+    )
+    from custom_components.parasail_tts.wav import build_wav_header
+    from tests.common import make_config_entry, make_entity
+except ImportError as e:
+    pytest.skip(f"Could not import integration: {e}", allow_module_level=True)
+
+# One second of 16 kHz mono audio
+CLIP = build_wav_header(1, 16000, 16, 32000) + bytes(32000)
+
+
+def test_audio_seconds():
+    """Test that durations are read from WAV headers only."""
+    assert audio_seconds("wav", CLIP) == 1.0
+    assert audio_seconds("mp3", b"ID3" + bytes(100)) == 0.0
+
+
+async def test_counters_roll_over_and_persist(hass, hass_storage):
+    """Test that days are bucketed, pruned and stored."""
+    tracker = UsageTracker(hass, make_config_entry())
+    await tracker.async_load()
+    start = dt_util.now()
+
+    for offset in range(USAGE_RETENTION_DAYS + 2):
+        with patch.object(dt_util, "now", return_value=start + timedelta(days=offset)):
+            tracker.async_record(None, 10, 1.0)
+            tracker.async_record(None, 5, 0.5, cached=True)
+
+            assert tracker.today.characters == 10
+            assert tracker.today.cached_characters == 5
+    assert tracker.window().requests == USAGE_RETENTION_DAYS
+
+    hass.bus.async_fire(EVENT_HOMEASSISTANT_FINAL_WRITE)
+    await hass.async_block_till_done()
+    stored = hass_storage[f"{DOMAIN}.usage.test_entry"]["data"]["days"]
+    assert len(stored) == USAGE_RETENTION_DAYS
+
+
+async def test_requests_are_attributed_to_automations(hass):
+    """Test that the context of an automation run is mapped to the automation."""
+    tracker = UsageTracker(hass, make_config_entry())
+    run = Context()
+    hass.bus.async_fire(
+        "automation_triggered", {ATTR_ENTITY_ID: "automation.doorbell"}, context=run
+    )
+    await hass.async_block_till_done()
+
+    tracker.async_record(run, 12, 1.0)
+    tracker.async_record(Context(user_id="abc"), 3, 0.5)
+    tracker.async_record(None, 1, 0.1)
+
+    contexts = tracker.contexts_today()
+    assert contexts["automation.doorbell"].characters == 12
+    assert contexts["user:abc"].characters == 3
+    assert contexts["unknown"].characters == 1
+
+
+@pytest.mark.parametrize(
+    ("mode", "served_cached"), [("cache_only", True), ("reject", False)]
+)
+async def test_quota_modes(hass, mode, served_cached):
+    """Test that a used up quota limits requests to the cache or refuses them."""
+    client = MagicMock()
+    client.async_synthesize = AsyncMock(return_value=("wav", CLIP))
+    entity = make_entity(hass, client, **{CONF_DAILY_QUOTA: 20, CONF_QUOTA_MODE: mode})
+    entry = entity._config_entry
+
+    assert await entity.async_get_tts_audio("A message of 25 characters", "en") is not None
+    usage = async_get_usage(hass, entry)
+    assert usage.quota_exceeded
+
+    cached = await entity.async_get_tts_audio("A message of 25 characters", "en")
+    assert (cached is not None) is served_cached
+    assert await entity.async_get_tts_audio("Something new", "en") is None
+
+    assert client.async_synthesize.call_count == 1
+    assert usage.today.requests == 1
+    assert usage.today.cached_requests == int(served_cached)
+    assert usage.today.rejected_requests == 2 - int(served_cached)
+
+
+async def test_usage_sensors(hass, enable_custom_integrations):
+    """Test that the sensors follow the counters of their entry."""
+    entry = MockConfigEntry(
+        domain=DOMAIN,
+        data={CONF_VOICE: "oai_nova"},
+        options={CONF_VOICE: "oai_nova", CONF_DAILY_QUOTA: 1000},
+        entry_id="sensor_entry",
+    )
+    entry.add_to_hass(hass)
+    assert await hass.config_entries.async_setup(entry.entry_id)
+    await hass.async_block_till_done()
+
+    async_get_usage(hass, entry).async_record(None, 42, 2.5)
+    await hass.async_block_till_done()
+
+    characters = hass.states.get("sensor.parasail_tts_parasail_resemble_tts_en_characters_today")
+    audio = hass.states.get("sensor.parasail_tts_parasail_resemble_tts_en_audio_today")
+    assert characters.state == "42"
+    assert characters.attributes["daily_quota"] == 1000
+    assert characters.attributes["contexts"] == {"unknown": 42}
+    assert float(audio.state) == 2.5
+
+    assert await hass.config_entries.async_remove(entry.entry_id)
+    await hass.async_block_till_done()
+    assert entry.entry_id not in hass.data[DATA_USAGE]
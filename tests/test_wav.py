@@ -0,0 +1,82 @@
+"""Test the streaming WAV framing."""
+import struct
+import sys
+from pathlib import Path
+
+import pytest
+
+# Add custom_components to path
+repo_path = Path(__file__).parent.parent
+sys.path.insert(0, str(repo_path))
+
+try:
+    from custom_components.parasail_tts.wav import (
+        UNKNOWN_SIZE,
+        WavStreamWriter,
+        build_wav_header,
+        join_audio_chunks,
+        parse_wav,
+    )
+except ImportError as e:
+    pytest.skip(f"Could not import integration: {e}", allow_module_level=True)
+
+
+def segment(pcm, declared_size=0):
+    """Build a WAV segment as the server streams it, with a placeholder size."""
+    return build_wav_header(1, 24000, 16, declared_size) + pcm
+
+
+def test_streaming_header_then_plain_pcm():
+    """Test that later headers are stripped and the first one is a placeholder."""
+    writer = WavStreamWriter()
+    first = writer.feed(segment(b"\x01\x00\x02\x00"))
+    second = writer.feed(segment(b"\x03\x00"))
+
+    assert struct.unpack_from("<I", first, 4)[0] == UNKNOWN_SIZE
+    assert struct.unpack_from("<I", first, 40)[0] == UNKNOWN_SIZE
+    assert first[44:] == b"\x01\x00\x02\x00"
+    assert second == b"\x03\x00"
+    assert writer.segments == 2
+
+
+def test_finalize_writes_real_sizes():
+    """Test that the finalized file is seekable with the correct sizes."""
+    writer = WavStreamWriter()
+    for pcm in (b"\x01\x00" * 10, b"\x02\x00" * 5, b"\x03\x00"):
+        writer.feed(segment(pcm))
+
+    data = writer.finalize()
+    info = parse_wav(data)
+
+    assert struct.unpack_from("<I", data, 4)[0] == len(data) - 8
+    assert struct.unpack_from("<I", data, 40)[0] == 32
+    assert (info.sample_rate, info.channels, info.data_size) == (24000, 1, 32)
+    assert data[info.data_offset:] == b"\x01\x00" * 10 + b"\x02\x00" * 5 + b"\x03\x00"
+
+
+def test_header_split_across_chunks():
+    """Test that a header split over several chunks is held until complete."""
+    data = segment(b"\x05\x00" * 4)
+    writer = WavStreamWriter()
+
+    assert writer.feed(data[:10]) == b""
+    assert writer.feed(data[10:30]) == b""
+    output = writer.feed(data[30:])
+
+    assert output[44:] == b"\x05\x00" * 4
+    assert parse_wav(writer.finalize()).data_size == 8
+
+
+def test_headerless_pcm_after_first_segment():
+    """Test that raw PCM continuing a segment is kept as audio."""
+    data = join_audio_chunks([segment(b"\x01\x00"), b"\x02\x00\x03\x00"])
+    assert parse_wav(data).data_size == 6
+
+
+def test_mp3_passes_through():
+    """Test that audio without a WAV header is not touched."""
+    chunks = [b"ID3\x03\x00" + b"\x00" * 20, b"\xff\xfb\x90\x00"]
+    writer = WavStreamWriter()
+
+    assert [writer.feed(chunk) for chunk in chunks] == chunks
+    assert writer.finalize() == b"".join(chunks)
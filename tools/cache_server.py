@@ -0,0 +1,113 @@
+"""Key-value server sharing the Parasail TTS cache between Home Assistant instances.
+
+Run it on any machine the instances can reach::
+
+    python3 tools/cache_server.py --port 8765 --max-mb 256
+
+and set the shared cache option of every instance to ``http://<host>:8765``.
+The server keeps the audio in memory and only needs aiohttp, so it runs
+without Home Assistant installed.
+"""
+from __future__ import annotations
+
+import argparse
+from collections import OrderedDict
+import re
+import time
+
+from aiohttp import web
+
+KEY_PATTERN = re.compile(r"^[A-Za-z0-9._-]{1,128}$")
+
+
+class KeyValueStore:
+    """Least-recently-used store bounded by size, with optional expiry."""
+
+    def __init__(self, max_bytes: int) -> None:
+        """Initialize the store."""
+        self._entries: OrderedDict[str, tuple[str, bytes, float]] = OrderedDict()
+        self._max_bytes = max_bytes
+        self.size = 0
+
+    def get(self, key: str) -> tuple[str, bytes] | None:
+        """Return the format and data of a key unless it has expired."""
+        if (entry := self._entries.get(key)) is None:
+            return None
+        if entry[2] and entry[2] < time.monotonic():
+            self.delete(key)
+            return None
+        self._entries.move_to_end(key)
+        return entry[0], entry[1]
+
+    def put(self, key: str, audio_format: str, data: bytes, ttl: float) -> None:
+        """Store data under a key, evicting the least recently used keys."""
+        self.delete(key)
+        expires = time.monotonic() + ttl if ttl else 0
+        self._entries[key] = (audio_format, data, expires)
+        self.size += len(data)
+        while self.size > self._max_bytes and self._entries:
+            _, (_, old, _) = self._entries.popitem(last=False)
+            self.size -= len(old)
+
+    def delete(self, key: str) -> None:
+        """Remove a key if present."""
+        if (entry := self._entries.pop(key, None)) is not None:
+            self.size -= len(entry[1])
+
+
+def create_app(max_bytes: int) -> web.Application:
+    """Create the server application."""
+    store = KeyValueStore(max_bytes)
+    routes = web.RouteTableDef()
+
+    def _key(request: web.Request) -> str:
+        key = request.match_info["key"]
+        if not KEY_PATTERN.match(key):
+            raise web.HTTPBadRequest(text="Invalid key")
+        return key
+
+    @routes.get("/cache/{key}")
+    async def get_entry(request: web.Request) -> web.Response:
+        if (entry := store.get(_key(request))) is None:
+            raise web.HTTPNotFound()
+        return web.Response(body=entry[1], headers={"X-Audio-Format": entry[0]})
+
+    @routes.put("/cache/{key}")
+    async def put_entry(request: web.Request) -> web.Response:
+        key = _key(request)
+        try:
+            ttl = float(request.headers.get("X-TTL", 0))
+        except ValueError as err:
+            raise web.HTTPBadRequest(text="Invalid X-TTL") from err
+        data = await request.read()
+        # Create-only writes are how instances take a lock. The check and the
+        # write happen without an await between them, so of two writers only
+        # one can succeed.
+        if request.headers.get("If-None-Match") == "*" and store.get(key) is not None:
+            raise web.HTTPPreconditionFailed()
+        store.put(key, request.headers.get("X-Audio-Format", "wav"), data, ttl)
+        return web.Response(status=201)
+
+    @routes.delete("/cache/{key}")
+    async def delete_entry(request: web.Request) -> web.Response:
+        store.delete(_key(request))
+        return web.Response(status=204)
+
+    app = web.Application(client_max_size=max_bytes)
+    app.add_routes(routes)
+    app["store"] = store
+    return app
+
+
+def main() -> None:
+    """Run the server."""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--host", default="0.0.0.0")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--max-mb", type=int, default=256, help="memory limit in MiB")
+    args = parser.parse_args()
+    web.run_app(create_app(args.max_mb * 1024 * 1024), host=args.host, port=args.port)
+
+
+if __name__ == "__main__":
+    main()
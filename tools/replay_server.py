@@ -0,0 +1,119 @@
+"""Server replaying Parasail TTS streams recorded by the capture service.
+
+Capture some real requests with the ``parasail_tts.capture`` service, then
+serve them back without network access or API credits::
+
+    python3 tools/replay_server.py --directory /config/parasail_tts_captures --speed 1
+
+and point a client at ``http://<host>:8766/``. Every read is sent with the
+timing it was recorded with, divided by ``--speed``; ``--speed 0`` sends
+everything as fast as possible. A request is answered with the capture of
+the same text when there is one, otherwise the captures are served in turn,
+as are all captures recorded with ``redact_text``.
+Like ``cache_server.py``, it only needs aiohttp.
+"""
+from __future__ import annotations
+
+import argparse
+import asyncio
+from dataclasses import dataclass
+import itertools
+import json
+from pathlib import Path
+import time
+from typing import Any
+
+from aiohttp import web
+
+
+@dataclass(slots=True)
+class Capture:
+    """One recorded response."""
+
+    name: str
+    status: int
+    data: bytes
+    reads: list[tuple[float, int]]
+    text: str | None
+
+
+def load_captures(directory: str | Path) -> list[Capture]:
+    """Load the captures of a directory, in the order they were recorded."""
+    captures = []
+    for meta_path in sorted(Path(directory).glob("*.json")):
+        data_path = meta_path.with_suffix(".sse")
+        if not data_path.exists():
+            continue
+        metadata: dict[str, Any] = json.loads(meta_path.read_text(encoding="utf-8"))
+        data = data_path.read_bytes()
+        reads = [(float(offset), int(size)) for offset, size in metadata.get("reads", [])]
+        if sum(size for _, size in reads) != len(data):
+            # Metadata from another recording; send the bytes in one piece
+            reads = [(0.0, len(data))]
+        captures.append(
+            Capture(
+                name=meta_path.stem,
+                status=int(metadata.get("status", 200)),
+                data=data,
+                reads=reads,
+                text=(metadata.get("request") or {}).get("text"),
+            )
+        )
+    return captures
+
+
+def create_app(captures: list[Capture], speed: float = 1.0) -> web.Application:
+    """Create the replay application; a speed of 0 disables the pacing."""
+    if not captures:
+        raise ValueError("No captures to replay")
+    by_text = {capture.text: capture for capture in captures if capture.text}
+    rotation = itertools.cycle(captures)
+    stats = {"served": 0}
+
+    async def replay(request: web.Request) -> web.StreamResponse:
+        try:
+            payload = await request.json()
+        except ValueError as err:
+            raise web.HTTPBadRequest(text="Invalid JSON") from err
+        text = str(payload.get("text", "")) if isinstance(payload, dict) else ""
+        capture = by_text.get(text) or next(rotation)
+        stats["served"] += 1
+
+        if capture.status != 200:
+            return web.Response(status=capture.status, body=capture.data)
+
+        response = web.StreamResponse(headers={"Content-Type": "text/event-stream"})
+        await response.prepare(request)
+        started = time.monotonic()
+        position = 0
+        for offset, size in capture.reads:
+            if speed and (delay := offset / speed - (time.monotonic() - started)) > 0:
+                await asyncio.sleep(delay)
+            await response.write(capture.data[position:position + size])
+            position += size
+        await response.write_eof()
+        return response
+
+    app = web.Application()
+    app.router.add_post("/{path:.*}", replay)
+    app["captures"] = captures
+    app["stats"] = stats
+    return app
+
+
+def main() -> None:
+    """Run the server."""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--directory", default="parasail_tts_captures")
+    parser.add_argument("--host", default="0.0.0.0")
+    parser.add_argument("--port", type=int, default=8766)
+    parser.add_argument(
+        "--speed", type=float, default=1.0, help="replay speed, 0 for as fast as possible"
+    )
+    args = parser.parse_args()
+    app = create_app(load_captures(args.directory), args.speed)
+    web.run_app(app, host=args.host, port=args.port)
+
+
+if __name__ == "__main__":
+    main()